@@ -21,13 +21,42 @@ class Recruit_admin_model extends CI_Model {
 
 	public function update_recruit($id, $data)
 	{
+		// ボットは recruit_members を参照するため、参加者・メンターはそちらへ反映する
+		$members = array();
+		foreach (array('participants' => 'participant', 'mentors' => 'mentor') as $column => $role) {
+			if (array_key_exists($column, $data)) {
+				$members[$role] = json_decode($data[$column], true);
+				unset($data[$column]);
+			}
+		}
+
+		$this->db->trans_start();
 		$this->db->where('id', $id);
-		return $this->db->update('recruits', $data);
+		$this->db->update('recruits', $data);
+		foreach ($members as $role => $user_ids) {
+			$this->db->delete('recruit_members', array('recruit_id' => $id, 'role' => $role));
+			foreach ((array) $user_ids as $user_id) {
+				if ($user_id === '' || $user_id === null) {
+					continue;
+				}
+				// 既に別の役割で登録されているユーザーは重複させない
+				$this->db->query(
+					'INSERT OR IGNORE INTO recruit_members (recruit_id, user_id, role, joined_at) VALUES (?, ?, ?, ?)',
+					array($id, (int) $user_id, $role, time())
+				);
+			}
+		}
+		$this->db->trans_complete();
+		return $this->db->trans_status();
 	}
 
 	public function delete_recruit($id)
 	{
-		return $this->db->delete('recruits', array('id' => $id));
+		$this->db->trans_start();
+		$this->db->delete('recruit_members', array('recruit_id' => $id));
+		$this->db->delete('recruits', array('id' => $id));
+		$this->db->trans_complete();
+		return $this->db->trans_status();
 	}
 
 	public function get_setting($key)
@@ -1,226 +1,531 @@
 # application/controller/GD_bot.py
 import discord
 import asyncio
-from discord.ext import commands, tasks
+import hashlib
+import json
+import time
+from discord.ext import commands
 from typing import Union, Set
-from datetime import datetime, timedelta
+from datetime import datetime
 import pytz
 
 # 実際のプロジェクト構造に合わせてインポートパスを修正してください
-from application.model.recruit import RecruitModel, Recruit
-from application.view.recruit import HeaderView, JoinLeaveButtons
-from application.view.form_view import RecruitFormView
-from application.library.helper import remove_thread_system_msg
+from application.model.recruit import Recruit, STATE_ACTIVE, THREAD_PENDING
+from application.model.recruit_repository import RecruitRepository
+from application.model.reminder_outbox import ReminderOutboxModel
+from application.model.settings import SettingsRegistry, SettingsChanges, INTERNAL_SETTING_KEYS
+from application.model.recruit_changes import RecruitChangeLogModel, CHANGE_DELETE
+from application.model.archive_post import ArchivePostModel
+from application.view.recruit import HeaderView, JoinLeaveButtons, CreateRecruitButton, register_dynamic_items
+from application.library.helper import render_fingerprint
+from application.library.member_cache import MemberResolver
+from application.library.render_scheduler import RenderScheduler
+from application.library.outbound import OutboundQueue, PRIORITY_INTERACTION, PRIORITY_EDIT, PRIORITY_BACKGROUND
+from application.library.deadline_scheduler import DeadlineScheduler
+from application.library.reminder_worker import ReminderOutboxWorker
+from application.library.interaction_metrics import InteractionMetrics
+from application.library.change_tailer import RecruitChangeTailer
+from application.library.system_message_cleaner import ThreadSystemMessageCleaner
+from application.library.thread_archiver import ThreadArchiver
+from application.library.recruit_archiver import RecruitArchiver, next_period_start
 
 # GD 練習チャンネルのトピックテキスト
 TOPIC_TEXT = ("📌 **GD 練習チャンネル案内**\n"
 			"・新規募集はボタンから作成してください。\n"
 			"・各募集のボタンで参加/取り消しができます。")
 
+# 開始の何秒前に通知DMを送るか
+REMINDER_LEAD_SECONDS = 60 * 60
+# 停止中に通知の期限を過ぎた場合、開始までこの秒数以上あれば遅れて送信する
+REMINDER_CATCH_UP_MIN_SECONDS = 5 * 60
+# 募集の作成（スレッド作成・メッセージ投稿）に失敗した場合の再試行の間隔（秒）。失敗するたびに倍にする
+CREATION_RETRY_BASE_SECONDS = 15
+CREATION_RETRY_MAX_SECONDS = 10 * 60
+# 終了表示の描画に失敗した場合の再試行の間隔（秒）。失敗するたびに倍にする
+EXPIRE_RETRY_BASE_SECONDS = 60
+EXPIRE_RETRY_MAX_SECONDS = 10 * 60
+# アーカイブ投稿は期間の切り替わりからこの秒数後に作成する（前の期間の最後の募集の終了を待つ）
+ARCHIVE_OFFSET_SECONDS = 2 * 60 * 60
+
 class GDBotController:
 	"""
 	Discordボットのイベント処理とロジックの制御を行うクラス。
 	ModelとViewを連携させる。
 	"""
 	# ▼▼▼【修正】channel_idの引数を削除し、クラス変数を初期化 ▼▼▼
-	def __init__(self, bot: commands.Bot):
+	def __init__(self, bot: commands.Bot, reconcile_concurrency: int = 4, ack_watchdog_seconds: float = 2.0,
+				lock_finished_threads: bool = False, archive_period: Union[str, None] = None):
 		self.bot = bot
-		self.channel_id: Union[int, None] = None
-		# ▲▲▲【修正】ここまで ▲▲▲
-		self.recruit_model = RecruitModel()
-		self.header_msg_id: Union[int, None] = None
-		# ▼▼▼【修正】ハードコードされたIDを削除し、Noneで初期化 ▼▼▼
-		self.ADMIN_ROLE_ID: Union[int, None] = None 
-		self.MENTOR_ROLE_ID: Union[int, None] = None
 		# ▲▲▲【修正】ここまで ▲▲▲
+		# チャンネルID・ロールIDなどの設定。管理画面での変更は再起動せずに反映する
+		self.settings = SettingsRegistry()
+		self.settings.subscribe(self._on_settings_changed)
+		# 表示中の募集をメモリに保持し、インタラクションの処理ではDBを読まずに済ませる
+		self.recruit_model = RecruitRepository()
+		self.member_resolver = MemberResolver()
+		# 募集ごとに再描画をまとめ、1メッセージあたりの編集を最大1件に保つ
+		self.render_scheduler = RenderScheduler(self._render_recruit)
+		# Discord APIへの送信を優先度順に実行する（インタラクション > 編集 > バックグラウンド）
+		self.outbound = OutboundQueue()
+		# 通知・終了の期限ごとにジョブを実行するタイマー
+		self.deadlines = DeadlineScheduler()
+		# 通知DMを宛先ごとにDBへ登録し、ワーカーが並行に送信する
+		self.reminder_outbox = ReminderOutboxModel()
+		self.reminder_worker = ReminderOutboxWorker(
+			self.reminder_outbox, self._submit_dm, cutoff_seconds=REMINDER_CATCH_UP_MIN_SECONDS
+		)
+		# インタラクションの応答時間・処理時間・DB時間の計測と、応答が遅れているハンドラーの監視
+		self.interaction_metrics = InteractionMetrics(watchdog_seconds=ack_watchdog_seconds)
+		# 管理画面などからの募集の変更を recruit_changes から読み、変更された募集だけを再描画する
+		self.change_tailer = RecruitChangeTailer(RecruitChangeLogModel(), self._apply_recruit_changes)
+		# ボットが作成したスレッドのシステムメッセージを、受信した時点で削除する
+		self.thread_cleaner = ThreadSystemMessageCleaner(self.outbound)
+		# 終了・削除された募集のスレッドをバックグラウンドでアーカイブする（lock_finished_threads ならロックもする）
+		self.lock_finished_threads = lock_finished_threads
+		self.thread_archiver = ThreadArchiver(self.recruit_model, self._archive_thread)
+		# archive_period ('day' / 'week') を指定すると、終了した募集のメッセージを期間ごとのアーカイブ投稿にまとめる
+		self.recruit_archiver: Union[RecruitArchiver, None] = None
+		if archive_period:
+			self.recruit_archiver = RecruitArchiver(
+				self.recruit_model, ArchivePostModel(), self.outbound, lambda: self.bot.get_channel(self.channel_id), archive_period
+			)
+		# 起動時の再描画（リコンサイル）の同時実行数と、実行中のタスク
+		self.reconcile_concurrency = reconcile_concurrency
+		self._reconcile_task: Union[asyncio.Task, None] = None
+		# 初回の on_ready が完了したか（2回目以降はGatewayの再接続によるもの）
+		self._started = False
+		# 表示中（active）の募集のID。ヘッダーの要否を DB を読まずに判定するために、作成・削除・終了のたびに更新する
+		self._active_ids: Set[int] = set()
+		self._header_lock = asyncio.Lock()
+		# 応答後に続けて実行する処理のタスク（完了までガベージコレクションされないよう参照を保持する）
+		self._background_tasks: Set[asyncio.Task] = set()
+		# active な募集ID -> 終了時刻。終了処理は最も早い終了時刻に1件のジョブ ('expire', 'sweep') として登録する
+		self._expires_at: dict[int, int] = {}
+		# 終了処理が同時に実行され、同じ募集を二重に描画しないようにする
+		self._expire_lock = asyncio.Lock()
+		# 終了処理が失敗した場合に、次の終了処理を実行しない時刻と、連続して失敗した回数
+		self._expire_retry_at = 0.0
+		self._expire_failures = 0
 
 		# Botイベントのリスナーを登録
 		self.bot.event(self.on_ready)
-		self.bot.event(self.on_interaction)
+		self.bot.event(self.on_resumed)
+		self.bot.event(self.on_member_update)
+		self.bot.event(self.on_member_remove)
+		# on_message はコマンドの処理を上書きしないよう、リスナーとして追加する
+		self.bot.add_listener(self.on_message)
+		# 募集メッセージのボタンは custom_id のテンプレートで処理し、ビューをメッセージごとに保持しない
+		register_dynamic_items(self)
+
+	# ▼▼▼【修正】チャンネルID・ロールIDは設定から都度読み込む ▼▼▼
+	@property
+	def channel_id(self) -> Union[int, None]:
+		return self.settings.get('channel_id')
+
+	@property
+	def ADMIN_ROLE_ID(self) -> Union[int, None]:
+		return self.settings.get('admin_role_id')
+
+	@property
+	def MENTOR_ROLE_ID(self) -> Union[int, None]:
+		return self.settings.get('mentor_role_id')
+	# ▲▲▲【修正】ここまで ▲▲▲
+
+	@property
+	def header_msg_id(self) -> Union[int, None]:
+		"""ヘッダーメッセージのID（再起動後に重複して投稿しないよう settings に保存している）"""
+		return self.settings.get('header_msg_id')
+
+	async def _on_settings_changed(self, changes: SettingsChanges):
+		"""管理画面で変更された設定を反映する（SettingsRegistry から呼ばれる）"""
+		for key, (old, new) in changes.items():
+			if key not in INTERNAL_SETTING_KEYS:
+				print(f"設定 {key} が変更されました: {old} → {new}")
+
+		if 'channel_id' in changes:
+			if not self._started:
+				# 起動時にチャンネルが見つからなかった場合は、正しいチャンネルで起動処理をやり直す
+				await self.on_ready()
+				return
+			await self._move_channel(changes['channel_id'][0])
+			return
 
-	# ... (check_expired_recruits, check_upcoming_recruits, _ensure_header, _send_or_update_recruit_message 関数は変更なし) ...
-	@tasks.loop(minutes=5)
-	async def check_expired_recruits(self):
+		if 'mentor_role_id' in changes:
+			# メンター募集のメッセージに含まれるロールのメンションを差し替える
+			for recruit in await self.recruit_model.get_active(int(time.time())):
+				if recruit.mentor_needed:
+					self.request_render(recruit.id)
+		# 管理者ロールは権限の確認時に都度読むため、反映する処理は不要
+
+	async def _apply_recruit_changes(self, changes: list[dict]):
 		"""
-		5分ごとに募集の期限切れをチェックし、更新するタスク
+		recruit_changes に記録された変更を反映する（RecruitChangeTailer から呼ばれる）。
+		同じ募集への複数の変更は最後の1件にまとめ、キャッシュの破棄・スケジュールの更新・再描画を1回ずつ行う。
 		"""
+		latest: dict[int, dict] = {}
+		for change in changes:
+			latest[change['recruit_id']] = change
+
+		ch = self.bot.get_channel(self.channel_id)
+		for recruit_id, change in latest.items():
+			self.recruit_model.invalidate(recruit_id)
+			try:
+				if change['op'] == CHANGE_DELETE:
+					# 行ごと削除された募集は、記録されたメッセージIDで投稿を消す
+					self.unschedule_recruit(recruit_id)
+					await self.reminder_outbox.cancel_for_recruit(recruit_id)
+					if change['msg_id'] and isinstance(ch, (discord.TextChannel, discord.Thread)):
+						try:
+							await self.outbound.submit(
+								PRIORITY_BACKGROUND, ch.get_partial_message(change['msg_id']).delete, "recruit_delete", idempotent=True
+							)
+						except discord.NotFound:
+							pass
+				else:
+					await self.refresh_schedule(recruit_id)
+					self.request_render(recruit_id)
+			except Exception as e:
+				print(f"募集の変更の反映中に予期せぬエラー (募集ID: {recruit_id}): {e}")
+		# 削除された募集があればスレッドをアーカイブする
+		self.thread_archiver.notify()
+
+		if isinstance(ch, (discord.TextChannel, discord.Thread)):
+			await self._ensure_header(ch)
+
+	async def _move_channel(self, old_channel_id: Union[int, None]):
+		"""募集チャンネルが変更された場合に、ヘッダーと表示中の募集を新しいチャンネルに投稿し直す"""
 		ch = self.bot.get_channel(self.channel_id)
 		if not isinstance(ch, (discord.TextChannel, discord.Thread)):
-			print("定期チェックエラー: チャンネルが見つかりません。")
+			print(f"エラー: チャンネルID {self.channel_id} はテキストチャンネルまたはスレッドではありません。")
 			return
-		
-		all_recruits = await self.recruit_model.get_all_recruits()
-		jst = pytz.timezone('Asia/Tokyo')
-		now_jst = datetime.now(jst)
 
-		for recruit_data in all_recruits:
+		old_ch = self.bot.get_channel(old_channel_id) if old_channel_id else None
+		if self.header_msg_id and isinstance(old_ch, (discord.TextChannel, discord.Thread)):
+			try:
+				await self.outbound.submit(PRIORITY_BACKGROUND, old_ch.get_partial_message(self.header_msg_id).delete, "header_delete", idempotent=True)
+			except discord.HTTPException as e:
+				print(f"以前のチャンネルのヘッダーメッセージを削除できませんでした: {e}")
+		await self.settings.set('header_msg_id', None)
+
+		if self._reconcile_task is not None and not self._reconcile_task.done():
+			self._reconcile_task.cancel()
+
+		# 描画内容はチャンネルが変わっても同じため、描画結果の記録を消さないと投稿済みとして送信が省略される。
+		# 表示中の募集のメッセージIDと描画ハッシュを1回のコミットで消し、リコンサイルで新しいチャンネルに送信する
+		recruits = await self.recruit_model.get_needing_reconcile()
+		old_msg_ids = [recruit.msg_id for recruit in recruits if recruit.msg_id]
+		await self.recruit_model.bulk_update({
+			recruit.id: {'msg_id': None, 'render_hash': None} for recruit in recruits if recruit.msg_id or recruit.render_hash
+		})
+		self._reconcile_task = asyncio.create_task(self._reconcile(ch))
+
+		# 以前のチャンネルに残った募集メッセージ（押せるボタン付き）を削除する
+		if isinstance(old_ch, (discord.TextChannel, discord.Thread)):
+			for msg_id in old_msg_ids:
+				try:
+					await self.outbound.submit(
+						PRIORITY_BACKGROUND, old_ch.get_partial_message(msg_id).delete, "recruit_delete", idempotent=True
+					)
+				except discord.NotFound:
+					pass
+				except discord.HTTPException as e:
+					print(f"以前のチャンネルの募集メッセージを削除できませんでした (メッセージID: {msg_id}): {e}")
+			print(f"以前のチャンネルの募集メッセージ {len(old_msg_ids)} 件を削除しました。")
+
+	def _schedule_recruit(self, recruit: Recruit):
+		"""募集の通知・終了の期限をスケジューラに登録する（削除済みなら取り消す）"""
+		recruit_id = recruit.id
+		starts_at = recruit.starts_at
+		if recruit.is_deleted or starts_at is None:
+			self.unschedule_recruit(recruit_id)
+			return
+
+		if recruit.state == STATE_ACTIVE and not recruit.is_expired():
+			self._active_ids.add(recruit_id)
+		else:
+			self._active_ids.discard(recruit_id)
+
+		if recruit.notification_sent:
+			self.deadlines.cancel(('reminder', recruit_id))
+		else:
+			self.deadlines.schedule(
+				('reminder', recruit_id), starts_at - REMINDER_LEAD_SECONDS, lambda: self._fire_reminder(recruit_id)
+			)
+
+		if recruit.state == STATE_ACTIVE:
+			self._expires_at[recruit_id] = recruit.expires_at
+		else:
+			self._expires_at.pop(recruit_id, None)
+		self._schedule_expiry_sweep()
+
+	def unschedule_recruit(self, recruit_id: int):
+		"""募集の通知・終了のスケジュールを取り消す"""
+		self.deadlines.cancel(('reminder', recruit_id))
+		self.deadlines.cancel(('create', recruit_id))
+		self._active_ids.discard(recruit_id)
+		if self._expires_at.pop(recruit_id, None) is not None:
+			self._schedule_expiry_sweep()
+
+	def _schedule_expiry_sweep(self):
+		"""最も早い終了時刻に終了処理を1件だけ登録する（同時に終了する募集は1回の処理にまとめる）"""
+		if not self._expires_at and not self._expire_retry_at:
+			self.deadlines.cancel(('expire', 'sweep'))
+			return
+		# expire_due は終了時刻を過ぎた募集だけを遷移させるため、1秒後に実行する
+		# 前回の終了処理が失敗していれば、終了表示が未描画の募集のために再試行の時刻にも実行する
+		when = self._expire_retry_at
+		if self._expires_at:
+			when = max(min(self._expires_at.values()) + 1, when)
+		self.deadlines.schedule(('expire', 'sweep'), when, self.check_expired_recruits)
+
+	async def refresh_schedule(self, recruit_id: int):
+		"""DBの最新の状態で募集のスケジュールを登録し直す"""
+		recruit = await self.recruit_model.get_recruit_by_id(recruit_id)
+		if recruit:
+			self._schedule_recruit(recruit)
+		else:
+			self.unschedule_recruit(recruit_id)
+
+	async def _load_schedule(self):
+		"""
+		起動時に、まだ終了していない募集の期限をスケジューラに登録する。
+		停止中に過ぎた期限は登録時点で期限切れとなるため、すぐに実行される（キャッチアップ）。
+		"""
+		now = int(time.time())
+		self._active_ids.clear()
+		self._expires_at.clear()
+		for recruit in await self.recruit_model.get_active(now):
+			self._schedule_recruit(recruit)
+		# 停止中に終了した募集の終了表示
+		self.deadlines.schedule(('expire', 'catch_up'), now, self.check_expired_recruits)
+
+	async def check_expired_recruits(self):
+		"""
+		終了時刻を迎えた募集の終了表示を1回だけ描画する（終了期限のジョブから呼ばれる）
+		"""
+		async with self._expire_lock:
+			started_at = int(time.time())
+			failed_ids = None
 			try:
-				recruit_datetime_naive = datetime.strptime(recruit_data['date_s'], "%Y/%m/%d %H:%M")
-				recruit_datetime_jst = jst.localize(recruit_datetime_naive)
-				
-				is_expired_now = recruit_datetime_jst < now_jst - timedelta(hours=1)
-				
-				if is_expired_now:
-					await self._send_or_update_recruit_message(ch, recruit_data)
-
-			except (ValueError, KeyError) as e:
-				print(f"定期チェック中にエラーが発生しました (募集ID: {recruit_data.get('id')}): {e}")
-				continue
-
-	@tasks.loop(minutes=5)
-	async def check_upcoming_recruits(self):
-		"""5分ごとに、1時間以内に開始する募集がないかチェックし通知するタスク"""
-		all_recruits = await self.recruit_model.get_all_recruits()
-		jst = pytz.timezone('Asia/Tokyo')
-		now_jst = datetime.now(jst)
+				failed_ids = await self._sweep_expired()
+			finally:
+				if failed_ids is None or failed_ids:
+					# 中断した・描画に失敗した募集は終了時刻を残したまま、間隔を空けて再試行する
+					delay = min(EXPIRE_RETRY_BASE_SECONDS * (2 ** self._expire_failures), EXPIRE_RETRY_MAX_SECONDS)
+					self._expire_failures += 1
+					self._expire_retry_at = time.time() + delay
+					print(f"終了表示の描画が完了しなかったため、{delay}秒後に再試行します。")
+				else:
+					self._expire_failures = 0
+					self._expire_retry_at = 0.0
+				if failed_ids is not None:
+					# 処理の開始前に終了時刻を過ぎ、描画に失敗しなかった募集（終了済み・処理対象外）を外す
+					for recruit_id, expires_at in list(self._expires_at.items()):
+						if expires_at < started_at and recruit_id not in failed_ids:
+							del self._expires_at[recruit_id]
+				self._schedule_expiry_sweep()
+
+	async def _sweep_expired(self) -> Union[Set[int], None]:
+		"""
+		終了した募集の終了表示を描画して finalized にする。
+		描画に失敗した募集のIDを返す（チャンネルが見つからず処理できなかった場合は None）。
+		"""
+		ch = self.bot.get_channel(self.channel_id)
+		if not isinstance(ch, (discord.TextChannel, discord.Thread)):
+			print("終了チェックエラー: チャンネルが見つかりません。")
+			return None
 		
-		in_55_minutes = now_jst + timedelta(minutes=55)
-		in_60_minutes = now_jst + timedelta(minutes=60)
+		# active → expired に遷移させ、終了表示が未描画の募集だけを処理する
+		now = int(time.time())
+		await self.recruit_model.expire_due(now)
+		expired_recruits = await self.recruit_model.get_pending_finalization()
+		active_before = len(self._active_ids)
+		for recruit in expired_recruits:
+			self._active_ids.discard(recruit.id)
+
+		# 参加ボタンなどによる再描画と競合しないよう、スケジューラ経由で描画する
+		results = await asyncio.gather(
+			*(self.request_render(recruit.id, priority=PRIORITY_BACKGROUND) for recruit in expired_recruits)
+		)
+		finalized_ids = [recruit.id for recruit, ok in zip(expired_recruits, results) if ok]
+		# 描画に成功した募集はまとめて finalized にし、以後は触らない
+		await self.recruit_model.mark_finalized_many(finalized_ids, now)
+		for recruit_id in finalized_ids:
+			self._expires_at.pop(recruit_id, None)
+		if expired_recruits:
+			self.thread_archiver.notify()
+		# 最後の募集が終了した場合はヘッダーを表示する
+		if len(self._active_ids) != active_before:
+			await self._ensure_header(ch)
+
+	async def _fire_reminder(self, recruit_id: int):
+		"""開始1時間前の通知ジョブ。停止中に期限を過ぎた場合は、開始直前でなければ遅れて送信する"""
+		r = await self.recruit_model.get_recruit_by_id(recruit_id)
+		if not r or r.is_deleted or r.notification_sent or r.starts_at is None:
+			return
 
-		for r in all_recruits:
-			if not r.get('notification_sent'):
-				try:
-					recruit_dt_naive = datetime.strptime(r['date_s'], "%Y/%m/%d %H:%M")
-					recruit_dt_jst = jst.localize(recruit_dt_naive)
-
-					if in_55_minutes < recruit_dt_jst <= in_60_minutes:
-						all_user_ids = r.get('participants', []) + r.get('mentors', [])
-						
-						ch = self.bot.get_channel(self.channel_id)
-						thread_url = f"https://discord.com/channels/{ch.guild.id}/{r['thread_id']}" if ch else "スレッドが見つかりません"
-
-						message = (
-							f"📢 **１時間後にGD練習会が始まります**\n"
-							f"-----------------------------\n"
-							f"**日時:** {r['date_s']}\n"
-							f"**場所:** {r['place']}\n"
-							f"**スレッド:** {thread_url}\n"
-							f"-----------------------------\n"
-							f"準備をお願いします！"
-						)
-
-						for user_id in all_user_ids:
-							try:
-								user = await self.bot.fetch_user(user_id)
-								await user.send(message)
-							except discord.Forbidden:
-								print(f"警告: ユーザーID {user_id} にDMを送信できませんでした（ブロックされている可能性があります）。")
-							except Exception as e:
-								print(f"DM送信中に予期せぬエラー (ユーザーID: {user_id}): {e}")
-						
-						await self.recruit_model.mark_notification_as_sent(r['id'])
-
-				except (ValueError, KeyError) as e:
-					print(f"通知チェック中にエラー (募集ID: {r.get('id')}): {e}")
-					continue
+		now = int(time.time())
+		if r.starts_at - now < REMINDER_CATCH_UP_MIN_SECONDS:
+			# 開始直前・開始後に気付いた通知は送らず、送信済みとして扱う
+			print(f"開始直前のため通知をスキップしました (募集ID: {recruit_id})")
+			await self.recruit_model.mark_notification_as_sent(recruit_id)
+			return
+
+		await self._send_reminder(r, now)
+
+	async def _send_reminder(self, r: Recruit, now: int):
+		"""募集の参加者・メンターへの開始前の通知DMを送信待ちに登録する（送信はワーカーが行う）"""
+		ch = self.bot.get_channel(self.channel_id)
+		if ch and r.has_thread:
+			thread_url = f"https://discord.com/channels/{ch.guild.id}/{r.thread_id}"
+		else:
+			# スレッドの作成前はリンク先がないため載せない
+			thread_url = "スレッドが見つかりません"
+
+		minutes_left = round((r.starts_at - now) / 60)
+		when_text = "１時間後" if minutes_left >= 55 else f"{minutes_left}分後"
+		message = (
+			f"📢 **{when_text}にGD練習会が始まります**\n"
+			f"-----------------------------\n"
+			f"**日時:** {r.date_s}\n"
+			f"**場所:** {r.place}\n"
+			f"**スレッド:** {thread_url}\n"
+			f"-----------------------------\n"
+			f"準備をお願いします！"
+		)
+
+		# 宛先の登録と notification_sent の更新は同じトランザクションで行われる
+		await self.reminder_outbox.enqueue_for_recruit(r.id, [*r.participants, *r.mentors], message)
+		self.recruit_model.invalidate(r.id)
+		self.reminder_worker.notify()
 
 	async def _ensure_header(self, ch: Union[discord.TextChannel, discord.Thread]):
-		"""ヘッダーメッセージの有無を確認し、必要に応じて更新/削除する"""
-		current_recruits = await self.recruit_model.get_all_recruits()
-		
-		jst = pytz.timezone('Asia/Tokyo')
-		now_jst = datetime.now(jst)
-		
-		active_recruits = [
-			r for r in current_recruits
-			if jst.localize(datetime.strptime(r['date_s'], "%Y/%m/%d %H:%M")) >= now_jst - timedelta(hours=1)
-			and not r.get('is_deleted', False)
-		]
+		"""
+		ヘッダーメッセージの有無を確認し、必要に応じて更新/削除する。
+		表示中の募集の有無はメモリ上のIDの集合で判定するため、Discordに触れるのは件数が0をまたいだときだけ。
+		"""
+		async with self._header_lock:
+			has_active = bool(self._active_ids)
 
-		if active_recruits and self.header_msg_id:
-			try:
-				header_msg = await ch.fetch_message(self.header_msg_id)
-				await header_msg.delete()
-				self.header_msg_id = None
-			except discord.NotFound:
-				self.header_msg_id = None
-				print("⚠ ヘッダーメッセージが見つかりませんでしたが、IDをリセットしました。")
-			except discord.Forbidden:
-				print("⚠ ヘッダーメッセージ削除権限がありません。")
-			except Exception as e:
-				print(f"ヘッダーメッセージ削除中に予期せぬエラー: {e}")
-		elif not active_recruits and self.header_msg_id is None:
-			try:
-				msg = await ch.send("📢 ボタンはこちら", view=HeaderView())
-				self.header_msg_id = msg.id
-			except discord.Forbidden:
-				print("⚠ ヘッダーメッセージ送信権限がありません。")
-			except Exception as e:
-				print(f"ヘッダーメッセージ送信中に予期せぬエラー: {e}")
+			if has_active and self.header_msg_id:
+				try:
+					header_msg = ch.get_partial_message(self.header_msg_id)
+					await self.outbound.submit(PRIORITY_BACKGROUND, header_msg.delete, "header_delete", idempotent=True)
+					await self.settings.set('header_msg_id', None)
+				except discord.NotFound:
+					await self.settings.set('header_msg_id', None)
+					print("⚠ ヘッダーメッセージが見つかりませんでしたが、IDをリセットしました。")
+				except discord.Forbidden:
+					print("⚠ ヘッダーメッセージ削除権限がありません。")
+				except Exception as e:
+					print(f"ヘッダーメッセージ削除中に予期せぬエラー: {e}")
+			elif not has_active and self.header_msg_id is None:
+				try:
+					msg = await self.outbound.submit(
+						PRIORITY_BACKGROUND, lambda: ch.send("📢 ボタンはこちら", view=HeaderView()), "header_send"
+					)
+					await self.settings.set('header_msg_id', msg.id)
+				except discord.Forbidden:
+					print("⚠ ヘッダーメッセージ送信権限がありません。")
+				except Exception as e:
+					print(f"ヘッダーメッセージ送信中に予期せぬエラー: {e}")
+
+	async def _run_recruit_archive(self):
+		"""終了した募集のメッセージをアーカイブ投稿にまとめ、次の期間の切り替わり後に再び実行するよう予約する"""
+		try:
+			await self.recruit_archiver.run_once()
+		except Exception as e:
+			print(f"募集メッセージのアーカイブ中に予期せぬエラー: {e}")
+		next_run = next_period_start(time.time(), self.recruit_archiver.period) + ARCHIVE_OFFSET_SECONDS
+		self.deadlines.schedule(('archive', 'next'), next_run, self._run_recruit_archive)
+
+	async def _archive_thread(self, thread_id: int):
+		"""募集のスレッドをアーカイブする（ThreadArchiver から呼ばれる）"""
+		thread = self.bot.get_channel(thread_id)
+		if thread is None:
+			if not self.lock_finished_threads:
+				# アクティブなスレッドはキャッシュにあるため、見つからなければ既にアーカイブされている
+				return
+			thread = await self.bot.fetch_channel(thread_id)
+		if not isinstance(thread, discord.Thread):
+			return
+		locked = thread.locked or self.lock_finished_threads
+		if thread.archived and thread.locked == locked:
+			return
+		await self.outbound.submit(
+			PRIORITY_BACKGROUND, lambda: thread.edit(archived=True, locked=locked), "thread_archive", idempotent=True
+		)
+
+	async def send_followup(self, interaction: discord.Interaction, *args, **kwargs):
+		"""インタラクションのフォローアップを最優先で送信する"""
+		return await self.outbound.submit(
+			PRIORITY_INTERACTION, lambda: interaction.followup.send(*args, **kwargs), "followup"
+		)
+
+	async def _send_dm(self, user_id: int, message: str):
+		"""ユーザーにDMを送信する（キャッシュにないユーザーのみAPIで取得する）"""
+		user = self.bot.get_user(user_id) or await self.bot.fetch_user(user_id)
+		await user.send(message)
+
+	async def _submit_dm(self, user_id: int, message: str):
+		"""DMの送信をバックグラウンドの優先度で送信キューに入れる（ReminderOutboxWorker から呼ばれる）"""
+		await self.outbound.submit(PRIORITY_BACKGROUND, lambda: self._send_dm(user_id, message), "reminder_dm")
+
+	def request_render(self, recruit_id: int, priority: int = PRIORITY_EDIT) -> asyncio.Future:
+		"""
+		募集メッセージの再描画を予約する。短時間の連続した要求は1回の編集にまとめられる。
+		描画の完了を待つ必要がある場合のみ、戻り値を await する（描画に成功したかが返る）。
+		募集メッセージの編集・送信は、1件の描画が常に最新の状態を反映するよう必ずここを経由する。
+		"""
+		return self.render_scheduler.request(recruit_id, priority)
+
+	async def _render_recruit(self, recruit_id: int, priority: int) -> bool:
+		"""DBから最新の募集データを読み込んでメッセージに反映する（RenderScheduler から呼ばれる）"""
+		ch = self.bot.get_channel(self.channel_id)
+		if not isinstance(ch, (discord.TextChannel, discord.Thread)):
+			return False
+		recruit = await self.recruit_model.get_recruit_by_id(recruit_id)
+		if not recruit:
+			return False
+		return await self._send_or_update_recruit_message(ch, recruit, priority=priority)
 
-	async def _send_or_update_recruit_message(self, ch: Union[discord.TextChannel, discord.Thread], recruit_data: dict):
+	async def _send_or_update_recruit_message(self, ch: Union[discord.TextChannel, discord.Thread], rc: Recruit, priority: int = PRIORITY_EDIT) -> bool:
 		"""
 		募集メッセージを送信または更新する。
+		メッセージの編集または送信に成功した場合は True を返す。
+		priority には送信キューでの優先度を指定する（定期処理からは PRIORITY_BACKGROUND）。
 		"""
+		if rc.archive_post_id:
+			# アーカイブ投稿にまとめた募集のメッセージは削除済み（または削除待ち）のため描画しない
+			return True
+
 		guild = ch.guild
-		participants_members: list[discord.Member] = []
-		for user_id in recruit_data.get('participants', []):
-			try:
-				member = await guild.fetch_member(user_id)
-				participants_members.append(member)
-			except discord.NotFound:
-				print(f"警告: 参加者ID {user_id} のメンバーが見つかりません。")
-			except Exception as e:
-				print(f"メンバー取得中に予期せぬエラー ({user_id}): {e}")
 
-		mentors_members: list[discord.Member] = []
-		for user_id in recruit_data.get('mentors', []):
-			try:
-				member = await guild.fetch_member(user_id)
-				mentors_members.append(member)
-			except discord.NotFound:
-				print(f"警告: メンターID {user_id} のメンバーが見つかりません。")
-			except Exception as e:
-				print(f"メンター取得中に予期せぬエラー ({user_id}): {e}")
+		# 参加者・メンター・募集者をまとめて解決する（通常はキャッシュのみで完結する）
+		members = await self.member_resolver.resolve(guild, [*rc.participants, *rc.mentors, *([rc.author_id] if rc.author_id else [])])
 
-		author_member = None
-		if recruit_data.get('author_id'):
-			try:
-				author_member = await guild.fetch_member(recruit_data['author_id'])
-			except discord.NotFound:
-				print(f"警告: 募集者ID {recruit_data['author_id']} のメンバーが見つかりません。")
-
-		rc = Recruit(
-			rid=recruit_data['id'],
-			date_s=recruit_data['date_s'],
-			place=recruit_data['place'],
-			cap=recruit_data['max_people'],
-			message=recruit_data['message'],
-			mentor_needed=bool(recruit_data['mentor_needed']),
-			industry=recruit_data['industry'],
-			thread_id=recruit_data['thread_id'],
-			msg_id=recruit_data['msg_id'],
-			participants=participants_members,
-			mentors=mentors_members,
-			author=author_member,
-			is_deleted=recruit_data.get('is_deleted', False)
-		)
+		for user_id in rc.participants:
+			if user_id not in members:
+				print(f"警告: 参加者ID {user_id} のメンバーが見つかりません。")
+		for user_id in rc.mentors:
+			if user_id not in members:
+				print(f"警告: メンターID {user_id} のメンバーが見つかりません。")
+		if rc.author_id and rc.author_id not in members:
+			print(f"警告: 募集者ID {rc.author_id} のメンバーが見つかりません。")
 
-		content = rc.block()
+		# 終了判定は1回の描画の中で一貫させる
+		now = time.time()
+		closed = rc.is_expired(now) or rc.is_deleted
+		content = rc.block(members, now)
 
-		if rc.mentor_needed and self.MENTOR_ROLE_ID and not rc.is_expired() and not rc.is_deleted:
+		if rc.mentor_needed and self.MENTOR_ROLE_ID and not closed:
 			mentor_role = ch.guild.get_role(self.MENTOR_ROLE_ID)
 			if mentor_role:
 				content = f"{mentor_role.mention}\n" + content
 		
-		if rc.is_expired() or rc.is_deleted:
-			view = discord.ui.View(timeout=None)
-			view.add_item(
-				discord.ui.Button(
-					label="スレッドへ",
-					style=discord.ButtonStyle.link,
-					url=f"https://discord.com/channels/{ch.guild.id}/{rc.thread_id}"
-				)
-			)
-			view.add_item(
-				discord.ui.Button(
-					label="新たな募集を追加",
-					style=discord.ButtonStyle.primary,
-					custom_id="test"
-				)
-			)
-		else:
-			view = JoinLeaveButtons(self, rc)
+		view = discord.ui.View(timeout=None) if closed else JoinLeaveButtons(self, rc)
+		# スレッドの作成前はリンク先がないため「スレッドへ」を付けない（作成後の再描画で追加される）
+		if rc.has_thread:
 			view.add_item(
 				discord.ui.Button(
 					label="スレッドへ",
@@ -228,19 +533,22 @@ class GDBotController:
 					url=f"https://discord.com/channels/{ch.guild.id}/{rc.thread_id}"
 				)
 			)
-			view.add_item(
-				discord.ui.Button(
-					label="新たな募集を追加",
-					style=discord.ButtonStyle.primary,
-					custom_id="test"
-				)
-			)
+		view.add_item(CreateRecruitButton())
+
+		render_hash = render_fingerprint(content, view)
 
 		if rc.msg_id:
+			if render_hash == rc.render_hash:
+				# 投稿済みの内容と同一のため編集しない
+				return True
 			try:
-				message = await ch.fetch_message(rc.msg_id)
-				await message.edit(content=content, view=view)
-				return
+				# fetch_message を省略し、部分メッセージとして直接編集する
+				partial_message = ch.get_partial_message(rc.msg_id)
+				await self.outbound.submit(
+					priority, lambda: partial_message.edit(content=content, view=view), "recruit_edit", idempotent=True
+				)
+				await self.recruit_model.update_render_hash(rc.id, render_hash)
+				return True
 			except discord.NotFound:
 				print(f"募集メッセージID {rc.msg_id} が見つかりません。新規送信します。")
 			except discord.Forbidden:
@@ -249,154 +557,185 @@ class GDBotController:
 				print(f"メッセージ編集中に予期せぬエラー ({rc.msg_id}): {e}")
 
 		try:
-			msg = await ch.send(content, view=view)
-			await self.recruit_model.update_recruit_message_id(rc.id, msg.id)
-			rc.msg_id = msg.id
-			await asyncio.sleep(0.5)
+			msg = await self.outbound.submit(priority, lambda: ch.send(content, view=view), "recruit_send")
+			await self.recruit_model.update_recruit_message_id(rc.id, msg.id, render_hash)
+			return True
 		except discord.Forbidden:
 			print("⚠ メッセージ送信権限がありません。")
 		except Exception as e:
 			print(f"メッセージ送信中に予期せぬエラー: {e}")
+		return False
+
+	async def _sync_command_tree(self):
+		"""登録コマンドの内容が前回の同期時から変わっている場合のみ tree.sync() を実行する"""
+		commands_payload = [command.to_dict(self.bot.tree) for command in self.bot.tree.get_commands()]
+		tree_hash = hashlib.sha256(
+			json.dumps(commands_payload, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+		).hexdigest()
+		if tree_hash == self.settings.get('command_tree_hash'):
+			print("コマンドに変更がないため、同期をスキップします。")
+			return
+		await self.bot.tree.sync()
+		await self.settings.set('command_tree_hash', tree_hash)
+		print("コマンドを同期しました。")
+
+	async def on_resumed(self):
+		"""Gatewayのセッションが再開された際の処理（取りこぼしたイベントは再送されるため何もしない）"""
+		print("🔄 セッションを再開しました。")
+
+	async def _on_reconnect(self):
+		"""
+		再接続時の差分リコンサイル。設定・トピック・コマンドは初回起動時のままなので触らず、
+		停止中に終了した募集の状態更新と、未投稿の募集の送信だけを行う。
+		"""
+		ch = self.bot.get_channel(self.channel_id)
+		if not isinstance(ch, (discord.TextChannel, discord.Thread)):
+			return
+		await self.recruit_model.expire_due(int(time.time()))
+		recruits = await self.recruit_model.get_unposted()
+		await asyncio.gather(*(self.request_render(recruit.id, priority=PRIORITY_BACKGROUND) for recruit in recruits))
 
 	async def on_ready(self):
 		"""ボットが起動した際に実行される処理"""
-		await self.bot.tree.sync()
+		if self._started:
+			print("🔄 再接続しました。差分のみリコンサイルします。")
+			await self._on_reconnect()
+			return
+
+		# ▼▼▼【修正】全ての設定を1回で読み込み、以後は変更を監視する ▼▼▼
+		await self.settings.load()
+		self.settings.start()
+		# ▲▲▲【修正】ここまで ▲▲▲
 
-		# ▼▼▼【追加】データベースからチャンネルIDを読み込む ▼▼▼
 		try:
-			channel_id_str = await self.recruit_model.get_setting('channel_id')
-			if not channel_id_str:
-				print("エラー: チャンネルIDがデータベースに設定されていません。")
-				await self.bot.close() # チャンネルIDがないと動作しないため終了
-				return
-			self.channel_id = int(channel_id_str)
-		except (ValueError, TypeError) as e:
-			print(f"チャンネルIDの読み込み中にエラーが発生しました: {e}")
-			await self.bot.close()
+			await self._sync_command_tree()
+		except discord.HTTPException as e:
+			print(f"コマンドの同期中にエラーが発生しました: {e}")
+
+		if self.channel_id is None:
+			print("エラー: チャンネルIDがデータベースに設定されていません。")
+			await self.bot.close() # チャンネルIDがないと動作しないため終了
 			return
-		# ▲▲▲【追加】ここまで ▲▲▲
 		
 		ch = self.bot.get_channel(self.channel_id)
 		if not isinstance(ch, (discord.TextChannel, discord.Thread)):
 			print(f"エラー: チャンネルID {self.channel_id} はテキストチャンネルまたはスレッドではありません。")
 			return
+		self._started = True
 
-		try:
-			await ch.edit(topic=TOPIC_TEXT)
-		except discord.Forbidden:
-			print("⚠ チャンネルトピック設定権限がありません。")
-		except Exception as e:
-			print(f"チャンネルトピック設定中に予期せぬエラー: {e}")
-
-		# ▼▼▼【修正】データベースからロールIDを読み込む ▼▼▼
-		try:
-			# メンターロールID
-			mentor_role_id_str = await self.recruit_model.get_setting('mentor_role_id')
-			self.MENTOR_ROLE_ID = int(mentor_role_id_str) if mentor_role_id_str else None
-			
-			# 管理者ロールID
-			admin_role_id_str = await self.recruit_model.get_setting('admin_role_id')
-			self.ADMIN_ROLE_ID = int(admin_role_id_str) if admin_role_id_str else None
-
-		except (ValueError, TypeError) as e:
-			print(f"ロールIDの読み込み中にエラーが発生しました: {e}")
-			self.MENTOR_ROLE_ID = None
-			self.ADMIN_ROLE_ID = None
-		# ▲▲▲【修正】ここまで ▲▲▲
-
-		all_recruits = await self.recruit_model.get_all_recruits()
-		for recruit_data in all_recruits:
-			await self._send_or_update_recruit_message(ch, recruit_data)
-
-		await self._ensure_header(ch)
-
-		if not self.check_expired_recruits.is_running():
-			self.check_expired_recruits.start()
-		
-		if not self.check_upcoming_recruits.is_running():
-			self.check_upcoming_recruits.start()
+		# トピックが既に設定済みであれば編集しない
+		if getattr(ch, 'topic', None) != TOPIC_TEXT:
+			try:
+				await self.outbound.submit(PRIORITY_BACKGROUND, lambda: ch.edit(topic=TOPIC_TEXT), "channel_topic", idempotent=True)
+			except discord.Forbidden:
+				print("⚠ チャンネルトピック設定権限がありません。")
+			except Exception as e:
+				print(f"チャンネルトピック設定中に予期せぬエラー: {e}")
+
+		# 停止中に終了した募集を expired にしておき、終了表示は check_expired_recruits に任せる
+		await self.recruit_model.expire_due(int(time.time()))
+
+		# 通知・終了の期限をDBから読み込み、次の期限までスリープするタイマーを開始する
+		# （表示中の募集のIDもここで読み込むため、ヘッダーを確認するリコンサイルより先に行う）
+		self.reminder_worker.start()
+		await self._load_schedule()
+
+		# 募集メッセージの再描画はバックグラウンドで行い、インタラクションはすぐに受け付ける
+		if self._reconcile_task is None or self._reconcile_task.done():
+			self._reconcile_task = asyncio.create_task(self._reconcile(ch))
+		# 停止前に作成が完了しなかった募集のスレッド作成・投稿をやり直す
+		for recruit in await self.recruit_model.get_pending_threads():
+			self.deadlines.schedule(('create', recruit.id), time.time(), lambda rid=recruit.id: self._complete_recruit_creation(rid))
+		self.deadlines.start()
+		await self.change_tailer.start()
+		# 起動時に既存の終了済みの募集のスレッドをまとめてアーカイブしてから、終了・削除のたびに処理する
+		self.thread_archiver.start()
+		if self.recruit_archiver is not None:
+			# 停止中に切り替わった期間の分もすぐにまとめる
+			self.deadlines.schedule(('archive', 'next'), time.time(), self._run_recruit_archive)
 
 		print("✅ ready")
 
-	# ... (on_interaction, handle_recruit_submission, handle_recruit_update 関数は変更なし) ...
-	async def on_interaction(self, it: discord.Interaction):
-		"""インタラクション（ボタンクリック、モーダル送信など）を処理"""
-		# ▼▼▼【修正】誤った条件分岐を削除 ▼▼▼
-		# if it.type == discord.InteractionType.component and it.data.get("custom_id", "").startswith(("join:", "leave:", "edit:", "delete:", "join_as_mentor", "join_as_member")):
-		# 	return
-		# ▲▲▲【修正】ここまで ▲▲▲
-
-		if it.type.name != "component":
-			return
+	async def _reconcile(self, ch: Union[discord.TextChannel, discord.Thread]):
+		"""
+		描画が必要な募集（active な募集とメッセージ未投稿の募集）だけを、
+		同時実行数を制限しながら再描画する。
+		"""
+		started_at = time.monotonic()
+		recruits = await self.recruit_model.get_needing_reconcile()
+		total = len(recruits)
+		print(f"募集メッセージのリコンサイルを開始します: {total}件")
+
+		semaphore = asyncio.Semaphore(self.reconcile_concurrency)
+		done = 0
+		failed = 0
+		report_every = max(1, total // 4)
+
+		async def _reconcile_one(recruit: Recruit):
+			nonlocal done, failed
+			async with semaphore:
+				try:
+					if not await self.request_render(recruit.id, priority=PRIORITY_BACKGROUND):
+						failed += 1
+				except Exception as e:
+					failed += 1
+					print(f"リコンサイル中に予期せぬエラー (募集ID: {recruit.id}): {e}")
+				done += 1
+				if done % report_every == 0 and done < total:
+					print(f"リコンサイル進捗: {done}/{total}件")
+
+		await asyncio.gather(*(_reconcile_one(recruit) for recruit in recruits))
+		await self._ensure_header(ch)
+		print(f"✅ リコンサイル完了: {done}件（失敗 {failed}件, {time.monotonic() - started_at:.1f}秒）")
 
-		custom_id = it.data.get("custom_id")
-		
-		if custom_id == "test":
-			form_view = RecruitFormView(self)
-			embed = form_view.create_embed()
-			try:
-				await it.response.send_message(embed=embed, view=form_view, ephemeral=True)
-			except discord.errors.NotFound:
-				print(f"インタラクションエラー: 'Unknown interaction' - custom_id: {custom_id}")
-				return
-			return
+	async def on_member_update(self, before: discord.Member, after: discord.Member):
+		"""表示名などが変わったメンバーのキャッシュを破棄する"""
+		self.member_resolver.invalidate(after.id, after.guild.id)
 
-		if ":" not in custom_id:
-			return
+	async def on_message(self, message: discord.Message):
+		"""募集チャンネルに届いたスレッド作成のシステムメッセージを削除対象として照合する"""
+		if message.channel.id == self.channel_id:
+			self.thread_cleaner.handle(message)
 
-		action, recruit_id_str = custom_id.split(":", 1)
-		if not recruit_id_str.isdigit():
-			return
-		
-		recruit_id = int(recruit_id_str)
+	async def on_member_remove(self, member: discord.Member):
+		"""サーバーを抜けたメンバーのキャッシュを破棄する"""
+		self.member_resolver.invalidate(member.id, member.guild.id)
 
-		if not it.response.is_done():
-			try:
-				await it.response.defer(thinking=False, ephemeral=True)
-			except discord.HTTPException:
-				pass
-			except Exception as e:
-				print(f"インタラクション defer 中に予期せぬエラー: {e}")
-
-		recruit_data = await self.recruit_model.get_recruit_by_id(recruit_id)
-		if not recruit_data:
-			await it.followup.send("エラー: その募集は存在しないか、削除されました。", ephemeral=True)
-			return
+	# ... (handle_recruit_submission, handle_recruit_update 関数は変更なし) ...
+	async def create_scheduled_event(self, it: discord.Interaction, recruit: Recruit):
+		"""募集の日時・場所でサーバーイベントを作成する（event:<募集ID> ボタンから呼ばれる）"""
+		try:
+			event_name = f"{recruit.date_s} GD練習会"
 			
-		if action == "event":
-			try:
-				event_name = f"{recruit_data['date_s']} GD練習会"
-				
-				jst = pytz.timezone('Asia/Tokyo')
-				start_time_naive = datetime.strptime(recruit_data['date_s'], '%Y/%m/%d %H:%M')
-				start_time_aware = jst.localize(start_time_naive)
-
-				location_str = recruit_data['place']
-				entity_type = discord.ScheduledEventEntityType.external
-				event_location = location_str
-				event_channel = None
-
-				vc = discord.utils.get(it.guild.voice_channels, name=location_str)
-				if vc:
-					entity_type = discord.ScheduledEventEntityType.voice
-					event_channel = vc
-					event_location = None
-
-				await it.guild.create_scheduled_event(
-					name=event_name,
-					start_time=start_time_aware,
-					entity_type=entity_type,
-					channel=event_channel,
-					location=event_location,
-					description=recruit_data.get('message', '')
-				)
-				await it.followup.send(f"イベント「{event_name}」を作成しました。", ephemeral=True)
+			start_time_aware = recruit.start_time
+			if start_time_aware is None:
+				raise ValueError(recruit.date_s)
+
+			location_str = recruit.place
+			entity_type = discord.ScheduledEventEntityType.external
+			event_location = location_str
+			event_channel = None
+
+			vc = discord.utils.get(it.guild.voice_channels, name=location_str)
+			if vc:
+				entity_type = discord.ScheduledEventEntityType.voice
+				event_channel = vc
+				event_location = None
+
+			await self.outbound.submit(PRIORITY_EDIT, lambda: it.guild.create_scheduled_event(
+				name=event_name,
+				start_time=start_time_aware,
+				entity_type=entity_type,
+				channel=event_channel,
+				location=event_location,
+				description=recruit.message or ''
+			), "scheduled_event")
+			await self.send_followup(it, f"イベント「{event_name}」を作成しました。", ephemeral=True)
 
-			except ValueError:
-				await it.followup.send("エラー: 募集の日時フォーマットが不正です。`YYYY/MM/DD HH:MM` 形式である必要があります。", ephemeral=True)
-			except Exception as e:
-				await it.followup.send(f"イベント作成中にエラーが発生しました: {e}", ephemeral=True)
-			return
+		except ValueError:
+			await self.send_followup(it, "エラー: 募集の日時フォーマットが不正です。`YYYY/MM/DD HH:MM` 形式である必要があります。", ephemeral=True)
+		except Exception as e:
+			await self.send_followup(it, f"イベント作成中にエラーが発生しました: {e}", ephemeral=True)
 
 	async def handle_recruit_submission(self, interaction: discord.Interaction, data: dict, message_to_delete: discord.Message):
 		"""
@@ -408,10 +747,10 @@ class GDBotController:
 			recruit_datetime_naive = datetime.strptime(data['date_s'], "%Y/%m/%d %H:%M")
 			recruit_datetime_jst = jst.localize(recruit_datetime_naive)
 			if recruit_datetime_jst < now_jst:
-				await interaction.followup.send("エラー: 過去の日時を登録することはできません。", ephemeral=True)
+				await self.send_followup(interaction, "エラー: 過去の日時を登録することはできません。", ephemeral=True)
 				return
 		except ValueError:
-			await interaction.followup.send("エラー: 日時の形式が正しくありません。", ephemeral=True)
+			await self.send_followup(interaction, "エラー: 日時の形式が正しくありません。", ephemeral=True)
 			return
 
 		ch = self.bot.get_channel(self.channel_id)
@@ -419,48 +758,104 @@ class GDBotController:
 			if not interaction.response.is_done():
 				await interaction.response.send_message("エラー: チャンネルが見つからないか、不適切なタイプです。", ephemeral=True)
 			else:
-				await interaction.followup.send("エラー: チャンネルが見つからないか、不適切なタイプです。", ephemeral=True)
-			return
-
-		thread_name = f"🗨 {data['date_s']} GD練習について"
-		try:
-			th = await ch.create_thread(name=thread_name, type=discord.ChannelType.public_thread)
-			await remove_thread_system_msg(ch)
-		except discord.Forbidden:
-			await interaction.followup.send("エラー: スレッド作成権限がありません。", ephemeral=True)
-			return
-		except Exception as e:
-			await interaction.followup.send(f"エラー: スレッド作成中に問題が発生しました: {e}", ephemeral=True)
+				await self.send_followup(interaction, "エラー: チャンネルが見つからないか、不適切なタイプです。", ephemeral=True)
 			return
 
 		author_id = interaction.user.id
 		initial_participants = [author_id]
 
-		new_recruit_id = await self.recruit_model.add_recruit(
+		# 先に募集を保存し、スレッドの作成とメッセージの投稿は応答後にバックグラウンドで行う
+		new_recruit = await self.recruit_model.add_recruit(
 			date_s=data['date_s'],
 			place=data['place'],
 			max_people=data['max_people'],
 			message=data['message'],
 			mentor_needed=data['mentor_needed'],
 			industry=data['industry'],
-			thread_id=th.id,
+			thread_id=THREAD_PENDING,
 			author_id=author_id,
 			participants=initial_participants,
 		)
 
-		if new_recruit_id is None:
-			await interaction.followup.send("エラー: 募集の保存に失敗しました。", ephemeral=True)
+		if new_recruit is None:
+			await self.send_followup(interaction, "エラー: 募集の保存に失敗しました。", ephemeral=True)
 			return
 
-		new_recruit_data = await self.recruit_model.get_recruit_by_id(new_recruit_id)
-		if new_recruit_data:
-			await self._send_or_update_recruit_message(ch, new_recruit_data)
-		else:
-			await interaction.followup.send("エラー: 保存された募集データの取得に失敗しました。", ephemeral=True)
-			
-		await self._ensure_header(ch)
-		
-		await message_to_delete.delete()
+		self._schedule_recruit(new_recruit)
+		try:
+			await self.outbound.submit(
+				PRIORITY_INTERACTION,
+				lambda: interaction.edit_original_response(content="✅ 募集を作成しました。まもなくチャンネルに投稿されます。"),
+				"followup", idempotent=True
+			)
+		except discord.HTTPException as e:
+			print(f"募集作成の完了通知に失敗しました (募集ID: {new_recruit.id}): {e}")
+		# 募集の操作から保存の完了をユーザーに伝えるまでの時間
+		self.interaction_metrics.record_timing(
+			"recruit_create_confirmed", time.time() - interaction.created_at.timestamp()
+		)
+
+		self._spawn(self._complete_recruit_creation(new_recruit.id, message_to_delete=message_to_delete))
+
+	def _spawn(self, coro) -> asyncio.Task:
+		"""バックグラウンドのタスクを開始し、完了まで参照を保持する。例外は完了時にログに出す"""
+		task = asyncio.create_task(coro)
+		self._background_tasks.add(task)
+		task.add_done_callback(self._on_background_task_done)
+		return task
+
+	def _on_background_task_done(self, task: asyncio.Task):
+		self._background_tasks.discard(task)
+		if not task.cancelled() and task.exception() is not None:
+			print(f"バックグラウンド処理中に予期せぬエラー: {task.exception()}")
+
+	async def _complete_recruit_creation(self, recruit_id: int, attempt: int = 0, message_to_delete: Union[discord.Message, None] = None):
+		"""
+		保存済みの募集のスレッドを作成し、募集メッセージを投稿する。
+		ヘッダーの更新はスレッドの作成と並行して行う。
+		途中で失敗した場合は、DBに残った状態（スレッド未作成・メッセージ未投稿）から再試行を予約する。
+		"""
+		started_at = time.monotonic()
+		recruit = await self.recruit_model.get_recruit_by_id(recruit_id)
+		if not recruit or recruit.is_deleted or recruit.state != STATE_ACTIVE:
+			return
+		ch = self.bot.get_channel(self.channel_id)
+		try:
+			if not isinstance(ch, (discord.TextChannel, discord.Thread)):
+				raise RuntimeError("チャンネルが見つからないか、不適切なタイプです。")
+
+			async def _create_thread():
+				if recruit.thread_id != THREAD_PENDING:
+					return
+				thread_name = f"🗨 {recruit.date_s} GD練習について"
+				th = await self.outbound.submit(
+					PRIORITY_EDIT, lambda: ch.create_thread(name=thread_name, type=discord.ChannelType.public_thread), "thread_create"
+				)
+				self.thread_cleaner.expect(th.id)
+				await self.recruit_model.set_thread_id(recruit_id, th.id)
+
+			await asyncio.gather(_create_thread(), self._ensure_header(ch))
+
+			# 描画は他の再描画要求とまとめて実行し、同じ募集を二重に投稿しないようにする
+			await self.request_render(recruit_id)
+			recruit = await self.recruit_model.get_recruit_by_id(recruit_id)
+			if recruit and not recruit.is_deleted and not recruit.msg_id:
+				raise RuntimeError("募集メッセージを投稿できませんでした。")
+		except Exception as e:
+			delay = min(CREATION_RETRY_BASE_SECONDS * (2 ** attempt), CREATION_RETRY_MAX_SECONDS)
+			print(f"募集の作成処理に失敗しました (募集ID: {recruit_id}, {delay}秒後に再試行): {e}")
+			self.deadlines.schedule(
+				('create', recruit_id), time.time() + delay,
+				lambda: self._complete_recruit_creation(recruit_id, attempt + 1, message_to_delete=message_to_delete)
+			)
+			return
+
+		self.interaction_metrics.record_timing("recruit_create_posted", time.monotonic() - started_at)
+		if message_to_delete is not None:
+			try:
+				await message_to_delete.delete()
+			except discord.HTTPException:
+				pass
 
 	async def handle_recruit_update(self, interaction: discord.Interaction, recruit_id: int, data: dict, message_to_delete: discord.Message):
 		"""
@@ -472,35 +867,40 @@ class GDBotController:
 			recruit_datetime_naive = datetime.strptime(data['date_s'], "%Y/%m/%d %H:%M")
 			recruit_datetime_jst = jst.localize(recruit_datetime_naive)
 			if recruit_datetime_jst < now_jst:
-				await interaction.followup.send("エラー: 過去の日時を登録することはできません。", ephemeral=True)
+				await self.send_followup(interaction, "エラー: 過去の日時を登録することはできません。", ephemeral=True)
 				return
 		except ValueError:
-			await interaction.followup.send("エラー: 日時の形式が正しくありません。", ephemeral=True)
+			await self.send_followup(interaction, "エラー: 日時の形式が正しくありません。", ephemeral=True)
 			return
 
 		ch = self.bot.get_channel(self.channel_id)
 		if not isinstance(ch, (discord.TextChannel, discord.Thread)):
-			await interaction.followup.send("エラー: チャンネルが見つかりません。", ephemeral=True)
+			await self.send_followup(interaction, "エラー: チャンネルが見つかりません。", ephemeral=True)
 			return
 		
 		await self.recruit_model.update_recruit(recruit_id, data)
-
-		updated_recruit_data = await self.recruit_model.get_recruit_by_id(recruit_id)
-		if updated_recruit_data:
-			try:
-				thread = await self.bot.fetch_channel(updated_recruit_data['thread_id'])
-				if isinstance(thread, discord.Thread):
-					new_thread_name = f"🗨 {updated_recruit_data['date_s']} GD練習について"
-					await thread.edit(name=new_thread_name)
-			except discord.NotFound:
-				print(f"警告: スレッドID {updated_recruit_data['thread_id']} が見つかりません。名前の更新をスキップします。")
-			except discord.Forbidden:
-				print(f"警告: スレッドID {updated_recruit_data['thread_id']} の名前を変更する権限がありません。")
-			except Exception as e:
-				print(f"スレッド名の編集中に予期せぬエラー: {e}")
-
-			await self._send_or_update_recruit_message(ch, updated_recruit_data)
+		# 参加ボタンなどによる再描画と競合しないよう、スケジューラ経由で反映する
+		render_done = self.request_render(recruit_id)
+
+		updated_recruit = await self.recruit_model.get_recruit_by_id(recruit_id)
+		if updated_recruit:
+			self._schedule_recruit(updated_recruit)
+			# スレッドの作成前は、作成時に新しい日時の名前が付く
+			if updated_recruit.has_thread:
+				try:
+					thread = await self.bot.fetch_channel(updated_recruit.thread_id)
+					if isinstance(thread, discord.Thread):
+						new_thread_name = f"🗨 {updated_recruit.date_s} GD練習について"
+						await self.outbound.submit(PRIORITY_EDIT, lambda: thread.edit(name=new_thread_name), "thread_rename", idempotent=True)
+				except discord.NotFound:
+					print(f"警告: スレッドID {updated_recruit.thread_id} が見つかりません。名前の更新をスキップします。")
+				except discord.Forbidden:
+					print(f"警告: スレッドID {updated_recruit.thread_id} の名前を変更する権限がありません。")
+				except Exception as e:
+					print(f"スレッド名の編集中に予期せぬエラー: {e}")
+
+			await render_done
 		else:
-			await interaction.followup.send("エラー: 募集の更新に失敗しました。", ephemeral=True)
+			await self.send_followup(interaction, "エラー: 募集の更新に失敗しました。", ephemeral=True)
 		
 		await message_to_delete.delete()
\ No newline at end of file
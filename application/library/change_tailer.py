@@ -0,0 +1,55 @@
+# application/library/change_tailer.py
+import asyncio
+from typing import Awaitable, Callable, Union
+
+from application.model.recruit_changes import RecruitChangeLogModel
+
+
+class RecruitChangeTailer:
+	"""
+	recruit_changes を連番順に追いかけ、新しい変更を apply に渡すワーカー。
+	apply が完了した変更までを処理済みとして、その連番以前の行を削除する。
+	連番の位置はメモリにのみ保持するため、起動時は最新の位置から始める（それ以前の変更は起動時のリコンサイルで反映される）。
+	"""
+
+	def __init__(self, log: RecruitChangeLogModel, apply: Callable[[list[dict]], Awaitable[None]],
+				poll_interval: float = 2.0, batch_size: int = 200):
+		self.log = log
+		self._apply = apply
+		self.poll_interval = poll_interval
+		self.batch_size = batch_size
+		self._seq: Union[int, None] = None
+		self._runner: Union[asyncio.Task, None] = None
+
+	async def start(self):
+		"""現在の最新の位置から追いかけ始める（開始済みなら何もしない）"""
+		if self._runner is not None and not self._runner.done():
+			return
+		self._seq = await self.log.get_latest_seq()
+		await self.log.prune(self._seq)
+		self._runner = asyncio.create_task(self._run())
+
+	def stop(self):
+		if self._runner is not None:
+			self._runner.cancel()
+			self._runner = None
+
+	async def poll(self) -> int:
+		"""新しい変更を1回分処理し、処理した件数を返す"""
+		changes = await self.log.get_since(self._seq, self.batch_size)
+		if not changes:
+			return 0
+		await self._apply(changes)
+		self._seq = changes[-1]['seq']
+		await self.log.prune(self._seq)
+		return len(changes)
+
+	async def _run(self):
+		while True:
+			try:
+				if await self.poll() >= self.batch_size:
+					# 未処理の変更が残っているため待たずに続ける
+					continue
+			except Exception as e:
+				print(f"変更履歴の処理中に予期せぬエラー: {e}")
+			await asyncio.sleep(self.poll_interval)
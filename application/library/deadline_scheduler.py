@@ -0,0 +1,90 @@
+# application/library/deadline_scheduler.py
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Awaitable, Callable, Hashable, Union
+
+# 時計のずれに備えて、次の期限が先でもこの秒数ごとに起きて確認する
+MAX_SLEEP_SECONDS = 300.0
+
+
+class DeadlineScheduler:
+	"""
+	期限（UNIX時刻）ごとにジョブを実行するヒープベースのタイマー。
+	次の期限までスリープし、期限が来たジョブを実行する。
+	ジョブはキーで識別され、同じキーで登録し直すと以前の登録は置き換えられる。
+	"""
+
+	def __init__(self):
+		self._heap: list[tuple[float, int, Hashable]] = []
+		self._jobs: dict[Hashable, tuple[float, int, Callable[[], Awaitable[object]]]] = {}
+		self._seq = itertools.count()
+		self._wakeup = asyncio.Event()
+		self._runner: Union[asyncio.Task, None] = None
+		self._running_jobs: set[asyncio.Task] = set()
+
+	def schedule(self, key: Hashable, when: float, callback: Callable[[], Awaitable[object]]):
+		"""期限 when にジョブ callback を登録する（既に期限を過ぎていれば即座に実行される）"""
+		seq = next(self._seq)
+		self._jobs[key] = (when, seq, callback)
+		heapq.heappush(self._heap, (when, seq, key))
+		self._wakeup.set()
+
+	def cancel(self, key: Hashable):
+		"""登録済みのジョブを取り消す（ヒープからは実行時に取り除かれる）"""
+		self._jobs.pop(key, None)
+
+	def __len__(self) -> int:
+		return len(self._jobs)
+
+	def start(self):
+		"""スケジューラのループを開始する（開始済みなら何もしない）"""
+		if self._runner is None or self._runner.done():
+			self._runner = asyncio.create_task(self._run())
+
+	def stop(self):
+		if self._runner is not None:
+			self._runner.cancel()
+			self._runner = None
+
+	def _next(self) -> Union[tuple[float, int, Hashable], None]:
+		"""取り消し・置き換え済みの項目を捨てて、次に実行すべき項目を返す"""
+		while self._heap:
+			when, seq, key = self._heap[0]
+			job = self._jobs.get(key)
+			if job is not None and job[1] == seq:
+				return self._heap[0]
+			heapq.heappop(self._heap)
+		return None
+
+	async def _run(self):
+		while True:
+			item = self._next()
+			if item is None:
+				self._wakeup.clear()
+				await self._wakeup.wait()
+				continue
+
+			when, _, key = item
+			delay = when - time.time()
+			if delay > 0:
+				# 新しいジョブが登録されたら起きて、期限を確認し直す
+				self._wakeup.clear()
+				try:
+					await asyncio.wait_for(self._wakeup.wait(), timeout=min(delay, MAX_SLEEP_SECONDS))
+				except asyncio.TimeoutError:
+					pass
+				continue
+
+			heapq.heappop(self._heap)
+			_, _, callback = self._jobs.pop(key)
+			task = asyncio.create_task(self._fire(key, callback))
+			self._running_jobs.add(task)
+			task.add_done_callback(self._running_jobs.discard)
+
+	async def _fire(self, key: Hashable, callback: Callable[[], Awaitable[object]]):
+		try:
+			await callback()
+		except Exception as e:
+			print(f"スケジュールされたジョブの実行中に予期せぬエラー ({key}): {e}")
@@ -1,21 +1,27 @@
-import asyncio
+import hashlib
+import json
 import discord
 from typing import Union
+from datetime import datetime
+import pytz
 
-async def remove_thread_system_msg(ch: Union[discord.TextChannel, discord.Thread]):
-	"""
-	スレッド作成時にDiscordが自動で投稿するシステムメッセージを削除する。
-	"""
-	await asyncio.sleep(0.5) # スレッド作成後のメッセージが読み込まれるのを待つ
-	async for m in ch.history(limit=1): # 最新のメッセージ1件を取得
-		if m.type is discord.MessageType.thread_created: # スレッド作成メッセージか確認
-			try:
-				await m.delete()
-				print(f"システムメッセージを削除しました: {m.id}")
-			except discord.Forbidden:
-				print(f"⚠ システムメッセージの削除権限がありません: {m.id}")
-			except discord.NotFound:
-				print(f"⚠ システムメッセージが見つかりません: {m.id}")
-			except Exception as e:
-				print(f"システムメッセージ削除中に予期せぬエラー ({m.id}): {e}")
-			break # 最初のシステムメッセージを見つけたら終了
\ No newline at end of file
+# 募集日時は日本時間の "YYYY/MM/DD HH:MM" 形式で保存されている
+JST = pytz.timezone('Asia/Tokyo')
+DATE_FORMAT = "%Y/%m/%d %H:%M"
+
+def parse_date_s(date_s: str) -> datetime:
+	"""募集日時の文字列をタイムゾーン付き(JST)の datetime に変換する。形式が不正な場合は ValueError"""
+	return JST.localize(datetime.strptime(date_s, DATE_FORMAT))
+
+def render_fingerprint(content: str, view: Union[discord.ui.View, None]) -> str:
+	"""メッセージ本文とボタン構成から、描画内容を識別するハッシュを生成する"""
+	components = view.to_components() if view is not None else []
+	payload = json.dumps([content, components], sort_keys=True, ensure_ascii=False, default=str)
+	return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def date_s_to_epoch(date_s: str) -> Union[int, None]:
+	"""募集日時の文字列をUNIX時刻に変換する。形式が不正な場合は None"""
+	try:
+		return int(parse_date_s(date_s).timestamp())
+	except (ValueError, TypeError):
+		return None
\ No newline at end of file
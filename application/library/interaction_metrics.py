@@ -0,0 +1,190 @@
+# application/library/interaction_metrics.py
+import asyncio
+import io
+import re
+import time
+import discord
+from contextvars import ContextVar
+from typing import Union
+
+# Discordがインタラクションへの応答を待つ秒数
+ACK_DEADLINE_SECONDS = 3.0
+
+# discord.py が自動生成する custom_id（UUIDの16進表記）
+_AUTO_CUSTOM_ID = re.compile(r'[0-9a-f]{32}')
+
+
+class _Trace:
+	"""処理中のインタラクション1件の計測値"""
+	__slots__ = ("interaction", "bucket", "task", "started_at", "acked_at", "db_time", "finished", "warned")
+
+	def __init__(self, interaction: discord.Interaction, bucket: str, task: asyncio.Task):
+		self.interaction = interaction
+		self.bucket = bucket
+		self.task = task
+		self.started_at = time.monotonic()
+		self.acked_at: Union[float, None] = None
+		self.db_time = 0.0
+		self.finished = False
+		self.warned = False
+
+	def age(self) -> float:
+		"""Discordがインタラクションを作成してからの経過秒数（3秒の応答期限と同じ基準）"""
+		return time.time() - self.interaction.created_at.timestamp()
+
+
+class _BucketStats:
+	"""custom_id のプレフィックスごとのカウンタ"""
+	__slots__ = ("count", "acked", "late", "total_ack", "max_ack", "total_handler", "max_handler", "total_db")
+
+	def __init__(self):
+		self.count = 0
+		self.acked = 0
+		self.late = 0
+		self.total_ack = 0.0
+		self.max_ack = 0.0
+		self.total_handler = 0.0
+		self.max_handler = 0.0
+		self.total_db = 0.0
+
+	def as_dict(self) -> dict:
+		return {
+			"count": self.count,
+			"not_acked": self.count - self.acked,
+			"late_ack": self.late,
+			"avg_ack": self.total_ack / self.acked if self.acked else 0.0,
+			"max_ack": self.max_ack,
+			"avg_handler": self.total_handler / self.count if self.count else 0.0,
+			"max_handler": self.max_handler,
+			"avg_db": self.total_db / self.count if self.count else 0.0,
+		}
+
+
+class _TimingStats:
+	"""record_timing() で記録する処理時間のカウンタ"""
+	__slots__ = ("count", "total", "max")
+
+	def __init__(self):
+		self.count = 0
+		self.total = 0.0
+		self.max = 0.0
+
+	def as_dict(self) -> dict:
+		return {
+			"count": self.count,
+			"avg": self.total / self.count if self.count else 0.0,
+			"max": self.max,
+		}
+
+
+_current_trace: ContextVar[Union[_Trace, None]] = ContextVar("interaction_trace", default=None)
+
+
+def record_db_time(seconds: float):
+	"""処理中のインタラクションのDB時間に加算する（インタラクションの処理中でなければ何もしない）"""
+	trace = _current_trace.get()
+	if trace is not None and not trace.finished:
+		trace.db_time += seconds
+
+
+def bucket_for(interaction: discord.Interaction, owner: object = None) -> str:
+	"""集計単位を返す。custom_id の ":" より前の部分、自動生成の custom_id はクラス名を使う"""
+	if interaction.type == discord.InteractionType.application_command:
+		command = interaction.command
+		return "/" + (command.qualified_name if command else (interaction.data or {}).get("name", "unknown"))
+	custom_id = (interaction.data or {}).get("custom_id", "")
+	prefix = custom_id.split(":", 1)[0]
+	if interaction.type == discord.InteractionType.modal_submit or not prefix or _AUTO_CUSTOM_ID.fullmatch(prefix):
+		return f"{interaction.type.name}:{type(owner).__name__ if owner is not None else 'unknown'}"
+	return prefix
+
+
+class InteractionMetrics:
+	"""
+	インタラクションの処理時間を計測するクラス。
+	ハンドラーの先頭（interaction_check）で attach() を呼ぶと、応答 (ack) までの時間・
+	ハンドラー全体の時間・DB時間を custom_id のプレフィックスごとに集計する。
+	応答までの時間は Discord がインタラクションを作成した時刻から計るため、3秒の期限と直接比較できる。
+	ウォッチドッグは watchdog_seconds を過ぎても応答していないハンドラーのスタックを出力する。
+	"""
+
+	def __init__(self, watchdog_seconds: float = 2.0, poll_interval: float = 0.1):
+		self.watchdog_seconds = watchdog_seconds
+		self.poll_interval = poll_interval
+		self._inflight: dict[int, _Trace] = {}
+		self._stats: dict[str, _BucketStats] = {}
+		self._timings: dict[str, _TimingStats] = {}
+		self._watchdog: Union[asyncio.Task, None] = None
+
+	def attach(self, interaction: discord.Interaction, owner: object = None):
+		"""
+		現在のタスクをインタラクションのハンドラーとして計測を始める。
+		同じインタラクションで複数回呼ばれても、最初の1回のみ有効。
+		"""
+		task = asyncio.current_task()
+		if task is None or interaction.id in self._inflight:
+			return
+		trace = _Trace(interaction, bucket_for(interaction, owner), task)
+		if interaction.response.is_done():
+			trace.acked_at = trace.age()
+		self._inflight[interaction.id] = trace
+		_current_trace.set(trace)
+		task.add_done_callback(lambda _: self._finish(trace))
+		if self._watchdog is None or self._watchdog.done():
+			self._watchdog = asyncio.create_task(self._watch())
+
+	def _check_ack(self, trace: _Trace):
+		if trace.acked_at is None and trace.interaction.response.is_done():
+			trace.acked_at = trace.age()
+
+	def _finish(self, trace: _Trace):
+		self._check_ack(trace)
+		trace.finished = True
+		self._inflight.pop(trace.interaction.id, None)
+
+		handler_time = time.monotonic() - trace.started_at
+		stats = self._stats.setdefault(trace.bucket, _BucketStats())
+		stats.count += 1
+		stats.total_handler += handler_time
+		stats.max_handler = max(stats.max_handler, handler_time)
+		stats.total_db += trace.db_time
+		if trace.acked_at is not None:
+			stats.acked += 1
+			stats.total_ack += trace.acked_at
+			stats.max_ack = max(stats.max_ack, trace.acked_at)
+			if trace.acked_at > ACK_DEADLINE_SECONDS:
+				stats.late += 1
+		if trace.acked_at is None or trace.acked_at > self.watchdog_seconds:
+			ack_text = f"{trace.acked_at:.2f}秒" if trace.acked_at is not None else "応答なし"
+			print(f"遅いインタラクション ({trace.bucket}): 応答 {ack_text}, 処理 {handler_time:.2f}秒, DB {trace.db_time:.2f}秒")
+
+	async def _watch(self):
+		"""処理中のインタラクションの応答を監視し、期限が近いハンドラーのスタックを出力する"""
+		while self._inflight:
+			await asyncio.sleep(self.poll_interval)
+			for trace in list(self._inflight.values()):
+				self._check_ack(trace)
+				if trace.acked_at is not None or trace.warned or trace.age() < self.watchdog_seconds:
+					continue
+				trace.warned = True
+				stack = io.StringIO()
+				trace.task.print_stack(file=stack)
+				print(
+					f"警告: インタラクション ({trace.bucket}) が {trace.age():.2f}秒経っても応答していません。"
+					f"ハンドラーのスタック:\n{stack.getvalue()}"
+				)
+
+	def stats(self) -> dict[str, dict]:
+		"""custom_id のプレフィックスごとの件数・応答時間・処理時間・DB時間を返す"""
+		return {bucket: stats.as_dict() for bucket, stats in self._stats.items()}
+
+	def record_timing(self, name: str, seconds: float):
+		"""募集の作成完了までの時間など、インタラクションの外で計る処理時間を記録する"""
+		stats = self._timings.setdefault(name, _TimingStats())
+		stats.count += 1
+		stats.total += seconds
+		stats.max = max(stats.max, seconds)
+
+	def timings(self) -> dict[str, dict]:
+		"""record_timing() で記録した処理時間の件数・平均・最大を返す"""
+		return {name: stats.as_dict() for name, stats in self._timings.items()}
@@ -0,0 +1,88 @@
+# application/library/member_cache.py
+import time
+import discord
+from collections import OrderedDict
+from typing import Iterable, Union
+
+# guild.query_members で一度に問い合わせできる最大人数
+QUERY_MEMBERS_LIMIT = 100
+
+
+class MemberResolver:
+	"""
+	ユーザーIDからサーバーメンバーを解決するためのキャッシュ層。
+	1. guild.get_member（Gatewayで受信済みのメンバーキャッシュ）
+	2. 有効期限付きのLRUキャッシュ（見つからなかったIDも記録する）
+	3. 残りを guild.query_members でまとめて問い合わせる
+	の順に解決するため、通常は REST API を呼ばずに済む。
+	"""
+
+	def __init__(self, ttl: float = 600.0, max_size: int = 2000):
+		self.ttl = ttl
+		self.max_size = max_size
+		# (guild_id, user_id) -> (有効期限, メンバー or None)
+		self._cache: "OrderedDict[tuple[int, int], tuple[float, Union[discord.Member, None]]]" = OrderedDict()
+
+	def _get_cached(self, guild_id: int, user_id: int) -> tuple[bool, Union[discord.Member, None]]:
+		"""キャッシュを参照し、(ヒットしたか, メンバー) を返す"""
+		key = (guild_id, user_id)
+		entry = self._cache.get(key)
+		if entry is None:
+			return False, None
+		expires_at, member = entry
+		if expires_at < time.monotonic():
+			del self._cache[key]
+			return False, None
+		self._cache.move_to_end(key)
+		return True, member
+
+	def _put(self, guild_id: int, user_id: int, member: Union[discord.Member, None]):
+		key = (guild_id, user_id)
+		self._cache[key] = (time.monotonic() + self.ttl, member)
+		self._cache.move_to_end(key)
+		while len(self._cache) > self.max_size:
+			self._cache.popitem(last=False)
+
+	def invalidate(self, user_id: int, guild_id: Union[int, None] = None):
+		"""指定ユーザーのキャッシュを破棄する（guild_id 省略時は全サーバー分）"""
+		if guild_id is not None:
+			self._cache.pop((guild_id, user_id), None)
+			return
+		for key in [key for key in self._cache if key[1] == user_id]:
+			del self._cache[key]
+
+	async def resolve(self, guild: discord.Guild, user_ids: Iterable[int]) -> dict[int, discord.Member]:
+		"""
+		ユーザーIDのリストをメンバーに解決し、{ユーザーID: メンバー} を返す。
+		サーバーに存在しないユーザーは結果に含まれない。
+		"""
+		resolved: dict[int, discord.Member] = {}
+		misses: list[int] = []
+		for user_id in dict.fromkeys(user_ids):
+			member = guild.get_member(user_id)
+			if member is not None:
+				resolved[user_id] = member
+				continue
+			hit, member = self._get_cached(guild.id, user_id)
+			if hit:
+				if member is not None:
+					resolved[user_id] = member
+				continue
+			misses.append(user_id)
+
+		for i in range(0, len(misses), QUERY_MEMBERS_LIMIT):
+			chunk = misses[i:i + QUERY_MEMBERS_LIMIT]
+			try:
+				members = await guild.query_members(user_ids=chunk, cache=True)
+			except Exception as e:
+				print(f"メンバーの一括取得中に予期せぬエラー: {e}")
+				continue
+			found = {member.id: member for member in members}
+			for user_id in chunk:
+				member = found.get(user_id)
+				# 見つからなかったIDも記録し、描画のたびに問い合わせないようにする
+				self._put(guild.id, user_id, member)
+				if member is not None:
+					resolved[user_id] = member
+
+		return resolved
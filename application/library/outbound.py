@@ -0,0 +1,176 @@
+# application/library/outbound.py
+import asyncio
+import heapq
+import itertools
+import time
+import discord
+from typing import Awaitable, Callable, TypeVar
+
+T = TypeVar('T')
+
+# 送信リクエストの優先度（値が小さいほど優先）
+PRIORITY_INTERACTION = 0 # インタラクションへのフォローアップ
+PRIORITY_EDIT = 1 # ユーザーの操作に伴うメッセージ編集・イベント作成
+PRIORITY_BACKGROUND = 2 # 定期処理・起動時の再描画・DM通知など
+
+PRIORITY_NAMES = {
+	PRIORITY_INTERACTION: "interaction",
+	PRIORITY_EDIT: "edit",
+	PRIORITY_BACKGROUND: "background",
+}
+
+
+class _ClassStats:
+	"""優先度クラスごとのカウンタ"""
+	__slots__ = ("submitted", "completed", "failed", "retried", "waiting", "total_wait", "max_wait")
+
+	def __init__(self):
+		self.submitted = 0
+		self.completed = 0
+		self.failed = 0
+		self.retried = 0
+		self.waiting = 0
+		self.total_wait = 0.0
+		self.max_wait = 0.0
+
+	def as_dict(self) -> dict:
+		started = self.completed + self.failed
+		return {
+			"submitted": self.submitted,
+			"completed": self.completed,
+			"failed": self.failed,
+			"retried": self.retried,
+			"queue_depth": self.waiting,
+			"avg_wait": self.total_wait / started if started else 0.0,
+			"max_wait": self.max_wait,
+		}
+
+
+class OutboundQueue:
+	"""
+	Discord APIへの送信リクエストを優先度順に実行するキュー。
+	同時実行数を concurrency に制限し、空きが出たときは優先度の高いリクエストから実行する。
+	バックグラウンド処理は background_concurrency までしか同時に実行しないため、
+	ユーザー操作に伴うリクエストのための枠が常に残る。
+	レート制限 (429) と、編集・削除など繰り返しても結果が変わらないリクエストのサーバーエラー (5xx) は
+	指数バックオフで再試行し、429 の間はバックグラウンド処理の開始を見合わせる。
+	"""
+
+	def __init__(self, concurrency: int = 4, background_concurrency: int = 2, max_attempts: int = 3, base_backoff: float = 1.0):
+		self.concurrency = concurrency
+		self.background_concurrency = min(background_concurrency, concurrency - 1) if concurrency > 1 else 1
+		self.max_attempts = max_attempts
+		self.base_backoff = base_backoff
+		self._active = 0
+		self._active_background = 0
+		self._waiters: list[tuple[int, int, asyncio.Future]] = []
+		self._seq = itertools.count()
+		self._backoff_until = 0.0
+		self._stats = {priority: _ClassStats() for priority in PRIORITY_NAMES}
+
+	def _has_capacity(self, priority: int) -> bool:
+		if self._active >= self.concurrency:
+			return False
+		return priority != PRIORITY_BACKGROUND or self._active_background < self.background_concurrency
+
+	def _take(self, priority: int):
+		self._active += 1
+		if priority == PRIORITY_BACKGROUND:
+			self._active_background += 1
+
+	def _release(self, priority: int):
+		self._active -= 1
+		if priority == PRIORITY_BACKGROUND:
+			self._active_background -= 1
+		self._wake()
+
+	def _wake(self):
+		"""空いた枠を優先度の高い待機中リクエストに割り当てる"""
+		while self._waiters:
+			priority, _, future = self._waiters[0]
+			if future.done():
+				heapq.heappop(self._waiters)
+				continue
+			# 先頭がバックグラウンドなら、残りも全てバックグラウンドなので枠が空くまで待つ
+			if not self._has_capacity(priority):
+				break
+			heapq.heappop(self._waiters)
+			self._take(priority)
+			future.set_result(None)
+
+	async def _acquire(self, priority: int):
+		if priority == PRIORITY_BACKGROUND:
+			delay = self._backoff_until - time.monotonic()
+			if delay > 0:
+				await asyncio.sleep(delay)
+
+		# 自分より優先度の高い（または同じ）待機中リクエストがなければ、すぐに実行する
+		if (not self._waiters or self._waiters[0][0] > priority) and self._has_capacity(priority):
+			self._take(priority)
+			return
+
+		future = asyncio.get_running_loop().create_future()
+		heapq.heappush(self._waiters, (priority, next(self._seq), future))
+		try:
+			await future
+		except asyncio.CancelledError:
+			# 枠が割り当てられた直後にキャンセルされた場合は返却する
+			if future.done() and not future.cancelled():
+				self._release(priority)
+			raise
+
+	async def submit(self, priority: int, request: Callable[[], Awaitable[T]], label: str = "", idempotent: bool = False) -> T:
+		"""
+		request() を優先度 priority で実行し、その結果を返す。
+		再試行に備えて、コルーチンではなくコルーチンを生成する関数を渡すこと。
+		レート制限 (429) は実行前に拒否されたリクエストのため常に再試行するが、
+		サーバーエラー (5xx) は処理済みの可能性があるため、idempotent=True（編集・削除など）の場合のみ再試行する。
+		再試行を待つ間は枠を返却し、他のリクエストを先に実行する。
+		再試行しても失敗した場合は最後の例外をそのまま送出する。
+		"""
+		stats = self._stats[priority]
+		stats.submitted += 1
+		enqueued_at = time.monotonic()
+		for attempt in range(1, self.max_attempts + 1):
+			stats.waiting += 1
+			try:
+				await self._acquire(priority)
+			except BaseException:
+				stats.failed += 1
+				raise
+			finally:
+				stats.waiting -= 1
+			if attempt == 1:
+				wait = time.monotonic() - enqueued_at
+				stats.total_wait += wait
+				stats.max_wait = max(stats.max_wait, wait)
+
+			try:
+				result = await request()
+				stats.completed += 1
+				return result
+			except discord.RateLimited as e:
+				delay = e.retry_after
+				self._backoff_until = max(self._backoff_until, time.monotonic() + delay)
+				if attempt == self.max_attempts:
+					stats.failed += 1
+					raise
+			except discord.HTTPException as e:
+				if (e.status != 429 and e.status < 500) or (e.status >= 500 and not idempotent) or attempt == self.max_attempts:
+					stats.failed += 1
+					raise
+				delay = self.base_backoff * (2 ** (attempt - 1))
+				if e.status == 429:
+					self._backoff_until = max(self._backoff_until, time.monotonic() + delay)
+			except BaseException:
+				stats.failed += 1
+				raise
+			finally:
+				self._release(priority)
+			stats.retried += 1
+			print(f"送信リクエストを再試行します ({label or PRIORITY_NAMES[priority]}, {attempt}回目, {delay:.1f}秒後)")
+			await asyncio.sleep(delay)
+
+	def stats(self) -> dict[str, dict]:
+		"""優先度クラスごとのキュー長・待ち時間などのカウンタを返す"""
+		return {PRIORITY_NAMES[priority]: stats.as_dict() for priority, stats in self._stats.items()}
@@ -0,0 +1,172 @@
+# application/library/recruit_archiver.py
+import time
+import discord
+from datetime import datetime, timedelta
+from typing import Callable, Union
+
+from application.model.recruit import RecruitModel
+from application.model.archive_post import ArchivePostModel, PERIOD_DAY, PERIOD_WEEK
+from application.library.helper import JST
+from application.library.outbound import OutboundQueue, PRIORITY_BACKGROUND
+
+# Discordのメッセージ本文の上限（文字数）
+MESSAGE_LIMIT = 2000
+# 一括削除できるのは作成から14日以内のメッセージのみ（余裕をもって13日とする）
+BULK_DELETE_MAX_AGE = timedelta(days=13)
+
+_WEEKDAYS = "月火水木金土日"
+
+
+def period_start(epoch: float, period: str) -> int:
+	"""epoch を含む期間（日本時間の日・月曜始まりの週）の開始時刻をUNIX時刻で返す"""
+	day = datetime.fromtimestamp(epoch, JST).replace(hour=0, minute=0, second=0, microsecond=0)
+	if period == PERIOD_WEEK:
+		day -= timedelta(days=day.weekday())
+	# 日本に夏時間はないため、タイムゾーンを付け直しても時差は変わらない
+	return int(JST.localize(day.replace(tzinfo=None)).timestamp())
+
+
+def next_period_start(epoch: float, period: str) -> int:
+	"""epoch の次の期間の開始時刻を返す"""
+	days = 7 if period == PERIOD_WEEK else 1
+	return period_start(period_start(epoch, period) + days * 86400 + 3600, period)
+
+
+class RecruitArchiver:
+	"""
+	終了した募集のメッセージを、日・週ごとに1件のアーカイブ投稿にまとめるクラス。
+	期間が終わった募集を archive_posts に割り当て（DBに対応を記録）、アーカイブ投稿を投稿・編集してから、
+	元の募集メッセージをまとめて削除する。各段階の状態はDBに残るため、途中で失敗しても次回の実行で続きから再開する。
+	"""
+
+	def __init__(self, model: RecruitModel, posts: ArchivePostModel, outbound: OutboundQueue,
+				get_channel: Callable[[], Union[discord.TextChannel, discord.Thread, None]], period: str = PERIOD_DAY):
+		if period not in (PERIOD_DAY, PERIOD_WEEK):
+			raise ValueError(f"アーカイブの期間は '{PERIOD_DAY}' または '{PERIOD_WEEK}' を指定してください: {period}")
+		self.model = model
+		self.posts = posts
+		self.outbound = outbound
+		self._get_channel = get_channel
+		self.period = period
+
+	async def run_once(self, now: Union[float, None] = None):
+		"""期間が終わった募集を割り当て、アーカイブ投稿を更新し、元のメッセージを削除する"""
+		ch = self._get_channel()
+		if not isinstance(ch, (discord.TextChannel, discord.Thread)):
+			return
+		now = time.time() if now is None else now
+		started_at = time.monotonic()
+
+		# 1. 期間が終わった募集を期間ごとにアーカイブ投稿へ割り当てる
+		groups: dict[int, list[int]] = {}
+		for recruit in await self.model.get_archivable(period_start(now, self.period)):
+			groups.setdefault(period_start(recruit.starts_at, self.period), []).append(recruit.id)
+		for start, recruit_ids in groups.items():
+			await self.posts.assign(self.period, start, recruit_ids)
+
+		# 2. 内容が変わったアーカイブ投稿を投稿・編集する
+		rendered = 0
+		for post in await self.posts.get_needing_render():
+			if await self._render_post(ch, post):
+				rendered += 1
+
+		# 3. アーカイブ投稿に載った募集の元のメッセージを削除する
+		deleted = await self._delete_originals(ch)
+
+		if groups or rendered or deleted:
+			print(
+				f"募集メッセージをアーカイブしました: 割り当て {sum(len(ids) for ids in groups.values())}件, "
+				f"アーカイブ投稿 {rendered}件, 削除 {deleted}件 ({time.monotonic() - started_at:.1f}秒)"
+			)
+
+	def _content(self, post: dict, recruits: list) -> str:
+		start = datetime.fromtimestamp(post['period_start'], JST)
+		if post['period'] == PERIOD_WEEK:
+			end = start + timedelta(days=6)
+			title = f"🗂 {start.strftime('%Y/%m/%d')} 〜 {end.strftime('%Y/%m/%d')} のGD練習"
+		else:
+			title = f"🗂 {start.strftime('%Y/%m/%d')}（{_WEEKDAYS[start.weekday()]}）のGD練習"
+
+		lines = [f"**{title}**（{len(recruits)}件）"]
+		current_day = None
+		for index, recruit in enumerate(recruits):
+			line = recruit.archive_line()
+			if post['period'] == PERIOD_WEEK and recruit.start_time and recruit.start_time.date() != current_day:
+				current_day = recruit.start_time.date()
+				line = f"__{recruit.start_time.strftime('%m/%d')}（{_WEEKDAYS[recruit.start_time.weekday()]}）__\n{line}"
+			rest = f"…ほか {len(recruits) - index}件"
+			if len("\n".join(lines)) + len(line) + len(rest) + 2 > MESSAGE_LIMIT:
+				lines.append(rest)
+				break
+			lines.append(line)
+		if not recruits:
+			lines.append("（なし）")
+		return "\n".join(lines)
+
+	async def _render_post(self, ch: Union[discord.TextChannel, discord.Thread], post: dict) -> bool:
+		"""アーカイブ投稿を1件投稿または編集する。成功した場合は True を返す"""
+		recruits = await self.model.get_archived(post['id'])
+		content = self._content(post, recruits)
+		try:
+			if post['msg_id']:
+				try:
+					await self.outbound.submit(
+						PRIORITY_BACKGROUND, lambda: ch.get_partial_message(post['msg_id']).edit(content=content), "archive_edit", idempotent=True
+					)
+					await self.posts.mark_rendered(post['id'], post['msg_id'], post['revision'])
+					return True
+				except discord.NotFound:
+					print(f"アーカイブ投稿 {post['msg_id']} が見つかりません。新規送信します。")
+			msg = await self.outbound.submit(PRIORITY_BACKGROUND, lambda: ch.send(content), "archive_send")
+			await self.posts.mark_rendered(post['id'], msg.id, post['revision'])
+			return True
+		except discord.Forbidden:
+			print("⚠ アーカイブ投稿の送信権限がありません。")
+		except Exception as e:
+			print(f"アーカイブ投稿の送信中に予期せぬエラー (ID: {post['id']}): {e}")
+		return False
+
+	async def _delete_originals(self, ch: Union[discord.TextChannel, discord.Thread]) -> int:
+		"""アーカイブ済みの募集の元のメッセージを削除し、削除できた件数を返す"""
+		rows = await self.model.get_archived_messages()
+		if not rows:
+			return 0
+
+		bulk_limit = discord.utils.utcnow() - BULK_DELETE_MAX_AGE
+		recent = [row for row in rows if discord.utils.snowflake_time(row['msg_id']) > bulk_limit]
+		old = [row for row in rows if discord.utils.snowflake_time(row['msg_id']) <= bulk_limit]
+		deleted_ids: list[int] = []
+
+		if isinstance(ch, discord.TextChannel):
+			for i in range(0, len(recent), 100):
+				chunk = recent[i:i + 100]
+				if len(chunk) < 2:
+					old.extend(chunk)
+					continue
+				try:
+					await self.outbound.submit(
+						PRIORITY_BACKGROUND, lambda: ch.delete_messages([discord.Object(row['msg_id']) for row in chunk]), "archive_bulk_delete", idempotent=True
+					)
+					deleted_ids.extend(row['id'] for row in chunk)
+				except discord.HTTPException as e:
+					# 一部のメッセージが既に削除されている場合などは1件ずつ削除する
+					print(f"募集メッセージの一括削除に失敗したため、1件ずつ削除します: {e}")
+					old.extend(chunk)
+		else:
+			old.extend(recent)
+
+		for row in old:
+			try:
+				await self.outbound.submit(
+					PRIORITY_BACKGROUND, ch.get_partial_message(row['msg_id']).delete, "archive_delete", idempotent=True
+				)
+			except discord.NotFound:
+				pass
+			except discord.HTTPException as e:
+				print(f"募集メッセージの削除に失敗しました (メッセージID: {row['msg_id']}): {e}")
+				continue
+			deleted_ids.append(row['id'])
+
+		# 削除したメッセージのIDを消す（アーカイブ済みの募集は再投稿の対象にならない）
+		await self.model.bulk_update({recruit_id: {'msg_id': None} for recruit_id in deleted_ids})
+		return len(deleted_ids)
@@ -0,0 +1,96 @@
+# application/library/reminder_worker.py
+import asyncio
+import time
+import discord
+from typing import Awaitable, Callable, Union
+
+from application.model.reminder_outbox import ReminderOutboxModel
+
+# 送信待ちがなくても、この秒数ごとにテーブルを確認する（他プロセスからの登録に備える）
+MAX_IDLE_SECONDS = 60.0
+
+
+class ReminderOutboxWorker:
+	"""
+	reminder_outbox の送信待ちの行を取り出して通知DMを送信するワーカー。
+	同時送信数を concurrency に制限して並行に送り、失敗した宛先は指数バックオフで再送する。
+	DMを受け付けていない・存在しないユーザーは再送せずに failed とする。
+	募集の開始 cutoff_seconds 秒前までに送信できなかった宛先は、内容が古くなるため送らずに expired とする。
+	送信状態は1件ごとにDBへ記録されるため、再起動しても未送信の宛先から再開できる。
+	"""
+
+	def __init__(self, outbox: ReminderOutboxModel, send: Callable[[int, str], Awaitable[object]], concurrency: int = 4,
+				batch_size: int = 50, max_attempts: int = 5, base_backoff: float = 30.0, max_backoff: float = 3600.0,
+				cutoff_seconds: int = 5 * 60):
+		self.outbox = outbox
+		self.cutoff_seconds = cutoff_seconds
+		self._send = send
+		self.batch_size = batch_size
+		self.max_attempts = max_attempts
+		self.base_backoff = base_backoff
+		self.max_backoff = max_backoff
+		self._semaphore = asyncio.Semaphore(concurrency)
+		self._wakeup = asyncio.Event()
+		self._runner: Union[asyncio.Task, None] = None
+
+	def notify(self):
+		"""新しい送信待ちが登録されたことをワーカーに知らせる"""
+		self._wakeup.set()
+
+	def start(self):
+		"""ワーカーのループを開始する（開始済みなら何もしない）"""
+		if self._runner is None or self._runner.done():
+			self._runner = asyncio.create_task(self._run())
+
+	def stop(self):
+		if self._runner is not None:
+			self._runner.cancel()
+			self._runner = None
+
+	async def _run(self):
+		while True:
+			self._wakeup.clear()
+			try:
+				now = int(time.time())
+				expired = await self.outbox.expire_stale(now, self.cutoff_seconds)
+				if expired:
+					print(f"開始直前までに送信できなかった通知DMを {expired} 件取り消しました。")
+				rows = await self.outbox.get_due(now, self.batch_size)
+				if rows:
+					started_at = time.monotonic()
+					await asyncio.gather(*(self._deliver(row) for row in rows))
+					print(f"通知DMを {len(rows)} 件処理しました ({time.monotonic() - started_at:.1f}秒)")
+					continue
+				next_attempt_at = await self.outbox.get_next_attempt_at()
+			except Exception as e:
+				print(f"通知DMの送信処理中に予期せぬエラー: {e}")
+				next_attempt_at = None
+
+			timeout = MAX_IDLE_SECONDS
+			if next_attempt_at is not None:
+				timeout = min(max(next_attempt_at - time.time(), 0.0), MAX_IDLE_SECONDS)
+			try:
+				await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+			except asyncio.TimeoutError:
+				pass
+
+	async def _deliver(self, row: dict):
+		"""1件の通知DMを送信し、結果をDBに記録する"""
+		async with self._semaphore:
+			try:
+				await self._send(row['user_id'], row['message'])
+			except (discord.Forbidden, discord.NotFound) as e:
+				print(f"警告: ユーザーID {row['user_id']} にDMを送信できませんでした（ブロックされている可能性があります）。")
+				await self.outbox.mark_failed(row['id'], str(e))
+				return
+			except Exception as e:
+				attempts = row['attempts'] + 1
+				if attempts >= self.max_attempts:
+					print(f"DM送信を {attempts} 回試みましたが失敗しました (ユーザーID: {row['user_id']}): {e}")
+					await self.outbox.mark_failed(row['id'], str(e))
+				else:
+					delay = min(self.base_backoff * (2 ** (attempts - 1)), self.max_backoff)
+					print(f"DM送信中に予期せぬエラー (ユーザーID: {row['user_id']}, {delay:.0f}秒後に再送): {e}")
+					await self.outbox.mark_retry(row['id'], int(time.time() + delay), str(e))
+				return
+			await self.outbox.mark_sent(row['id'])
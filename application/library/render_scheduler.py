@@ -0,0 +1,65 @@
+# application/library/render_scheduler.py
+import asyncio
+from typing import Awaitable, Callable
+
+from application.library.outbound import PRIORITY_EDIT
+
+
+class RenderScheduler:
+	"""
+	募集IDごとにメッセージの再描画要求をまとめるスケジューラ。
+	短時間に届いた複数の要求は delay 秒の待機後に1回の描画へ集約され、
+	描画中に届いた要求は完了後にもう1回だけ描画される。
+	そのため、1つのメッセージに対する編集は常に最大1件しか実行されない。
+	まとめられた要求の送信優先度は、その中で最も高いものを使う。
+	"""
+
+	def __init__(self, render: Callable[[int, int], Awaitable[bool]], delay: float = 0.3):
+		self._render = render
+		self.delay = delay
+		self._tasks: dict[int, asyncio.Task] = {}
+		self._dirty: set[int] = set()
+		self._priority: dict[int, int] = {}
+		self._waiters: dict[int, list[asyncio.Future]] = {}
+
+	def request(self, recruit_id: int, priority: int = PRIORITY_EDIT) -> asyncio.Future:
+		"""
+		再描画を要求する。戻り値の Future は、この要求を反映した描画が終わると完了し、描画に成功したかを返す。
+		インタラクションの応答を待たせないよう、呼び出し側は通常 await しない。
+		"""
+		future = asyncio.get_running_loop().create_future()
+		self._waiters.setdefault(recruit_id, []).append(future)
+		self._dirty.add(recruit_id)
+		self._priority[recruit_id] = min(priority, self._priority.get(recruit_id, priority))
+		if recruit_id not in self._tasks:
+			self._tasks[recruit_id] = asyncio.create_task(self._run(recruit_id))
+		return future
+
+	def pending_count(self) -> int:
+		"""描画待ち・描画中の募集の数を返す"""
+		return len(self._tasks)
+
+	async def _run(self, recruit_id: int):
+		try:
+			while recruit_id in self._dirty:
+				# 連続したクリックをまとめるために少し待つ
+				await asyncio.sleep(self.delay)
+				self._dirty.discard(recruit_id)
+				priority = self._priority.pop(recruit_id, PRIORITY_EDIT)
+				waiters = self._waiters.pop(recruit_id, [])
+				ok = False
+				try:
+					# 描画処理は毎回DBから最新の状態を読み込む
+					ok = bool(await self._render(recruit_id, priority))
+				except Exception as e:
+					print(f"募集メッセージの再描画中に予期せぬエラー (募集ID: {recruit_id}): {e}")
+				finally:
+					for future in waiters:
+						if not future.done():
+							future.set_result(ok)
+		finally:
+			self._tasks.pop(recruit_id, None)
+			self._priority.pop(recruit_id, None)
+			for future in self._waiters.pop(recruit_id, []):
+				if not future.done():
+					future.cancel()
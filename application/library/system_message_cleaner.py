@@ -0,0 +1,95 @@
+# application/library/system_message_cleaner.py
+import asyncio
+import time
+import discord
+from typing import Union
+
+from application.library.outbound import OutboundQueue, PRIORITY_BACKGROUND
+
+# スレッドの作成後、システムメッセージを待つ秒数
+EXPECT_TTL_SECONDS = 60.0
+# まとめて削除するまでに他のシステムメッセージを待つ秒数
+FLUSH_DELAY_SECONDS = 0.5
+
+
+class ThreadSystemMessageCleaner:
+	"""
+	ボットがスレッドを作成したときに Discord が投稿する「スレッドを作成しました」のシステムメッセージを削除するクラス。
+	スレッドの作成後に expect() でスレッドIDを登録し、on_message で受け取ったシステムメッセージの参照先と照合する。
+	作成APIの応答より先にメッセージが届く場合に備え、照合できなかったメッセージも短時間保持しておく。
+	同時に届いた複数のメッセージは FLUSH_DELAY_SECONDS 待ってから一括で削除する。
+	"""
+
+	def __init__(self, outbound: OutboundQueue):
+		self.outbound = outbound
+		# スレッドID -> 登録した時刻
+		self._expected: dict[int, float] = {}
+		# スレッドID -> まだ照合できていないシステムメッセージ
+		self._unmatched: dict[int, tuple[float, discord.Message]] = {}
+		self._pending: list[discord.Message] = []
+		self._flusher: Union[asyncio.Task, None] = None
+
+	def expect(self, thread_id: int):
+		"""ボットが作成したスレッドを登録し、そのシステムメッセージが届き次第削除する"""
+		now = time.monotonic()
+		self._expire(now)
+		entry = self._unmatched.pop(thread_id, None)
+		if entry is not None:
+			self._enqueue(entry[1])
+		else:
+			self._expected[thread_id] = now
+
+	def handle(self, message: discord.Message):
+		"""受信したメッセージがボットのスレッドのシステムメッセージであれば削除を予約する"""
+		if message.type is not discord.MessageType.thread_created or message.reference is None:
+			return
+		thread_id = message.reference.channel_id
+		now = time.monotonic()
+		self._expire(now)
+		if self._expected.pop(thread_id, None) is not None:
+			self._enqueue(message)
+		else:
+			self._unmatched[thread_id] = (now, message)
+
+	def _expire(self, now: float):
+		for thread_id, expected_at in list(self._expected.items()):
+			if now - expected_at > EXPECT_TTL_SECONDS:
+				del self._expected[thread_id]
+		for thread_id, (received_at, _) in list(self._unmatched.items()):
+			if now - received_at > EXPECT_TTL_SECONDS:
+				del self._unmatched[thread_id]
+
+	def _enqueue(self, message: discord.Message):
+		self._pending.append(message)
+		if self._flusher is None or self._flusher.done():
+			self._flusher = asyncio.create_task(self._flush())
+
+	async def _flush(self):
+		while self._pending:
+			await asyncio.sleep(FLUSH_DELAY_SECONDS)
+			messages, self._pending = self._pending, []
+			await self._delete(messages)
+
+	async def _delete(self, messages: list[discord.Message]):
+		by_channel: dict[int, list[discord.Message]] = {}
+		for message in messages:
+			by_channel.setdefault(message.channel.id, []).append(message)
+
+		for channel_messages in by_channel.values():
+			ch = channel_messages[0].channel
+			try:
+				if len(channel_messages) > 1 and isinstance(ch, discord.TextChannel):
+					# 一括削除は2〜100件まで
+					for i in range(0, len(channel_messages), 100):
+						chunk = channel_messages[i:i + 100]
+						await self.outbound.submit(PRIORITY_BACKGROUND, lambda: ch.delete_messages(chunk), "system_message_delete", idempotent=True)
+				else:
+					for message in channel_messages:
+						await self.outbound.submit(PRIORITY_BACKGROUND, message.delete, "system_message_delete", idempotent=True)
+				print(f"システムメッセージを {len(channel_messages)} 件削除しました。")
+			except discord.Forbidden:
+				print("⚠ システムメッセージの削除権限がありません。")
+			except discord.NotFound:
+				print("⚠ システムメッセージが見つかりません。")
+			except Exception as e:
+				print(f"システムメッセージ削除中に予期せぬエラー: {e}")
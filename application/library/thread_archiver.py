@@ -0,0 +1,106 @@
+# application/library/thread_archiver.py
+import asyncio
+import time
+import discord
+from typing import Awaitable, Callable, Union
+
+from application.model.recruit import RecruitModel
+
+# アーカイブ待ちがなくても、この秒数ごとにテーブルを確認する（管理画面での削除などに備える）
+MAX_IDLE_SECONDS = 10 * 60
+# 失敗したスレッドを次に試すまでの秒数
+RETRY_SECONDS = 5 * 60
+
+
+class ThreadArchiver:
+	"""
+	終了・削除された募集のスレッドをアーカイブするワーカー。
+	アーカイブ待ちの募集を batch_size 件ずつ取り出し、同時実行数を concurrency に制限して処理する。
+	処理した募集には thread_archived_at を記録するため、各スレッドは1回だけ処理される。
+	起動時の backfill() は、既存の募集のスレッドをアーカイブ待ちがなくなるまでまとめて処理する。
+	"""
+
+	def __init__(self, model: RecruitModel, archive: Callable[[int], Awaitable[object]], concurrency: int = 2,
+				batch_size: int = 50):
+		self.model = model
+		self._archive = archive
+		self.batch_size = batch_size
+		self._semaphore = asyncio.Semaphore(concurrency)
+		self._wakeup = asyncio.Event()
+		self._runner: Union[asyncio.Task, None] = None
+		# 失敗した募集ID -> 再試行する時刻
+		self._retry_at: dict[int, float] = {}
+
+	def notify(self):
+		"""募集が終了・削除されたことをワーカーに知らせる"""
+		self._wakeup.set()
+
+	def start(self):
+		"""ワーカーのループを開始する（開始済みなら何もしない）"""
+		if self._runner is None or self._runner.done():
+			self._runner = asyncio.create_task(self._run())
+
+	def stop(self):
+		if self._runner is not None:
+			self._runner.cancel()
+			self._runner = None
+
+	async def backfill(self) -> int:
+		"""アーカイブ待ちの募集がなくなるまで処理し、処理した件数を返す"""
+		total = 0
+		started_at = time.monotonic()
+		while True:
+			processed = await self._process_batch()
+			if not processed:
+				break
+			total += processed
+		if total:
+			print(f"スレッドを {total} 件アーカイブしました ({time.monotonic() - started_at:.1f}秒)")
+		return total
+
+	async def _process_batch(self) -> int:
+		"""アーカイブ待ちの募集を1回分処理し、処理できた件数を返す"""
+		now = time.time()
+		# 失敗した募集で取得枠が埋まらないよう、再試行待ちの件数だけ多めに取得する
+		rows = await self.model.get_threads_to_archive(self.batch_size + len(self._retry_at))
+		rows = [row for row in rows if self._retry_at.get(row['id'], 0) <= now][:self.batch_size]
+		if not rows:
+			return 0
+		results = await asyncio.gather(*(self._archive_one(row) for row in rows))
+		done_ids = [row['id'] for row, ok in zip(rows, results) if ok]
+		await self.model.mark_threads_archived(done_ids, int(time.time()))
+		return len(done_ids)
+
+	async def _archive_one(self, row: dict) -> bool:
+		async with self._semaphore:
+			try:
+				await self._archive(row['thread_id'])
+			except (discord.NotFound, discord.Forbidden) as e:
+				# 削除済み・権限のないスレッドは再試行しても変わらないため、処理済みにする
+				print(f"スレッドをアーカイブできませんでした (スレッドID: {row['thread_id']}): {e}")
+			except Exception as e:
+				print(f"スレッドのアーカイブ中に予期せぬエラー (スレッドID: {row['thread_id']}, {RETRY_SECONDS}秒後に再試行): {e}")
+				self._retry_at[row['id']] = time.time() + RETRY_SECONDS
+				return False
+			self._retry_at.pop(row['id'], None)
+			return True
+
+	async def _run(self):
+		try:
+			await self.backfill()
+		except Exception as e:
+			print(f"既存スレッドのアーカイブ中に予期せぬエラー: {e}")
+		while True:
+			self._wakeup.clear()
+			try:
+				if await self._process_batch():
+					continue
+			except Exception as e:
+				print(f"スレッドのアーカイブ処理中に予期せぬエラー: {e}")
+			timeout = MAX_IDLE_SECONDS
+			if self._retry_at:
+				timeout = min(max(min(self._retry_at.values()) - time.time(), 0.0), MAX_IDLE_SECONDS)
+			try:
+				await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+			except asyncio.TimeoutError:
+				pass
@@ -0,0 +1,54 @@
+# application/model/archive_post.py
+import sqlite3
+import time
+from typing import Union
+
+from .database_manager import DatabaseManager
+
+# archive_posts.period の値
+PERIOD_DAY = 'day'
+PERIOD_WEEK = 'week'
+
+
+class ArchivePostModel:
+	"""
+	終了した募集を日・週ごとにまとめたアーカイブ投稿 (archive_posts) を管理するクラス。
+	どの募集がどの投稿にまとめられたかは recruits.archive_post_id に記録される。
+	"""
+
+	async def assign(self, period: str, period_start: int, recruit_ids: list[int]) -> Union[int, None]:
+		"""
+		期間のアーカイブ投稿を（なければ作成して）取得し、募集をその投稿に割り当てる。
+		投稿の revision を増やして再描画が必要な状態にする。両者は同じトランザクションで書き込まれる。投稿のIDを返す。
+		"""
+		now = int(time.time())
+		def _assign(conn: sqlite3.Connection) -> int:
+			post_id = conn.execute("""
+				INSERT INTO archive_posts (period, period_start, created_at, updated_at)
+				VALUES (?, ?, ?, ?)
+				ON CONFLICT (period, period_start) DO UPDATE SET revision = revision + 1, updated_at = excluded.updated_at
+				RETURNING id
+			""", (period, period_start, now, now)).fetchone()['id']
+			conn.executemany(
+				"UPDATE recruits SET archive_post_id = ? WHERE id = ?", [(post_id, recruit_id) for recruit_id in recruit_ids]
+			)
+			return post_id
+		try:
+			return await DatabaseManager.run_write(_assign)
+		except sqlite3.Error as e:
+			print(f"アーカイブ投稿の登録中にエラーが発生しました: {e}")
+			return None
+
+	async def get_needing_render(self) -> list[dict]:
+		"""内容が変わり、投稿または編集が必要なアーカイブ投稿を取得する"""
+		return await DatabaseManager.fetch_all(
+			"SELECT * FROM archive_posts WHERE rendered_revision < revision ORDER BY period_start"
+		)
+
+	async def mark_rendered(self, post_id: int, msg_id: int, revision: int):
+		"""
+		アーカイブ投稿のメッセージIDと、描画した時点の revision を保存する。
+		描画中に募集が追加された場合は revision が進んでいるため、再描画が必要な状態のまま残る。
+		"""
+		query = "UPDATE archive_posts SET msg_id = ?, rendered_revision = MAX(rendered_revision, ?), updated_at = ? WHERE id = ?"
+		await DatabaseManager.execute_query(query, (msg_id, revision, int(time.time()), post_id))
@@ -1,156 +1,143 @@
-# application/model/database_manager.py
-import sqlite3
-import os
-from dotenv import load_dotenv # 環境変数をここで読み込む
-from typing import Union # この行を追加
-
-# 環境変数をロード
-load_dotenv()
-
-# .envファイルからデータベースのファイルパスを取得（例: DB_NAME=mydatabase.db）
-DB_NAME = os.getenv('DB_NAME', 'recruits.db') # .envになければデフォルト値を使用
-
-class DatabaseManager:
-	"""
-	SQLiteデータベースへの接続と基本的な操作を管理するクラス。
-	"""
-
-	@staticmethod
-	def _get_connection():
-		"""データベース接続を返す"""
-		try:
-			# sqlite3.connect はDBファイルへのパスを指定
-			conn = sqlite3.connect(DB_NAME)
-			# 結果を辞書形式で受け取るための設定
-			conn.row_factory = sqlite3.Row
-			return conn
-		except sqlite3.Error as err:
-			print(f"データベース接続エラー: {err}")
-			raise err
-
-	@staticmethod
-	def initialize_db():
-		"""データベースとテーブルを初期化する"""
-		conn = None
-		try:
-			conn = DatabaseManager._get_connection()
-			cursor = conn.cursor()
-
-			# SQLite 用の CREATE TABLE 文
-			# 既存のテーブルにカラムを追加するためのALTER TABLE文も追加
-			cursor.execute("""
-				CREATE TABLE IF NOT EXISTS recruits (
-					id INTEGER PRIMARY KEY AUTOINCREMENT,
-					date_s TEXT NOT NULL,
-					place TEXT NOT NULL,
-					max_people INTEGER NOT NULL,
-					note TEXT,
-					thread_id INTEGER NOT NULL,
-					msg_id INTEGER,
-					participants TEXT DEFAULT '[]',
-					is_deleted INTEGER DEFAULT 0
-				)
-			""")
-
-			# 既存のテーブル構造を確認し、必要に応じてカラムを追加
-			cursor.execute("PRAGMA table_info(recruits)")
-			columns = [row['name'] for row in cursor.fetchall()]
-			if 'is_deleted' not in columns:
-				cursor.execute("ALTER TABLE recruits ADD COLUMN is_deleted INTEGER DEFAULT 0")
-
-			conn.commit()
-			print(f"SQLiteデータベース '{DB_NAME}' のテーブルが初期化されました。")
-		except sqlite3.Error as e:
-			print(f"データベースの初期化中にエラーが発生しました: {e}")
-			if conn:
-				conn.rollback()
-		finally:
-			if conn:
-				conn.close()
-
-	@staticmethod
-	async def execute_query(query: str, params: tuple = ()) -> Union[int, None]: # 変更
-		"""INSERT, UPDATE, DELETE クエリを実行し、lastrowid を返す"""
-		conn = None
-		try:
-			conn = DatabaseManager._get_connection()
-			cursor = conn.cursor()
-			cursor.execute(query, params)
-			conn.commit()
-			return cursor.lastrowid
-		except sqlite3.Error as e:
-			print(f"SQLiteクエリ実行中にエラーが発生しました: {query} - {e}")
-			if conn:
-				conn.rollback()
-			return None
-		finally:
-			if conn:
-				conn.close()
-
-	@staticmethod
-	async def fetch_one(query: str, params: tuple = ()) -> Union[dict, None]: # 変更
-		"""単一の結果を取得するクエリを実行し、辞書として返す"""
-		conn = None
-		try:
-			conn = DatabaseManager._get_connection()
-			cursor = conn.cursor()
-			cursor.execute(query, params)
-			row = cursor.fetchone()
-			return dict(row) if row else None
-		except sqlite3.Error as e:
-			print(f"SQLiteクエリ実行中にエラーが発生しました: {query} - {e}")
-			return None
-		finally:
-			if conn:
-				conn.close()
-
-	@staticmethod
-	async def fetch_all(query: str, params: tuple = ()) -> list[dict]: # list[dict] は変更不要
-		"""複数の結果を取得するクエリを実行し、辞書のリストとして返す"""
-		conn = None
-		try:
-			conn = DatabaseManager._get_connection()
-			cursor = conn.cursor()
-			cursor.execute(query, params)
-			rows = cursor.fetchall()
-			return [dict(row) for row in rows]
-		except sqlite3.Error as e:
-			print(f"SQLiteクエリ実行中にエラーが発生しました: {query} - {e}")
-			return []
-		finally:
-			if conn:
-				conn.close()
-
-	@staticmethod
-	async def get_setting(key: str) -> Union[str, None]:
-		"""指定されたキーの設定値を取得する"""
-		conn = None
-		try:
-			conn = DatabaseManager._get_connection()
-			cursor = conn.cursor()
-			cursor.execute("SELECT value FROM settings WHERE key = ?", (key,))
-			row = cursor.fetchone()
-			return row['value'] if row else None
-		except sqlite3.Error as e:
-			print(f"SQLite設定取得中にエラーが発生しました: {key} - {e}")
-			return None
-		finally:
-			if conn:
-				conn.close()
-
-	@staticmethod
-	async def set_setting(key: str, value: str):
-		"""設定値を保存または更新する"""
-		conn = None
-		try:
-			conn = DatabaseManager._get_connection()
-			cursor = conn.cursor()
-			cursor.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
-			conn.commit()
-		except sqlite3.Error as e:
-			print(f"SQLite設定保存中にエラーが発生しました: {key} - {e}")
-			if conn:
-				conn.rollback()
-		finally:
-			if conn:
-				conn.close()
\ No newline at end of file
+# application/model/database_manager.py
+import sqlite3
+import os
+from dotenv import load_dotenv # 環境変数をここで読み込む
+from typing import Any, Callable, Union # この行を追加
+
+from .migrations import LATEST_VERSION, get_schema_version, migrate
+from .sqlite_engine import SQLiteEngine, WriteTransaction
+
+# 環境変数をロード
+load_dotenv()
+
+# .envファイルからデータベースのファイルパスを取得（例: DB_NAME=mydatabase.db）
+DB_NAME = os.getenv('DB_NAME', 'recruits.db') # .envになければデフォルト値を使用
+
+class DatabaseManager:
+	"""
+	SQLiteデータベースへの接続と基本的な操作を管理するクラス。
+	非同期メソッドは SQLiteEngine を通じてイベントループの外で実行される。
+	"""
+	_engine = SQLiteEngine(DB_NAME)
+
+	@staticmethod
+	def _get_connection():
+		"""データベース接続を返す"""
+		try:
+			# sqlite3.connect はDBファイルへのパスを指定
+			conn = sqlite3.connect(DB_NAME)
+			# 結果を辞書形式で受け取るための設定
+			conn.row_factory = sqlite3.Row
+			return conn
+		except sqlite3.Error as err:
+			print(f"データベース接続エラー: {err}")
+			raise err
+
+	@staticmethod
+	def initialize_db() -> bool:
+		"""
+		未適用のスキーマ・マイグレーションを適用する。
+		スキーマが最新であれば PRAGMA user_version の確認のみで終了する。
+		"""
+		conn = None
+		try:
+			conn = DatabaseManager._get_connection()
+			current_version = get_schema_version(conn)
+			if current_version >= LATEST_VERSION:
+				return True
+			new_version = migrate(conn)
+			print(f"SQLiteデータベース '{DB_NAME}' のスキーマを v{current_version} から v{new_version} に更新しました。")
+			return True
+		except sqlite3.Error as e:
+			print(f"データベースの初期化中にエラーが発生しました: {e}")
+			return False
+		finally:
+			if conn:
+				conn.close()
+
+	@staticmethod
+	async def run_write(fn: Callable[[sqlite3.Connection], Any]) -> Any:
+		"""
+		書き込みスレッドで fn(conn) を1つのトランザクションとして実行する。
+		複数の文をまとめて原子的に実行したい場合に使用する。
+		"""
+		return await DatabaseManager._engine.write(fn)
+
+	@staticmethod
+	def transaction() -> WriteTransaction:
+		"""
+		複数の書き込みを1回のコミットにまとめるトランザクションを返す。
+		async with DatabaseManager.transaction() as tx: の中で、tx を渡した execute_query などを呼ぶ。
+		"""
+		return DatabaseManager._engine.transaction()
+
+	@staticmethod
+	async def run_read(fn: Callable[[sqlite3.Connection], Any]) -> Any:
+		"""読み取りコネクションで fn(conn) を実行する"""
+		return await DatabaseManager._engine.read(fn)
+
+	@staticmethod
+	def close():
+		"""非同期エンジンのスレッドとコネクションを終了する"""
+		DatabaseManager._engine.close()
+
+	@staticmethod
+	async def execute_query(query: str, params: tuple = (), tx: Union[WriteTransaction, None] = None) -> Union[int, None]: # 変更
+		"""
+		INSERT, UPDATE, DELETE クエリを実行し、lastrowid を返す。
+		tx を指定した場合はそのトランザクション内で実行し、ロールバックできるようエラーは呼び出し側に送出する。
+		"""
+		def _execute(conn: sqlite3.Connection):
+			return conn.execute(query, params).lastrowid
+		if tx is not None:
+			return await tx.run(_execute)
+		try:
+			return await DatabaseManager._engine.write(_execute)
+		except sqlite3.Error as e:
+			print(f"SQLiteクエリ実行中にエラーが発生しました: {query} - {e}")
+			return None
+
+	@staticmethod
+	async def fetch_one(query: str, params: tuple = ()) -> Union[dict, None]: # 変更
+		"""単一の結果を取得するクエリを実行し、辞書として返す"""
+		def _fetch(conn: sqlite3.Connection):
+			row = conn.execute(query, params).fetchone()
+			return dict(row) if row else None
+		try:
+			return await DatabaseManager._engine.read(_fetch)
+		except sqlite3.Error as e:
+			print(f"SQLiteクエリ実行中にエラーが発生しました: {query} - {e}")
+			return None
+
+	@staticmethod
+	async def fetch_all(query: str, params: tuple = ()) -> list[dict]: # list[dict] は変更不要
+		"""複数の結果を取得するクエリを実行し、辞書のリストとして返す"""
+		def _fetch(conn: sqlite3.Connection):
+			return [dict(row) for row in conn.execute(query, params).fetchall()]
+		try:
+			return await DatabaseManager._engine.read(_fetch)
+		except sqlite3.Error as e:
+			print(f"SQLiteクエリ実行中にエラーが発生しました: {query} - {e}")
+			return []
+
+	@staticmethod
+	async def get_setting(key: str) -> Union[str, None]:
+		"""指定されたキーの設定値を取得する"""
+		def _fetch(conn: sqlite3.Connection):
+			row = conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+			return row['value'] if row else None
+		try:
+			return await DatabaseManager._engine.read(_fetch)
+		except sqlite3.Error as e:
+			print(f"SQLite設定取得中にエラーが発生しました: {key} - {e}")
+			return None
+
+	@staticmethod
+	async def set_setting(key: str, value: str):
+		"""設定値を保存または更新する"""
+		def _execute(conn: sqlite3.Connection):
+			conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
+		try:
+			await DatabaseManager._engine.write(_execute)
+		except sqlite3.Error as e:
+			print(f"SQLite設定保存中にエラーが発生しました: {key} - {e}")
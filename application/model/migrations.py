@@ -0,0 +1,340 @@
+# application/model/migrations.py
+import sqlite3
+from typing import Callable
+
+
+def _m001_base_schema(cursor: sqlite3.Cursor):
+	"""recruits / settings テーブルを作成し、古いDBに不足しているカラムを追加する"""
+	cursor.execute("""
+		CREATE TABLE IF NOT EXISTS recruits (
+			id INTEGER PRIMARY KEY AUTOINCREMENT,
+			date_s TEXT NOT NULL,
+			place TEXT NOT NULL,
+			max_people INTEGER NOT NULL,
+			note TEXT,
+			thread_id INTEGER NOT NULL,
+			msg_id INTEGER,
+			participants TEXT DEFAULT '[]',
+			is_deleted INTEGER DEFAULT 0,
+			message TEXT,
+			mentor_needed INTEGER DEFAULT 0,
+			industry TEXT,
+			author_id INTEGER,
+			mentors TEXT DEFAULT '[]',
+			notification_sent INTEGER DEFAULT 0
+		)
+	""")
+
+	# 以前の initialize_db で作られたテーブルには不足カラムがあるため追加する
+	cursor.execute("PRAGMA table_info(recruits)")
+	columns = {row[1] for row in cursor.fetchall()}
+	for name, definition in (
+		('is_deleted', "INTEGER DEFAULT 0"),
+		('message', "TEXT"),
+		('mentor_needed', "INTEGER DEFAULT 0"),
+		('industry', "TEXT"),
+		('author_id', "INTEGER"),
+		('mentors', "TEXT DEFAULT '[]'"),
+		('notification_sent', "INTEGER DEFAULT 0"),
+	):
+		if name not in columns:
+			cursor.execute(f"ALTER TABLE recruits ADD COLUMN {name} {definition}")
+
+	cursor.execute("""
+		CREATE TABLE IF NOT EXISTS settings (
+			key TEXT PRIMARY KEY,
+			value TEXT
+		)
+	""")
+
+
+def _m002_recruit_members(cursor: sqlite3.Cursor):
+	"""参加者・メンターを1行1人で保持する正規化テーブルを作成し、JSONカラムから移行する"""
+	cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'recruit_members'")
+	members_table_exists = cursor.fetchone() is not None
+	cursor.execute("""
+		CREATE TABLE IF NOT EXISTS recruit_members (
+			recruit_id INTEGER NOT NULL,
+			user_id INTEGER NOT NULL,
+			role TEXT NOT NULL CHECK (role IN ('participant', 'mentor')),
+			joined_at INTEGER NOT NULL,
+			PRIMARY KEY (recruit_id, user_id)
+		)
+	""")
+	cursor.execute("CREATE INDEX IF NOT EXISTS idx_recruit_members_role ON recruit_members (recruit_id, role)")
+	cursor.execute("CREATE INDEX IF NOT EXISTS idx_recruit_members_user ON recruit_members (user_id)")
+
+	# 初回作成時のみ、既存のJSONカラムから参加者・メンターを移行する（同期トリガー作成前に行う）
+	if not members_table_exists:
+		for column, role in (("participants", "participant"), ("mentors", "mentor")):
+			cursor.execute(f"""
+				INSERT OR IGNORE INTO recruit_members (recruit_id, user_id, role, joined_at)
+				SELECT r.id, CAST(j.value AS INTEGER), '{role}', CAST(strftime('%s', 'now') AS INTEGER)
+				FROM recruits r, json_each(CASE WHEN json_valid(r.{column}) THEN r.{column} ELSE '[]' END) j
+				WHERE j.type IN ('integer', 'text')
+				ORDER BY r.id, j.key
+			""")
+
+	# 管理画面は participants / mentors のJSONカラムを参照するため、トリガーで同期を保つ
+	for event, ref in (("INSERT", "NEW"), ("DELETE", "OLD")):
+		cursor.execute(f"""
+			CREATE TRIGGER IF NOT EXISTS trg_recruit_members_{event.lower()}
+			AFTER {event} ON recruit_members
+			BEGIN
+				UPDATE recruits SET
+					participants = (
+						SELECT json_group_array(user_id) FROM (
+							SELECT user_id FROM recruit_members
+							WHERE recruit_id = {ref}.recruit_id AND role = 'participant'
+							ORDER BY joined_at, rowid
+						)
+					),
+					mentors = (
+						SELECT json_group_array(user_id) FROM (
+							SELECT user_id FROM recruit_members
+							WHERE recruit_id = {ref}.recruit_id AND role = 'mentor'
+							ORDER BY joined_at, rowid
+						)
+					)
+				WHERE id = {ref}.recruit_id;
+			END
+		""")
+
+
+def _m003_recruit_indexes(cursor: sqlite3.Cursor):
+	"""定期チェックやメッセージ検索で使うインデックスを作成する"""
+	# date_s は "YYYY/MM/DD HH:MM" 形式のため、文字列順がそのまま日時順になる
+	cursor.execute("CREATE INDEX IF NOT EXISTS idx_recruits_active ON recruits (is_deleted, date_s)")
+	cursor.execute("CREATE INDEX IF NOT EXISTS idx_recruits_notification ON recruits (notification_sent, date_s)")
+	cursor.execute("CREATE INDEX IF NOT EXISTS idx_recruits_msg_id ON recruits (msg_id)")
+
+
+def _m004_starts_at(cursor: sqlite3.Cursor):
+	"""開始日時をUNIX時刻で保持する starts_at カラムを追加し、date_s から埋める"""
+	# date_s は日本時間のため、UTCとして解釈した値から9時間を引く（日本に夏時間はない）
+	starts_at_expr = "CAST(strftime('%s', replace({ref}.date_s, '/', '-')) AS INTEGER) - 32400"
+
+	cursor.execute("ALTER TABLE recruits ADD COLUMN starts_at INTEGER")
+	cursor.execute(f"UPDATE recruits SET starts_at = {starts_at_expr.format(ref='recruits')}")
+	cursor.execute("CREATE INDEX IF NOT EXISTS idx_recruits_starts_at ON recruits (is_deleted, starts_at)")
+	cursor.execute("CREATE INDEX IF NOT EXISTS idx_recruits_notification_starts_at ON recruits (notification_sent, starts_at)")
+	# starts_at に置き換わった date_s のインデックスは不要
+	cursor.execute("DROP INDEX IF EXISTS idx_recruits_active")
+	cursor.execute("DROP INDEX IF EXISTS idx_recruits_notification")
+
+	# 管理画面など starts_at を知らない書き込み元のために、date_s から補完する
+	cursor.execute(f"""
+		CREATE TRIGGER IF NOT EXISTS trg_recruits_starts_at_insert
+		AFTER INSERT ON recruits
+		WHEN NEW.starts_at IS NULL
+		BEGIN
+			UPDATE recruits SET starts_at = {starts_at_expr.format(ref='NEW')} WHERE id = NEW.id;
+		END
+	""")
+	cursor.execute(f"""
+		CREATE TRIGGER IF NOT EXISTS trg_recruits_starts_at_update
+		AFTER UPDATE OF date_s ON recruits
+		WHEN NEW.starts_at IS OLD.starts_at
+		BEGIN
+			UPDATE recruits SET starts_at = {starts_at_expr.format(ref='NEW')} WHERE id = NEW.id;
+		END
+	""")
+
+
+def _m005_lifecycle_state(cursor: sqlite3.Cursor):
+	"""募集のライフサイクル状態 (active → expired → finalized) と finalized_at を追加する"""
+	cursor.execute("ALTER TABLE recruits ADD COLUMN state TEXT NOT NULL DEFAULT 'active'")
+	cursor.execute("ALTER TABLE recruits ADD COLUMN finalized_at INTEGER")
+	# 既に終了している募集は、終了表示を1回だけ描画するため expired にしておく
+	cursor.execute("""
+		UPDATE recruits SET state = 'expired'
+		WHERE is_deleted = 0 AND starts_at < CAST(strftime('%s', 'now') AS INTEGER) - 3600
+	""")
+	cursor.execute("CREATE INDEX IF NOT EXISTS idx_recruits_state ON recruits (state, starts_at)")
+
+	# 日時が未来に変更された募集は再び active に戻す
+	cursor.execute("""
+		CREATE TRIGGER IF NOT EXISTS trg_recruits_reactivate
+		AFTER UPDATE OF starts_at ON recruits
+		WHEN NEW.state <> 'active' AND NEW.starts_at >= CAST(strftime('%s', 'now') AS INTEGER) - 3600
+		BEGIN
+			UPDATE recruits SET state = 'active', finalized_at = NULL WHERE id = NEW.id;
+		END
+	""")
+
+
+def _m006_render_hash(cursor: sqlite3.Cursor):
+	"""投稿済みメッセージの描画内容のハッシュを保持する render_hash カラムを追加する"""
+	cursor.execute("ALTER TABLE recruits ADD COLUMN render_hash TEXT")
+
+
+def _m007_reminder_outbox(cursor: sqlite3.Cursor):
+	"""通知DMを宛先ごとに1行で保持する送信待ちテーブル (reminder_outbox) を作成する"""
+	cursor.execute("""
+		CREATE TABLE IF NOT EXISTS reminder_outbox (
+			id INTEGER PRIMARY KEY AUTOINCREMENT,
+			recruit_id INTEGER NOT NULL,
+			user_id INTEGER NOT NULL,
+			message TEXT NOT NULL,
+			status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'sent', 'failed', 'cancelled', 'expired')),
+			attempts INTEGER NOT NULL DEFAULT 0,
+			next_attempt_at INTEGER NOT NULL,
+			last_error TEXT,
+			created_at INTEGER NOT NULL,
+			updated_at INTEGER NOT NULL,
+			UNIQUE (recruit_id, user_id)
+		)
+	""")
+	cursor.execute("CREATE INDEX IF NOT EXISTS idx_reminder_outbox_due ON reminder_outbox (status, next_attempt_at)")
+
+
+def _m008_settings_version(cursor: sqlite3.Cursor):
+	"""
+	settings の変更回数を1行で保持する settings_version テーブルと、それを更新するトリガーを作成する。
+	管理画面など別プロセスからの変更も、この1行を読むだけで検知できる。
+	"""
+	cursor.execute("""
+		CREATE TABLE IF NOT EXISTS settings_version (
+			id INTEGER PRIMARY KEY CHECK (id = 1),
+			version INTEGER NOT NULL
+		)
+	""")
+	cursor.execute("INSERT OR IGNORE INTO settings_version (id, version) VALUES (1, 0)")
+	for event in ('INSERT', 'UPDATE', 'DELETE'):
+		cursor.execute(f"""
+			CREATE TRIGGER IF NOT EXISTS trg_settings_version_{event.lower()} AFTER {event} ON settings
+			BEGIN
+				UPDATE settings_version SET version = version + 1 WHERE id = 1;
+			END
+		""")
+
+
+def _m009_recruit_changes(cursor: sqlite3.Cursor):
+	"""
+	recruits への変更を連番で記録する recruit_changes テーブルと、それに追記するトリガーを作成する。
+	管理画面からの編集・削除もボットがこのテーブルを読むことで検知し、変更された募集だけを再描画する。
+	"""
+	cursor.execute("""
+		CREATE TABLE IF NOT EXISTS recruit_changes (
+			seq INTEGER PRIMARY KEY AUTOINCREMENT,
+			recruit_id INTEGER NOT NULL,
+			op TEXT NOT NULL CHECK (op IN ('insert', 'update', 'delete')),
+			msg_id INTEGER,
+			changed_at INTEGER NOT NULL
+		)
+	""")
+	# UPDATE は管理画面で編集される列だけを対象にする。描画結果 (msg_id, render_hash)・状態遷移のほか、
+	# participants / mentors（参加・取り消しのたびに recruit_members のトリガーが書き換える）、
+	# thread_id・is_deleted（スレッド作成・削除時）など、ボット自身が書き込んで反映済みの列は対象外にする。
+	# 管理画面での参加者の編集は日時などの列と同じ UPDATE で行われるため、これで検知できる
+	for event, ref, columns in (
+		("INSERT", "NEW", ""),
+		("UPDATE", "NEW", " OF date_s, place, max_people, message, mentor_needed, industry, note, author_id"),
+		("DELETE", "OLD", ""),
+	):
+		cursor.execute(f"""
+			CREATE TRIGGER IF NOT EXISTS trg_recruit_changes_{event.lower()}
+			AFTER {event}{columns} ON recruits
+			BEGIN
+				INSERT INTO recruit_changes (recruit_id, op, msg_id, changed_at)
+				VALUES ({ref}.id, '{event.lower()}', {ref}.msg_id, CAST(strftime('%s', 'now') AS INTEGER));
+			END
+		""")
+
+
+def _m010_thread_archived_at(cursor: sqlite3.Cursor):
+	"""終了・削除された募集のスレッドをアーカイブした時刻を保持する thread_archived_at カラムを追加する"""
+	cursor.execute("ALTER TABLE recruits ADD COLUMN thread_archived_at INTEGER")
+	cursor.execute("""
+		CREATE INDEX IF NOT EXISTS idx_recruits_thread_archive ON recruits (state, is_deleted)
+		WHERE thread_archived_at IS NULL
+	""")
+
+
+def _m011_archive_posts(cursor: sqlite3.Cursor):
+	"""
+	終了した募集を日・週ごとにまとめたアーカイブ投稿 (archive_posts) と、
+	募集からアーカイブ投稿への対応を保持する recruits.archive_post_id を追加する。
+	"""
+	cursor.execute("""
+		CREATE TABLE IF NOT EXISTS archive_posts (
+			id INTEGER PRIMARY KEY AUTOINCREMENT,
+			period TEXT NOT NULL CHECK (period IN ('day', 'week')),
+			period_start INTEGER NOT NULL,
+			msg_id INTEGER,
+			revision INTEGER NOT NULL DEFAULT 1,
+			rendered_revision INTEGER NOT NULL DEFAULT 0,
+			created_at INTEGER NOT NULL,
+			updated_at INTEGER NOT NULL,
+			UNIQUE (period, period_start)
+		)
+	""")
+	cursor.execute("ALTER TABLE recruits ADD COLUMN archive_post_id INTEGER REFERENCES archive_posts (id)")
+	cursor.execute("CREATE INDEX IF NOT EXISTS idx_recruits_archive_post ON recruits (archive_post_id)")
+	# 内容が変わるたびに revision を増やし、描画した revision を rendered_revision に記録する
+	# 日時が未来に変更されて再び表示される募集は、アーカイブから外して通常のメッセージとして投稿し直す
+	cursor.execute("""
+		CREATE TRIGGER IF NOT EXISTS trg_recruits_unarchive
+		AFTER UPDATE OF state ON recruits
+		WHEN NEW.state = 'active' AND NEW.archive_post_id IS NOT NULL
+		BEGIN
+			UPDATE archive_posts SET revision = revision + 1 WHERE id = NEW.archive_post_id;
+			UPDATE recruits SET archive_post_id = NULL WHERE id = NEW.id;
+		END
+	""")
+
+
+# (バージョン, 説明, 適用処理) のリスト。バージョンは1から連番で追加していくこと。
+MIGRATIONS: list[tuple[int, str, Callable[[sqlite3.Cursor], None]]] = [
+	(1, "recruits / settings テーブルの作成", _m001_base_schema),
+	(2, "recruit_members テーブルの作成と移行", _m002_recruit_members),
+	(3, "recruits のインデックス作成", _m003_recruit_indexes),
+	(4, "recruits.starts_at の追加", _m004_starts_at),
+	(5, "recruits.state / finalized_at の追加", _m005_lifecycle_state),
+	(6, "recruits.render_hash の追加", _m006_render_hash),
+	(7, "reminder_outbox テーブルの作成", _m007_reminder_outbox),
+	(8, "settings_version の追加", _m008_settings_version),
+	(9, "recruit_changes の追加", _m009_recruit_changes),
+	(10, "recruits.thread_archived_at の追加", _m010_thread_archived_at),
+	(11, "archive_posts の追加", _m011_archive_posts),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+	"""PRAGMA user_version に記録されたスキーマのバージョンを返す"""
+	return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+	"""
+	未適用のマイグレーションを順に適用し、適用後のバージョンを返す。
+	各ステップはバージョン番号の更新と同じトランザクションで実行されるため、
+	途中で失敗してもそのステップ以前の状態に戻る。
+	"""
+	version = get_schema_version(conn)
+	if version >= LATEST_VERSION:
+		return version
+
+	isolation_level = conn.isolation_level
+	conn.isolation_level = None # BEGIN / COMMIT を明示的に制御する
+	try:
+		for step_version, description, apply in MIGRATIONS:
+			if step_version <= version:
+				continue
+			cursor = conn.cursor()
+			cursor.execute("BEGIN IMMEDIATE")
+			try:
+				apply(cursor)
+				cursor.execute(f"PRAGMA user_version = {step_version}")
+				cursor.execute("COMMIT")
+			except BaseException:
+				if conn.in_transaction:
+					cursor.execute("ROLLBACK")
+				raise
+			version = step_version
+			print(f"マイグレーション {step_version} を適用しました: {description}")
+	finally:
+		conn.isolation_level = isolation_level
+	return version
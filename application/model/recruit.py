@@ -1,75 +1,181 @@
 # application/model/recruit.py
-import json
+import sqlite3
+import time
 import discord
 from typing import Union
-from datetime import datetime, timedelta
-import pytz
+from datetime import datetime
 
 from .database_manager import DatabaseManager
+from .sqlite_engine import WriteTransaction
+from application.library.helper import JST, date_s_to_epoch
+
+# recruit_members.role の値
+ROLE_PARTICIPANT = 'participant'
+ROLE_MENTOR = 'mentor'
+
+# RecruitModel.join_recruit の結果
+JOIN_OK = 'joined'
+JOIN_FULL = 'full'
+JOIN_ALREADY_PARTICIPANT = 'already_participant'
+JOIN_ALREADY_MENTOR = 'already_mentor'
+JOIN_NOT_FOUND = 'not_found'
+JOIN_ERROR = 'error'
+
+# 開始時刻からこの秒数が経過した募集を終了とみなす
+EXPIRY_GRACE_SECONDS = 60 * 60
+
+# スレッドの作成前に保存された募集の thread_id（作成後に実際のスレッドIDで更新される）
+THREAD_PENDING = 0
+
+# recruits.state の値 (active → expired → finalized の順に遷移する)
+STATE_ACTIVE = 'active'
+STATE_EXPIRED = 'expired'
+STATE_FINALIZED = 'finalized'
+
+# RecruitModel.bulk_update で更新できる列
+BULK_UPDATABLE_COLUMNS = frozenset({'msg_id', 'render_hash', 'notification_sent', 'is_deleted', 'state', 'finalized_at', 'thread_archived_at', 'archive_post_id'})
 
 class Recruit:
 	"""
 	GD募集の情報を保持するデータクラス。
+	DBの1行から from_row() で生成し、参加者・メンターはユーザーIDのタプルで保持する。
+	生成後は変更せず、値を変える場合は replace() で新しいオブジェクトを作る。
+	開始日時の datetime やメンバーIDの集合などの派生値は、初回の参照時に1回だけ計算する。
 	"""
-	def __init__(self, rid: int, date_s: str, place: str, cap: int, message: str, mentor_needed: bool, industry: str,
-					thread_id: int,
-					author: Union[discord.Member, None],
-					msg_id: Union[int, None] = None, 
-					participants: Union[list[discord.Member], None] = None,
-					mentors: Union[list[discord.Member], None] = None,
-					is_deleted: bool = False):
-		self.id = rid
-		self.date_str = date_s
+	__slots__ = (
+		'id', 'date_s', 'starts_at', 'place', 'max_people', 'message', 'mentor_needed', 'industry', 'note',
+		'thread_id', 'msg_id', 'author_id', 'participants', 'mentors',
+		'is_deleted', 'notification_sent', 'state', 'finalized_at', 'render_hash', 'archive_post_id',
+		'_start_time', '_member_ids',
+	)
+
+	def __init__(self, id: int, date_s: str, starts_at: Union[int, None], place: str, max_people: int,
+					message: Union[str, None] = None, mentor_needed: bool = False, industry: Union[str, None] = None,
+					note: Union[str, None] = None, thread_id: Union[int, None] = None, msg_id: Union[int, None] = None,
+					author_id: Union[int, None] = None, participants: tuple[int, ...] = (), mentors: tuple[int, ...] = (),
+					is_deleted: bool = False, notification_sent: bool = False, state: str = STATE_ACTIVE,
+					finalized_at: Union[int, None] = None, render_hash: Union[str, None] = None,
+					archive_post_id: Union[int, None] = None):
+		self.id = id
+		self.date_s = date_s
+		self.starts_at = starts_at
 		self.place = place
-		self.max_people = cap
+		self.max_people = max_people
 		self.message = message
 		self.mentor_needed = mentor_needed
 		self.industry = industry
-		self.participants: list[discord.Member] = participants if participants is not None else []
-		self.mentors: list[discord.Member] = mentors if mentors is not None else []
+		self.note = note
 		self.thread_id = thread_id
 		self.msg_id = msg_id
-		self.author = author
+		self.author_id = author_id
+		self.participants = tuple(participants)
+		self.mentors = tuple(mentors)
 		self.is_deleted = is_deleted
+		self.notification_sent = notification_sent
+		self.state = state
+		self.finalized_at = finalized_at
+		self.render_hash = render_hash
+		self.archive_post_id = archive_post_id
+		self._start_time = None
+		self._member_ids = None
+
+	@classmethod
+	def from_row(cls, row, participants: tuple[int, ...] = (), mentors: tuple[int, ...] = ()) -> 'Recruit':
+		"""recruits テーブルの1行（sqlite3.Row または dict）と参加者・メンターのIDから生成する"""
+		keys = row.keys()
+		starts_at = row['starts_at'] if 'starts_at' in keys else None
+		return cls(
+			id=row['id'],
+			date_s=row['date_s'],
+			# starts_at が未設定の古い行は date_s から求める
+			starts_at=starts_at if starts_at is not None else date_s_to_epoch(row['date_s']),
+			place=row['place'],
+			max_people=row['max_people'],
+			message=row['message'],
+			mentor_needed=bool(row['mentor_needed']),
+			industry=row['industry'],
+			note=row['note'],
+			thread_id=row['thread_id'],
+			msg_id=row['msg_id'],
+			author_id=row['author_id'],
+			participants=participants,
+			mentors=mentors,
+			is_deleted=bool(row['is_deleted']),
+			notification_sent=bool(row['notification_sent']),
+			state=row['state'] if 'state' in keys else STATE_ACTIVE,
+			finalized_at=row['finalized_at'] if 'finalized_at' in keys else None,
+			render_hash=row['render_hash'] if 'render_hash' in keys else None,
+			archive_post_id=row['archive_post_id'] if 'archive_post_id' in keys else None,
+		)
+
+	def replace(self, **changes) -> 'Recruit':
+		"""指定した値だけを変えた新しい Recruit を返す"""
+		values = {name: getattr(self, name) for name in self.__slots__ if not name.startswith('_')}
+		values.update(changes)
+		return Recruit(**values)
+
+	def __repr__(self) -> str:
+		return f"<Recruit id={self.id} date_s={self.date_s!r} state={self.state!r} is_deleted={self.is_deleted}>"
+
+	@property
+	def start_time(self) -> Union[datetime, None]:
+		"""開始日時（日本時間のタイムゾーン付き）。日時が不正な場合は None"""
+		if self._start_time is None and self.starts_at is not None:
+			self._start_time = datetime.fromtimestamp(self.starts_at, JST)
+		return self._start_time
+
+	@property
+	def expires_at(self) -> Union[int, None]:
+		"""募集が終了扱いになるUNIX時刻（開始から EXPIRY_GRACE_SECONDS 後）"""
+		return self.starts_at + EXPIRY_GRACE_SECONDS if self.starts_at is not None else None
+
+	@property
+	def member_ids(self) -> frozenset[int]:
+		"""参加者・メンター全員のユーザーIDの集合"""
+		if self._member_ids is None:
+			self._member_ids = frozenset(self.participants + self.mentors)
+		return self._member_ids
 
 	def is_full(self) -> bool:
 		return len(self.participants) >= self.max_people
 
-	def is_joined(self, u: discord.Member) -> bool:
-		is_participant = any(p.id == u.id for p in self.participants)
-		is_mentor = any(m.id == u.id for m in self.mentors)
-		return u and (is_participant or is_mentor)
+	def is_joined(self, user_id: int) -> bool:
+		return user_id in self.member_ids
 
-	def is_expired(self) -> bool:
-		try:
-			jst = pytz.timezone('Asia/Tokyo')
-			recruit_datetime_naive = datetime.strptime(self.date_str, "%Y/%m/%d %H:%M")
-			recruit_datetime = jst.localize(recruit_datetime_naive)
-			now_jst = datetime.now(jst)
-			return recruit_datetime < now_jst - timedelta(hours=1)
-		except (ValueError, pytz.UnknownTimeZoneError):
+	@property
+	def has_thread(self) -> bool:
+		"""スレッドが作成済みか（作成前の thread_id は THREAD_PENDING）"""
+		return bool(self.thread_id) and self.thread_id != THREAD_PENDING
+
+	def is_expired(self, now: Union[float, None] = None) -> bool:
+		if self.starts_at is None:
 			return True # 日付形式が不正な場合は終了と見なす
+		return self.expires_at < (time.time() if now is None else now)
 
-	def block(self) -> str:
-		"""募集情報を整形して表示用の文字列を生成する"""
+	def block(self, members: dict[int, discord.Member], now: Union[float, None] = None) -> str:
+		"""
+		募集情報を整形して表示用の文字列を生成する。
+		members には参加者・メンター・募集者のユーザーIDとメンバーの対応を渡す（見つからないIDは表示しない）。
+		"""
 		filled_slots = len(self.participants)
-		empty_slots = self.max_people - filled_slots
+		empty_slots = max(self.max_people - filled_slots, 0)
 		slot_emojis = '🧑' * filled_slots + '・' * empty_slots
+		author = members.get(self.author_id) if self.author_id else None
 		
 		state_label = ""
 		if self.is_deleted:
 			state_label = "【削除】"
-		elif self.is_expired():
+		elif self.is_expired(now):
 			state_label = "【終了】"
 
 		# 終了または削除された募集の表示
 		if state_label:
-			header_line = f"{state_label}📅 {self.date_str}"
+			header_line = f"{state_label}📅 {self.date_s}"
 			info_lines = []
 			info_lines.append(f"({filled_slots}/{self.max_people}名)")
 			info_lines.append("-----------------------------")
-			if self.author:
-				info_lines.append(f"👤 募集者：{self.author.display_name}")
+			if author:
+				info_lines.append(f"👤 募集者：{author.display_name}")
 			else:
 				info_lines.append(f"👤 募集者：不明なユーザー")
 			info_lines.append("-----------------------------")
@@ -83,12 +189,12 @@ class Recruit:
 			return f"> {header_line}\n{info_block}"
 		
 		# 通常の募集の表示
-		header_line = f"# 📅 {self.date_str}"
+		header_line = f"# 📅 {self.date_s}"
 		info_lines = []
 		info_lines.append(f"({filled_slots}/{self.max_people}名)  [{slot_emojis}]")
 		info_lines.append("-----------------------------")
-		if self.author:
-			info_lines.append(f"👤 募集者：{self.author.display_name}")
+		if author:
+			info_lines.append(f"👤 募集者：{author.display_name}")
 		else:
 			info_lines.append(f"👤 募集者：不明なユーザー")
 		info_lines.append("-----------------------------")
@@ -106,16 +212,28 @@ class Recruit:
 		
 		info_lines.append("🟡 満員" if self.is_full() else "⬜ 募集中")
 		
-		participants_text = ", ".join(p.display_name for p in self.participants) if self.participants else "なし"
+		participant_names = [members[user_id].display_name for user_id in self.participants if user_id in members]
+		participants_text = ", ".join(participant_names) if participant_names else "なし"
 		info_lines.append(f"👥 参加者：{participants_text}")
 
-		mentors_text = ", ".join(m.display_name for m in self.mentors) if self.mentors else "なし"
+		mentor_names = [members[user_id].display_name for user_id in self.mentors if user_id in members]
+		mentors_text = ", ".join(mentor_names) if mentor_names else "なし"
 		info_lines.append(f"🤝 メンター：{mentors_text}")
 		
 		info_block = "```\n" + "\n".join(info_lines) + "\n```"
 
 		return f"{header_line}\n{info_block}"
 
+	def archive_line(self) -> str:
+		"""アーカイブ投稿に載せる1行の要約を返す"""
+		start_time = self.start_time
+		line = f"- {start_time.strftime('%H:%M') if start_time else self.date_s}　{self.place}（{len(self.participants)}/{self.max_people}名）"
+		if self.industry:
+			line += f"　🏢{self.industry}"
+		if self.has_thread:
+			line += f"　<#{self.thread_id}>"
+		return line
+
 
 class RecruitModel:
 	"""
@@ -128,73 +246,335 @@ class RecruitModel:
 		from .database_manager import DatabaseManager
 		return await DatabaseManager.get_setting(key)
 
-	async def add_recruit(self, date_s: str, place: str, max_people: int, message: str, mentor_needed: bool, industry: str, thread_id: int, author_id: int, participants: list[int]) -> Union[int, None]:
+	async def set_setting(self, key: str, value: str):
+		await DatabaseManager.set_setting(key, value)
+
+	def transaction(self) -> WriteTransaction:
+		"""
+		複数の書き込みを1回のコミットにまとめるトランザクションを返す。
+		tx を受け取るメソッド（mark_as_deleted など）に渡すと、同じトランザクション内で実行される。
+		"""
+		return DatabaseManager.transaction()
+
+	async def add_recruit(self, date_s: str, place: str, max_people: int, message: str, mentor_needed: bool, industry: str, thread_id: int, author_id: int, participants: list[int]) -> Union[Recruit, None]:
+		"""募集を保存し、保存した募集を返す（INSERT ... RETURNING で取得するため読み直しは不要）"""
 		query = """
-			INSERT INTO recruits (date_s, place, max_people, message, mentor_needed, industry, thread_id, author_id, participants, mentors)
-			VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+			INSERT INTO recruits (date_s, starts_at, place, max_people, message, mentor_needed, industry, thread_id, author_id)
+			VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+			RETURNING *
 		"""
-		participants_json = json.dumps(participants)
-		mentors_json = json.dumps([]) # 新規作成時はメンターは空
-		recruit_id = await DatabaseManager.execute_query(
-			query, (date_s, place, max_people, message, int(mentor_needed), industry, thread_id, author_id, participants_json, mentors_json)
-		)
-		return recruit_id
+		starts_at = date_s_to_epoch(date_s)
+		participants = tuple(dict.fromkeys(participants))
+		def _insert(conn: sqlite3.Connection) -> Recruit:
+			row = conn.execute(
+				query, (date_s, starts_at, place, max_people, message, int(mentor_needed), industry, thread_id, author_id)
+			).fetchone()
+			joined_at = int(time.time())
+			conn.executemany(
+				"INSERT OR IGNORE INTO recruit_members (recruit_id, user_id, role, joined_at) VALUES (?, ?, ?, ?)",
+				[(row['id'], user_id, ROLE_PARTICIPANT, joined_at) for user_id in participants]
+			)
+			return Recruit.from_row(row, participants=participants)
+		try:
+			return await DatabaseManager.run_write(_insert)
+		except sqlite3.Error as e:
+			print(f"募集の保存中にエラーが発生しました: {e}")
+			return None
 
 	async def update_recruit(self, recruit_id: int, data: dict):
 		"""指定されたIDの募集データを更新する"""
 		query = """
-			UPDATE recruits SET date_s = ?, place = ?, max_people = ?, message = ?, mentor_needed = ?, industry = ? WHERE id = ?
+			UPDATE recruits SET date_s = ?, starts_at = ?, place = ?, max_people = ?, message = ?, mentor_needed = ?, industry = ?,
+				notification_sent = CASE WHEN starts_at IS ? THEN notification_sent ELSE 0 END
+			WHERE id = ?
 		"""
+		# 日時が変わった場合は、新しい日時で改めて通知できるよう通知フラグを戻す
+		starts_at = date_s_to_epoch(data['date_s'])
 		await DatabaseManager.execute_query(
-			query, (data['date_s'], data['place'], data['max_people'], data['message'], int(data['mentor_needed']), data['industry'], recruit_id)
+			query, (data['date_s'], starts_at, data['place'], data['max_people'], data['message'], int(data['mentor_needed']), data['industry'], starts_at, recruit_id)
 		)
 
-	async def get_all_recruits(self) -> list[dict]:
-		query = "SELECT * FROM recruits ORDER BY id ASC"
-		rows = await DatabaseManager.fetch_all(query)
+	@staticmethod
+	def _to_recruits(conn: sqlite3.Connection, rows: list[sqlite3.Row], all_rows: bool = False) -> list[Recruit]:
+		"""
+		recruit_members から参加者・メンターのIDを読み込み、各行を Recruit に変換する。
+		all_rows=True の場合は対象を絞らずに全メンバーを1回で読み込む。
+		"""
+		members: dict[int, dict[str, list[int]]] = {}
+		if all_rows:
+			cursor = conn.execute("SELECT recruit_id, user_id, role FROM recruit_members ORDER BY joined_at, rowid")
+		elif rows:
+			recruit_ids = [row['id'] for row in rows]
+			placeholders = ", ".join("?" * len(recruit_ids))
+			cursor = conn.execute(
+				f"SELECT recruit_id, user_id, role FROM recruit_members WHERE recruit_id IN ({placeholders}) ORDER BY joined_at, rowid",
+				recruit_ids
+			)
+		else:
+			return []
+		for member in cursor:
+			roles = members.setdefault(member['recruit_id'], {ROLE_PARTICIPANT: [], ROLE_MENTOR: []})
+			roles[member['role']].append(member['user_id'])
+
+		empty = {ROLE_PARTICIPANT: [], ROLE_MENTOR: []}
+		recruits = []
 		for row in rows:
-			row['participants'] = json.loads(row['participants']) if row['participants'] else []
-			row['mentors'] = json.loads(row.get('mentors', '[]')) if row.get('mentors') else []
-			row['mentor_needed'] = bool(row.get('mentor_needed'))
-			row['notification_sent'] = bool(row.get('notification_sent', 0))
-			row['is_deleted'] = bool(row.get('is_deleted', 0))
-		return rows
-
-	async def get_recruit_by_id(self, recruit_id: int) -> Union[dict, None]:
-		query = "SELECT * FROM recruits WHERE id = ?"
-		row = await DatabaseManager.fetch_one(query, (recruit_id,))
-		if row:
-			row['participants'] = json.loads(row['participants']) if row['participants'] else []
-			row['mentors'] = json.loads(row.get('mentors', '[]')) if row.get('mentors') else []
-			row['mentor_needed'] = bool(row.get('mentor_needed'))
-			row['notification_sent'] = bool(row.get('notification_sent', 0))
-			row['is_deleted'] = bool(row.get('is_deleted', 0))
-		return row
-
-	async def update_recruit_participants(self, recruit_id: int, participants_list: list[int]):
-		query = "UPDATE recruits SET participants = ? WHERE id = ?"
-		participants_json = json.dumps(participants_list)
-		await DatabaseManager.execute_query(query, (participants_json, recruit_id))
-
-	async def update_recruit_mentors(self, recruit_id: int, mentors_list: list[int]):
-		query = "UPDATE recruits SET mentors = ? WHERE id = ?"
-		mentors_json = json.dumps(mentors_list)
-		await DatabaseManager.execute_query(query, (mentors_json, recruit_id))
-
-	async def update_recruit_message_id(self, recruit_id: int, message_id: int):
-		query = "UPDATE recruits SET msg_id = ? WHERE id = ?"
-		await DatabaseManager.execute_query(query, (message_id, recruit_id))
+			roles = members.get(row['id'], empty)
+			recruits.append(Recruit.from_row(row, tuple(roles[ROLE_PARTICIPANT]), tuple(roles[ROLE_MENTOR])))
+		return recruits
+
+	async def get_all_recruits(self) -> list[Recruit]:
+		def _fetch(conn: sqlite3.Connection) -> list[Recruit]:
+			rows = conn.execute("SELECT * FROM recruits ORDER BY id ASC").fetchall()
+			return self._to_recruits(conn, rows, all_rows=True)
+		try:
+			return await DatabaseManager.run_read(_fetch)
+		except sqlite3.Error as e:
+			print(f"募集一覧の取得中にエラーが発生しました: {e}")
+			return []
+
+	async def _fetch_recruits(self, where: str, params: tuple) -> list[Recruit]:
+		"""条件に一致する募集を starts_at 順に取得する"""
+		def _fetch(conn: sqlite3.Connection) -> list[Recruit]:
+			query = f"SELECT * FROM recruits WHERE {where} ORDER BY starts_at ASC, id ASC"
+			rows = conn.execute(query, params).fetchall()
+			return self._to_recruits(conn, rows)
+		try:
+			return await DatabaseManager.run_read(_fetch)
+		except sqlite3.Error as e:
+			print(f"募集の取得中にエラーが発生しました ({where}): {e}")
+			return []
+
+	async def get_active(self, now: int) -> list[Recruit]:
+		"""削除されておらず、まだ終了していない募集を取得する (now はUNIX時刻)"""
+		return await self._fetch_recruits(
+			"is_deleted = 0 AND starts_at >= ?", (now - EXPIRY_GRACE_SECONDS,)
+		)
+
+	async def count_active(self, now: int) -> int:
+		"""削除されておらず、まだ終了していない募集の件数を返す"""
+		row = await DatabaseManager.fetch_one(
+			"SELECT COUNT(*) AS count FROM recruits WHERE is_deleted = 0 AND starts_at >= ?", (now - EXPIRY_GRACE_SECONDS,)
+		)
+		return row['count'] if row else 0
+
+	async def get_starting_between(self, start: int, end: int, unnotified_only: bool = False) -> list[Recruit]:
+		"""開始時刻が start より後、end 以前の削除されていない募集を取得する"""
+		if unnotified_only:
+			return await self._fetch_recruits(
+				"notification_sent = 0 AND is_deleted = 0 AND starts_at > ? AND starts_at <= ?", (start, end)
+			)
+		return await self._fetch_recruits("is_deleted = 0 AND starts_at > ? AND starts_at <= ?", (start, end))
+
+	async def get_expired_since(self, since: int, now: int) -> list[Recruit]:
+		"""since より後、now 以前に終了時刻（開始から EXPIRY_GRACE_SECONDS 後）を迎えた削除されていない募集を取得する"""
+		return await self._fetch_recruits(
+			"is_deleted = 0 AND starts_at > ? AND starts_at <= ?", (since - EXPIRY_GRACE_SECONDS, now - EXPIRY_GRACE_SECONDS)
+		)
+
+	async def get_recruit_by_id(self, recruit_id: int) -> Union[Recruit, None]:
+		def _fetch(conn: sqlite3.Connection) -> Union[Recruit, None]:
+			row = conn.execute("SELECT * FROM recruits WHERE id = ?", (recruit_id,)).fetchone()
+			if row is None:
+				return None
+			return self._to_recruits(conn, [row])[0]
+		try:
+			return await DatabaseManager.run_read(_fetch)
+		except sqlite3.Error as e:
+			print(f"募集の取得中にエラーが発生しました (募集ID: {recruit_id}): {e}")
+			return None
+
+	async def join_recruit(self, recruit_id: int, user_id: int, role: str = ROLE_PARTICIPANT) -> str:
+		"""
+		募集に参加者またはメンターとして参加する。
+		定員・重複・削除済みのチェックを1つの条件付きINSERTで行い、結果を JOIN_* 定数で返す。
+		"""
+		def _join(conn: sqlite3.Connection) -> str:
+			cursor = conn.execute("""
+				INSERT OR IGNORE INTO recruit_members (recruit_id, user_id, role, joined_at)
+				SELECT r.id, ?, ?, ? FROM recruits r
+				WHERE r.id = ? AND r.is_deleted = 0
+					AND (? <> 'participant' OR (
+						SELECT COUNT(*) FROM recruit_members m
+						WHERE m.recruit_id = r.id AND m.role = 'participant'
+					) < r.max_people)
+			""", (user_id, role, int(time.time()), recruit_id, role))
+			if cursor.rowcount == 1:
+				return JOIN_OK
+
+			# 参加できなかった場合のみ、理由を判定する
+			existing = conn.execute(
+				"SELECT role FROM recruit_members WHERE recruit_id = ? AND user_id = ?", (recruit_id, user_id)
+			).fetchone()
+			if existing:
+				return JOIN_ALREADY_PARTICIPANT if existing['role'] == ROLE_PARTICIPANT else JOIN_ALREADY_MENTOR
+			recruit = conn.execute("SELECT is_deleted FROM recruits WHERE id = ?", (recruit_id,)).fetchone()
+			if recruit is None or recruit['is_deleted']:
+				return JOIN_NOT_FOUND
+			return JOIN_FULL
+		try:
+			return await DatabaseManager.run_write(_join)
+		except sqlite3.Error as e:
+			print(f"参加処理中にエラーが発生しました (募集ID: {recruit_id}, ユーザーID: {user_id}): {e}")
+			return JOIN_ERROR
+
+	async def leave_recruit(self, recruit_id: int, user_id: int) -> Union[str, None]:
+		"""募集から参加を取り消し、取り消した役割 (participant / mentor) を返す。参加していなければ None"""
+		def _leave(conn: sqlite3.Connection) -> Union[str, None]:
+			rows = conn.execute(
+				"DELETE FROM recruit_members WHERE recruit_id = ? AND user_id = ? RETURNING role", (recruit_id, user_id)
+			).fetchall()
+			return rows[0]['role'] if rows else None
+		try:
+			return await DatabaseManager.run_write(_leave)
+		except sqlite3.Error as e:
+			print(f"参加取り消し中にエラーが発生しました (募集ID: {recruit_id}, ユーザーID: {user_id}): {e}")
+			return None
+
+	async def expire_due(self, now: int) -> int:
+		"""終了時刻を過ぎた active な募集を expired に遷移させ、遷移した件数を返す"""
+		def _expire(conn: sqlite3.Connection) -> int:
+			return conn.execute(
+				"UPDATE recruits SET state = ? WHERE state = ? AND is_deleted = 0 AND starts_at < ?",
+				(STATE_EXPIRED, STATE_ACTIVE, now - EXPIRY_GRACE_SECONDS)
+			).rowcount
+		try:
+			return await DatabaseManager.run_write(_expire)
+		except sqlite3.Error as e:
+			print(f"募集の終了処理中にエラーが発生しました: {e}")
+			return 0
+
+	async def get_unposted(self) -> list[Recruit]:
+		"""メッセージが未投稿（送信に失敗した）の削除されていない募集を取得する"""
+		return await self._fetch_recruits("msg_id IS NULL AND is_deleted = 0 AND archive_post_id IS NULL", ())
+
+	async def get_needing_reconcile(self) -> list[Recruit]:
+		"""起動時に描画が必要な募集（表示中の active な募集と、メッセージ未投稿の募集）を取得する"""
+		return await self._fetch_recruits(
+			"((state = ? AND is_deleted = 0) OR msg_id IS NULL) AND archive_post_id IS NULL", (STATE_ACTIVE,)
+		)
+
+	async def get_pending_threads(self) -> list[Recruit]:
+		"""保存後にスレッドの作成が完了していない、表示中の募集を取得する"""
+		return await self._fetch_recruits(
+			"thread_id = ? AND state = ? AND is_deleted = 0", (THREAD_PENDING, STATE_ACTIVE)
+		)
+
+	async def set_thread_id(self, recruit_id: int, thread_id: int):
+		"""作成したスレッドのIDを保存する"""
+		query = "UPDATE recruits SET thread_id = ? WHERE id = ?"
+		await DatabaseManager.execute_query(query, (thread_id, recruit_id))
+
+	async def get_threads_to_archive(self, limit: int) -> list[dict]:
+		"""終了または削除された募集のうち、スレッドをまだアーカイブしていないものの id / thread_id を取得する"""
+		query = """
+			SELECT id, thread_id FROM recruits
+			WHERE thread_archived_at IS NULL AND thread_id <> ? AND (state <> ? OR is_deleted = 1)
+			ORDER BY id
+			LIMIT ?
+		"""
+		return await DatabaseManager.fetch_all(query, (THREAD_PENDING, STATE_ACTIVE, limit))
+
+	async def mark_threads_archived(self, recruit_ids: list[int], archived_at: int):
+		"""スレッドを処理した募集に thread_archived_at を記録する"""
+		await self.bulk_update({recruit_id: {'thread_archived_at': archived_at} for recruit_id in recruit_ids})
+
+	async def get_archivable(self, before: int) -> list[Recruit]:
+		"""開始日時が before より前の、終了表示済みまたは削除された募集のうち、まだアーカイブしていないものを取得する"""
+		return await self._fetch_recruits(
+			"archive_post_id IS NULL AND msg_id IS NOT NULL AND (state = ? OR is_deleted = 1) AND starts_at < ?",
+			(STATE_FINALIZED, before)
+		)
+
+	async def get_archived(self, archive_post_id: int) -> list[Recruit]:
+		"""アーカイブ投稿に載せる（削除されていない）募集を開始日時順に取得する"""
+		return await self._fetch_recruits("archive_post_id = ? AND is_deleted = 0", (archive_post_id,))
+
+	async def get_archived_messages(self) -> list[dict]:
+		"""アーカイブ投稿が済んだ募集のうち、元のメッセージがまだ残っているものの id / msg_id を取得する"""
+		query = """
+			SELECT r.id, r.msg_id FROM recruits r
+			JOIN archive_posts p ON p.id = r.archive_post_id
+			WHERE r.msg_id IS NOT NULL AND p.rendered_revision >= p.revision
+			ORDER BY r.id
+		"""
+		return await DatabaseManager.fetch_all(query)
+
+	async def get_pending_finalization(self) -> list[Recruit]:
+		"""終了表示をまだ描画していない (expired の) 募集を取得する"""
+		return await self._fetch_recruits("state = ? AND is_deleted = 0", (STATE_EXPIRED,))
+
+	async def mark_finalized(self, recruit_id: int, finalized_at: int):
+		"""終了表示の描画が完了した募集を finalized にする"""
+		query = "UPDATE recruits SET state = ?, finalized_at = ? WHERE id = ? AND state = ?"
+		await DatabaseManager.execute_query(query, (STATE_FINALIZED, finalized_at, recruit_id, STATE_EXPIRED))
+
+	async def mark_finalized_many(self, recruit_ids: list[int], finalized_at: int):
+		"""複数の募集をまとめて finalized にする（1回のコミットで書き込む）"""
+		if not recruit_ids:
+			return
+		query = "UPDATE recruits SET state = ?, finalized_at = ? WHERE id = ? AND state = ?"
+		def _update(conn: sqlite3.Connection):
+			conn.executemany(query, [(STATE_FINALIZED, finalized_at, recruit_id, STATE_EXPIRED) for recruit_id in recruit_ids])
+		try:
+			await DatabaseManager.run_write(_update)
+		except sqlite3.Error as e:
+			print(f"募集の終了処理中にエラーが発生しました: {e}")
+
+	async def bulk_update(self, changes: dict[int, dict], tx: Union[WriteTransaction, None] = None) -> int:
+		"""
+		複数の募集の列をまとめて更新する（募集ID -> {列名: 値}）。
+		更新する列の組み合わせごとに executemany し、全体を1回のコミットで書き込む。
+		更新できる列は BULK_UPDATABLE_COLUMNS に限る。更新した行数を返す。
+		"""
+		groups: dict[tuple[str, ...], list[tuple]] = {}
+		for recruit_id, values in changes.items():
+			columns = tuple(sorted(values))
+			unknown = set(columns) - BULK_UPDATABLE_COLUMNS
+			if unknown:
+				raise ValueError(f"一括更新できない列です: {', '.join(sorted(unknown))}")
+			if columns:
+				groups.setdefault(columns, []).append(tuple(values[c] for c in columns) + (recruit_id,))
+		def _update(conn: sqlite3.Connection) -> int:
+			count = 0
+			for columns, params in groups.items():
+				assignments = ", ".join(f"{c} = ?" for c in columns)
+				count += conn.executemany(f"UPDATE recruits SET {assignments} WHERE id = ?", params).rowcount
+			return count
+		if not groups:
+			return 0
+		if tx is not None:
+			return await tx.run(_update)
+		try:
+			return await DatabaseManager.run_write(_update)
+		except sqlite3.Error as e:
+			print(f"募集の一括更新中にエラーが発生しました: {e}")
+			return 0
+
+	async def update_recruit_message_id(self, recruit_id: int, message_id: int, render_hash: Union[str, None] = None):
+		query = "UPDATE recruits SET msg_id = ?, render_hash = ? WHERE id = ?"
+		await DatabaseManager.execute_query(query, (message_id, render_hash, recruit_id))
+
+	async def update_render_hash(self, recruit_id: int, render_hash: Union[str, None]):
+		"""投稿済みメッセージの描画内容のハッシュを保存する"""
+		query = "UPDATE recruits SET render_hash = ? WHERE id = ?"
+		await DatabaseManager.execute_query(query, (render_hash, recruit_id))
 		
 	async def mark_notification_as_sent(self, recruit_id: int):
 		"""[修正点] 通知フラグを立てる"""
 		query = "UPDATE recruits SET notification_sent = 1 WHERE id = ?"
 		await DatabaseManager.execute_query(query, (recruit_id,))
 
-	async def mark_as_deleted(self, recruit_id: int):
+	async def mark_as_deleted(self, recruit_id: int, tx: Union[WriteTransaction, None] = None):
 		"""募集を削除済みにマークする"""
 		query = "UPDATE recruits SET is_deleted = 1 WHERE id = ?"
-		await DatabaseManager.execute_query(query, (recruit_id,))
+		await DatabaseManager.execute_query(query, (recruit_id,), tx=tx)
 
 	async def delete_recruit(self, recruit_id: int):
-		query = "DELETE FROM recruits WHERE id = ?"
-		await DatabaseManager.execute_query(query, (recruit_id,))
\ No newline at end of file
+		def _delete(conn: sqlite3.Connection):
+			conn.execute("DELETE FROM recruit_members WHERE recruit_id = ?", (recruit_id,))
+			conn.execute("DELETE FROM recruits WHERE id = ?", (recruit_id,))
+		try:
+			await DatabaseManager.run_write(_delete)
+		except sqlite3.Error as e:
+			print(f"募集の削除中にエラーが発生しました (募集ID: {recruit_id}): {e}")
\ No newline at end of file
@@ -0,0 +1,36 @@
+# application/model/recruit_changes.py
+import sqlite3
+
+from .database_manager import DatabaseManager
+
+# recruit_changes.op の値
+CHANGE_INSERT = 'insert'
+CHANGE_UPDATE = 'update'
+CHANGE_DELETE = 'delete'
+
+
+class RecruitChangeLogModel:
+	"""
+	recruits の変更履歴テーブル (recruit_changes) を読むクラス。
+	行はトリガーが追記するため、管理画面など他プロセスからの変更も含まれる。
+	"""
+
+	async def get_latest_seq(self) -> int:
+		"""記録済みの最新の連番を返す（変更がなければ 0）"""
+		row = await DatabaseManager.fetch_one("SELECT MAX(seq) AS seq FROM recruit_changes")
+		return row['seq'] if row and row['seq'] is not None else 0
+
+	async def get_since(self, seq: int, limit: int) -> list[dict]:
+		"""seq より後の変更を古い順に取得する"""
+		query = "SELECT seq, recruit_id, op, msg_id FROM recruit_changes WHERE seq > ? ORDER BY seq LIMIT ?"
+		return await DatabaseManager.fetch_all(query, (seq, limit))
+
+	async def prune(self, seq: int) -> int:
+		"""seq 以前の処理済みの変更を削除し、削除した件数を返す"""
+		def _delete(conn: sqlite3.Connection) -> int:
+			return conn.execute("DELETE FROM recruit_changes WHERE seq <= ?", (seq,)).rowcount
+		try:
+			return await DatabaseManager.run_write(_delete)
+		except sqlite3.Error as e:
+			print(f"変更履歴の削除中にエラーが発生しました: {e}")
+			return 0
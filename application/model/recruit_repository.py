@@ -0,0 +1,189 @@
+# application/model/recruit_repository.py
+import time
+from typing import Union
+
+from .recruit import Recruit, RecruitModel, ROLE_PARTICIPANT, JOIN_OK, STATE_ACTIVE
+from .sqlite_engine import WriteTransaction
+
+
+class RecruitRepository(RecruitModel):
+	"""
+	表示中（active）の募集の Recruit をメモリに保持する RecruitModel。
+	Recruit は変更されないため、キャッシュしたオブジェクトを複製せずにそのまま返す。
+	参加・取り消し・メッセージIDの更新などの頻繁な書き込みは、DBへの書き込み後にキャッシュにも反映し（ライトスルー）、
+	編集・削除・終了などの頻度の低い書き込みではキャッシュを破棄して次回の読み込みでDBから取り直す。
+	管理画面など、このプロセスを通らない書き込みに備えて、invalidate() とエントリの有効期限 (max_age) を用意する。
+	"""
+
+	def __init__(self, max_age: float = 300.0):
+		super().__init__()
+		self.max_age = max_age
+		# 募集ID -> (キャッシュした時刻, 募集)
+		self._cache: dict[int, tuple[float, Recruit]] = {}
+		# 書き込みのたびに増える。読み込み中に書き込みがあった場合は、古い可能性がある結果をキャッシュしない
+		self._write_seq = 0
+
+	@staticmethod
+	def _is_cacheable(recruit: Recruit, now: float) -> bool:
+		"""削除されておらず、まだ終了していない募集のみ保持する"""
+		return not recruit.is_deleted and recruit.state == STATE_ACTIVE and not recruit.is_expired(now)
+
+	def _store(self, recruit: Recruit, write_seq: int):
+		if write_seq != self._write_seq:
+			return
+		if self._is_cacheable(recruit, time.time()):
+			self._cache[recruit.id] = (time.monotonic(), recruit)
+		else:
+			self._cache.pop(recruit.id, None)
+
+	def _cached(self, recruit_id: int) -> Union[Recruit, None]:
+		entry = self._cache.get(recruit_id)
+		if entry is None:
+			return None
+		cached_at, recruit = entry
+		if time.monotonic() - cached_at > self.max_age or not self._is_cacheable(recruit, time.time()):
+			del self._cache[recruit_id]
+			return None
+		return recruit
+
+	def _update_cached(self, recruit_id: int, **changes):
+		"""キャッシュ済みの募集を、値を変えた新しい Recruit に置き換える（キャッシュした時刻は変えない）"""
+		self._write_seq += 1
+		recruit = self._cached(recruit_id)
+		if recruit is not None:
+			self._cache[recruit_id] = (self._cache[recruit_id][0], recruit.replace(**changes))
+
+	def _written(self, recruit_id: Union[int, None] = None, tx: Union[WriteTransaction, None] = None):
+		"""
+		書き込みを記録し、recruit_id が指定されていればキャッシュを破棄する。
+		tx 内の書き込みは、コミット前に読み込まれた古い値がキャッシュされないよう、コミット後にも破棄する。
+		"""
+		self._write_seq += 1
+		if recruit_id is not None:
+			self._cache.pop(recruit_id, None)
+		if tx is not None:
+			tx.after_commit(lambda: self._written(recruit_id))
+
+	def invalidate(self, recruit_id: Union[int, None] = None):
+		"""
+		キャッシュを破棄する（recruit_id 省略時は全件）。
+		管理画面などプロセス外でDBが書き換えられたときに呼ぶ。
+		"""
+		self._write_seq += 1
+		if recruit_id is None:
+			self._cache.clear()
+		else:
+			self._cache.pop(recruit_id, None)
+
+	def cached_count(self) -> int:
+		"""キャッシュしている募集の数を返す"""
+		return len(self._cache)
+
+	# --- 読み込み ---
+
+	async def get_recruit_by_id(self, recruit_id: int) -> Union[Recruit, None]:
+		recruit = self._cached(recruit_id)
+		if recruit is not None:
+			return recruit
+		write_seq = self._write_seq
+		recruit = await super().get_recruit_by_id(recruit_id)
+		if recruit is not None:
+			self._store(recruit, write_seq)
+		return recruit
+
+	async def get_active(self, now: int) -> list[Recruit]:
+		"""表示中の募集を取得し、キャッシュにも読み込む（起動時のスケジュール登録で使われる）"""
+		write_seq = self._write_seq
+		recruits = await super().get_active(now)
+		for recruit in recruits:
+			self._store(recruit, write_seq)
+		return recruits
+
+	# --- 頻繁な書き込み（キャッシュにも反映する） ---
+
+	async def join_recruit(self, recruit_id: int, user_id: int, role: str = ROLE_PARTICIPANT) -> str:
+		result = await super().join_recruit(recruit_id, user_id, role)
+		if result != JOIN_OK:
+			# 参加できなかった場合はプロセス外での変更も考えられるため、次回はDBから取り直す
+			self._written(recruit_id)
+			return result
+		recruit = self._cached(recruit_id)
+		if recruit is None:
+			self._write_seq += 1
+		elif role == ROLE_PARTICIPANT:
+			self._update_cached(recruit_id, participants=recruit.participants + (user_id,))
+		else:
+			self._update_cached(recruit_id, mentors=recruit.mentors + (user_id,))
+		return result
+
+	async def leave_recruit(self, recruit_id: int, user_id: int) -> Union[str, None]:
+		removed_role = await super().leave_recruit(recruit_id, user_id)
+		recruit = self._cached(recruit_id)
+		if recruit is None or removed_role is None:
+			self._write_seq += 1
+		elif removed_role == ROLE_PARTICIPANT:
+			self._update_cached(recruit_id, participants=tuple(m for m in recruit.participants if m != user_id))
+		else:
+			self._update_cached(recruit_id, mentors=tuple(m for m in recruit.mentors if m != user_id))
+		return removed_role
+
+	async def update_recruit_message_id(self, recruit_id: int, message_id: int, render_hash: Union[str, None] = None):
+		await super().update_recruit_message_id(recruit_id, message_id, render_hash)
+		self._update_cached(recruit_id, msg_id=message_id, render_hash=render_hash)
+
+	async def set_thread_id(self, recruit_id: int, thread_id: int):
+		await super().set_thread_id(recruit_id, thread_id)
+		self._update_cached(recruit_id, thread_id=thread_id)
+
+	async def update_render_hash(self, recruit_id: int, render_hash: Union[str, None]):
+		await super().update_render_hash(recruit_id, render_hash)
+		self._update_cached(recruit_id, render_hash=render_hash)
+
+	async def mark_notification_as_sent(self, recruit_id: int):
+		await super().mark_notification_as_sent(recruit_id)
+		self._update_cached(recruit_id, notification_sent=True)
+
+	# --- 頻度の低い書き込み（キャッシュを破棄する） ---
+
+	async def add_recruit(self, *args, **kwargs) -> Union[Recruit, None]:
+		recruit = await super().add_recruit(*args, **kwargs)
+		self._written()
+		if recruit is not None:
+			# 保存した内容がそのまま返ってくるため、読み直さずにキャッシュする
+			self._store(recruit, self._write_seq)
+		return recruit
+
+	async def update_recruit(self, recruit_id: int, data: dict):
+		await super().update_recruit(recruit_id, data)
+		self._written(recruit_id)
+
+	async def mark_as_deleted(self, recruit_id: int, tx: Union[WriteTransaction, None] = None):
+		await super().mark_as_deleted(recruit_id, tx=tx)
+		self._written(recruit_id, tx)
+
+	async def delete_recruit(self, recruit_id: int):
+		await super().delete_recruit(recruit_id)
+		self._written(recruit_id)
+
+	async def mark_finalized(self, recruit_id: int, finalized_at: int):
+		await super().mark_finalized(recruit_id, finalized_at)
+		self._written(recruit_id)
+
+	async def mark_finalized_many(self, recruit_ids: list[int], finalized_at: int):
+		await super().mark_finalized_many(recruit_ids, finalized_at)
+		for recruit_id in recruit_ids:
+			self._written(recruit_id)
+
+	async def bulk_update(self, changes: dict[int, dict], tx: Union[WriteTransaction, None] = None) -> int:
+		count = await super().bulk_update(changes, tx=tx)
+		for recruit_id in changes:
+			self._written(recruit_id, tx)
+		return count
+
+	async def expire_due(self, now: int) -> int:
+		count = await super().expire_due(now)
+		self._written()
+		# 終了した募集をキャッシュから取り除く
+		for recruit_id in list(self._cache):
+			self._cached(recruit_id)
+		return count
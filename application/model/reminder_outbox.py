@@ -0,0 +1,110 @@
+# application/model/reminder_outbox.py
+import sqlite3
+import time
+from typing import Union
+
+from .database_manager import DatabaseManager
+from .sqlite_engine import WriteTransaction
+
+# reminder_outbox.status の値
+OUTBOX_PENDING = 'pending'
+OUTBOX_SENT = 'sent'
+OUTBOX_FAILED = 'failed'
+OUTBOX_CANCELLED = 'cancelled'
+OUTBOX_EXPIRED = 'expired'
+
+
+class ReminderOutboxModel:
+	"""
+	通知DMの送信待ちテーブル (reminder_outbox) を管理するクラス。
+	宛先ごとに1行を持ち、送信状態・試行回数・最後のエラーを記録するため、
+	再起動しても送信済みの宛先に再送せず、未送信の宛先から再開できる。
+	"""
+
+	async def enqueue_for_recruit(self, recruit_id: int, user_ids: list[int], message: str) -> int:
+		"""
+		募集の通知DMを宛先ごとに登録し、募集の notification_sent を立てる。
+		両者は同じトランザクションで書き込まれるため、途中で停止しても二重登録や取りこぼしは起きない。
+		登録した件数を返す。
+		"""
+		now = int(time.time())
+		def _enqueue(conn: sqlite3.Connection) -> int:
+			# 日時の変更などで再通知する場合は、以前の行を送信待ちに戻す
+			count = 0
+			for user_id in dict.fromkeys(user_ids):
+				count += conn.execute("""
+					INSERT INTO reminder_outbox (recruit_id, user_id, message, status, attempts, next_attempt_at, created_at, updated_at)
+					VALUES (?, ?, ?, ?, 0, ?, ?, ?)
+					ON CONFLICT (recruit_id, user_id) DO UPDATE SET
+						message = excluded.message, status = excluded.status, attempts = 0,
+						next_attempt_at = excluded.next_attempt_at, last_error = NULL, updated_at = excluded.updated_at
+				""", (recruit_id, user_id, message, OUTBOX_PENDING, now, now, now)).rowcount
+			conn.execute("UPDATE recruits SET notification_sent = 1 WHERE id = ?", (recruit_id,))
+			return count
+		try:
+			return await DatabaseManager.run_write(_enqueue)
+		except sqlite3.Error as e:
+			print(f"通知DMの登録中にエラーが発生しました (募集ID: {recruit_id}): {e}")
+			return 0
+
+	async def get_due(self, now: int, limit: int) -> list[dict]:
+		"""送信時刻を迎えた送信待ちの行を古い順に取得する"""
+		query = """
+			SELECT * FROM reminder_outbox
+			WHERE status = ? AND next_attempt_at <= ?
+			ORDER BY next_attempt_at, id
+			LIMIT ?
+		"""
+		return await DatabaseManager.fetch_all(query, (OUTBOX_PENDING, now, limit))
+
+	async def get_next_attempt_at(self) -> Union[int, None]:
+		"""次に送信時刻を迎える送信待ちの行の時刻を返す（送信待ちがなければ None）"""
+		row = await DatabaseManager.fetch_one(
+			"SELECT MIN(next_attempt_at) AS next_attempt_at FROM reminder_outbox WHERE status = ?", (OUTBOX_PENDING,)
+		)
+		return row['next_attempt_at'] if row else None
+
+	async def mark_sent(self, outbox_id: int):
+		now = int(time.time())
+		query = "UPDATE reminder_outbox SET status = ?, attempts = attempts + 1, last_error = NULL, updated_at = ? WHERE id = ?"
+		await DatabaseManager.execute_query(query, (OUTBOX_SENT, now, outbox_id))
+
+	async def mark_retry(self, outbox_id: int, next_attempt_at: int, error: str):
+		"""送信に失敗した行の試行回数を増やし、next_attempt_at に再送する"""
+		now = int(time.time())
+		query = """
+			UPDATE reminder_outbox SET attempts = attempts + 1, next_attempt_at = ?, last_error = ?, updated_at = ?
+			WHERE id = ? AND status = ?
+		"""
+		await DatabaseManager.execute_query(query, (next_attempt_at, error, now, outbox_id, OUTBOX_PENDING))
+
+	async def mark_failed(self, outbox_id: int, error: str):
+		"""再送しても届かない行を failed にする"""
+		now = int(time.time())
+		query = "UPDATE reminder_outbox SET status = ?, attempts = attempts + 1, last_error = ?, updated_at = ? WHERE id = ?"
+		await DatabaseManager.execute_query(query, (OUTBOX_FAILED, error, now, outbox_id))
+
+	async def expire_stale(self, now: int, cutoff_seconds: int) -> int:
+		"""
+		開始 cutoff_seconds 秒前を過ぎても送信できていない行を expired にし、件数を返す。
+		再送を待つ間に開始時刻が近づいた通知を、開始後に「N分後に始まります」と送らないようにする。
+		"""
+		query = """
+			UPDATE reminder_outbox SET status = ?, updated_at = ?
+			WHERE status = ? AND recruit_id IN (
+				SELECT id FROM recruits WHERE starts_at <= ?
+			)
+		"""
+		def _expire(conn: sqlite3.Connection) -> int:
+			return conn.execute(query, (OUTBOX_EXPIRED, now, OUTBOX_PENDING, now + cutoff_seconds)).rowcount
+		try:
+			return await DatabaseManager.run_write(_expire)
+		except sqlite3.Error as e:
+			print(f"期限切れの通知DMの更新中にエラーが発生しました: {e}")
+			return 0
+
+	async def cancel_for_recruit(self, recruit_id: int, tx: Union[WriteTransaction, None] = None):
+		"""削除された募集の未送信の通知DMを取り消す"""
+		now = int(time.time())
+		query = "UPDATE reminder_outbox SET status = ?, updated_at = ? WHERE recruit_id = ? AND status = ?"
+		await DatabaseManager.execute_query(query, (OUTBOX_CANCELLED, now, recruit_id, OUTBOX_PENDING), tx=tx)
@@ -0,0 +1,119 @@
+# application/model/settings.py
+import asyncio
+import sqlite3
+from typing import Any, Awaitable, Callable, Union
+
+from .database_manager import DatabaseManager
+
+# 設定キーと値の型。ここにないキーは文字列として扱う
+SETTING_TYPES: dict[str, Callable[[str], Any]] = {
+	'channel_id': int,
+	'mentor_role_id': int,
+	'admin_role_id': int,
+	'command_tree_hash': str,
+	'header_msg_id': int,
+}
+
+# ボット自身が記録する設定（管理画面で変更するものではないため、変更をログに出さない）
+INTERNAL_SETTING_KEYS = frozenset({'command_tree_hash', 'header_msg_id'})
+
+# 変更された設定キー -> (変更前の値, 変更後の値)
+SettingsChanges = dict[str, tuple[Any, Any]]
+
+
+def _parse(key: str, raw: Union[str, None]) -> Any:
+	"""DBの文字列を設定キーの型に変換する（未設定・変換できない値は None）"""
+	if raw is None or raw == '':
+		return None
+	try:
+		return SETTING_TYPES.get(key, str)(raw)
+	except (ValueError, TypeError):
+		print(f"警告: 設定 {key} の値 '{raw}' を読み込めません。未設定として扱います。")
+		return None
+
+
+class SettingsRegistry:
+	"""
+	settings テーブルの全キーをメモリに保持し、型を付けて返すクラス。
+	読み込みは1回のクエリで全キーをまとめて行い、変更の検知は settings_version の1行だけを読む。
+	管理画面から設定が変更されると、poll_interval 秒以内に読み直して subscribe() した処理に変更内容を渡す。
+	"""
+
+	def __init__(self, poll_interval: float = 5.0):
+		self.poll_interval = poll_interval
+		self._values: dict[str, Any] = {}
+		self._version: Union[int, None] = None
+		self._listeners: list[Callable[[SettingsChanges], Awaitable[None]]] = []
+		self._poller: Union[asyncio.Task, None] = None
+
+	def get(self, key: str, default: Any = None) -> Any:
+		value = self._values.get(key)
+		return default if value is None else value
+
+	def subscribe(self, listener: Callable[[SettingsChanges], Awaitable[None]]):
+		"""設定が変更されたときに呼ぶ処理を登録する"""
+		self._listeners.append(listener)
+
+	async def load(self) -> SettingsChanges:
+		"""全ての設定を読み直し、変更されたキーを返す（subscribe した処理は呼ばない）"""
+		def _fetch(conn: sqlite3.Connection) -> tuple[int, dict[str, Union[str, None]]]:
+			# バージョンを先に読み、値がバージョンより古くならないようにする
+			row = conn.execute("SELECT version FROM settings_version WHERE id = 1").fetchone()
+			values = {row['key']: row['value'] for row in conn.execute("SELECT key, value FROM settings")}
+			return (row['version'] if row else 0), values
+		try:
+			version, raw_values = await DatabaseManager.run_read(_fetch)
+		except sqlite3.Error as e:
+			print(f"設定の読み込み中にエラーが発生しました: {e}")
+			return {}
+
+		values = {key: _parse(key, raw) for key, raw in raw_values.items()}
+		changes = {
+			key: (self._values.get(key), values.get(key))
+			for key in self._values.keys() | values.keys()
+			if self._values.get(key) != values.get(key)
+		}
+		self._values = values
+		self._version = version
+		return changes
+
+	async def refresh(self) -> SettingsChanges:
+		"""settings_version が変わっていれば読み直し、変更内容を subscribe した処理に渡す"""
+		try:
+			row = await DatabaseManager.run_read(
+				lambda conn: conn.execute("SELECT version FROM settings_version WHERE id = 1").fetchone()
+			)
+		except sqlite3.Error as e:
+			print(f"設定のバージョン確認中にエラーが発生しました: {e}")
+			return {}
+		if row is not None and row['version'] == self._version:
+			return {}
+
+		changes = await self.load()
+		if changes:
+			for listener in self._listeners:
+				try:
+					await listener(changes)
+				except Exception as e:
+					print(f"設定変更の反映中に予期せぬエラー: {e}")
+		return changes
+
+	async def set(self, key: str, value: Any):
+		"""設定を保存し、すぐにメモリにも反映する"""
+		await DatabaseManager.set_setting(key, None if value is None else str(value))
+		await self.refresh()
+
+	def start(self):
+		"""設定の変更の監視を開始する（開始済みなら何もしない）"""
+		if self._poller is None or self._poller.done():
+			self._poller = asyncio.create_task(self._poll())
+
+	def stop(self):
+		if self._poller is not None:
+			self._poller.cancel()
+			self._poller = None
+
+	async def _poll(self):
+		while True:
+			await asyncio.sleep(self.poll_interval)
+			await self.refresh()
@@ -0,0 +1,214 @@
+# application/model/sqlite_engine.py
+import asyncio
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Union
+
+from application.library.interaction_metrics import record_db_time
+
+# ロック待ちの最大秒数（管理画面など別プロセスが書き込み中の場合に待つ時間）
+BUSY_TIMEOUT = 5.0
+
+
+class _Rollback(Exception):
+	"""WriteTransaction をロールバックさせるために書き込みスレッド内で送出する例外"""
+
+
+class WriteTransaction:
+	"""
+	複数の書き込みを1つのトランザクション（1回のコミット）にまとめる作業単位。
+	async with engine.transaction() as tx: の間、書き込みスレッドはこのトランザクション専用になり、
+	tx.execute() / tx.fetch_all() などで送った文を順に実行する。
+	ブロックを正常に抜ければコミット、例外で抜ければロールバックされる。
+	ブロック内で DatabaseManager.execute_query などの通常の書き込みを await すると、
+	書き込みスレッドが空かずに待ち続けるため、書き込みは必ず tx を通すこと（読み取りは問題ない）。
+	"""
+
+	def __init__(self, engine: 'SQLiteEngine'):
+		self._engine = engine
+		self._ops: "queue.Queue[Union[tuple[Callable, Future], None, type]]" = queue.Queue()
+		self._done: Union[Future, None] = None
+		self._started_at = 0.0
+		self._after_commit: list[Callable[[], None]] = []
+
+	def after_commit(self, callback: Callable[[], None]):
+		"""コミットに成功した後に呼ぶ処理を登録する（キャッシュの破棄など。ロールバック時は呼ばれない）"""
+		self._after_commit.append(callback)
+
+	def _serve(self, conn: sqlite3.Connection):
+		"""書き込みスレッドで、終了の合図が来るまで送られた処理を実行する"""
+		while True:
+			op = self._ops.get()
+			if op is None:
+				return
+			if op is _Rollback:
+				raise _Rollback()
+			fn, future = op
+			if not future.set_running_or_notify_cancel():
+				continue
+			try:
+				future.set_result(fn(conn))
+			except BaseException as e:
+				# 文の失敗は呼び出し側に返し、トランザクションを続けるかどうかは呼び出し側が決める
+				future.set_exception(e)
+
+	async def __aenter__(self) -> 'WriteTransaction':
+		self._engine.start()
+		self._started_at = time.monotonic()
+		self._done = Future()
+		self._engine._write_queue.put((self._serve, self._done))
+		return self
+
+	async def __aexit__(self, exc_type, exc, tb) -> bool:
+		self._ops.put(None if exc_type is None else _Rollback)
+		try:
+			await asyncio.wrap_future(self._done)
+		except _Rollback:
+			return False
+		finally:
+			record_db_time(time.monotonic() - self._started_at)
+		for callback in self._after_commit:
+			callback()
+		return False
+
+	async def run(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+		"""トランザクション内で fn(conn) を実行し、その戻り値を返す"""
+		future: Future = Future()
+		self._ops.put((fn, future))
+		return await asyncio.wrap_future(future)
+
+	async def execute(self, query: str, params: tuple = ()) -> int:
+		"""1つの文を実行し、変更された行数を返す"""
+		return await self.run(lambda conn: conn.execute(query, params).rowcount)
+
+	async def execute_many(self, query: str, seq_of_params: list[tuple]) -> int:
+		"""同じ文を複数のパラメータで実行し、変更された行数の合計を返す"""
+		return await self.run(lambda conn: conn.executemany(query, seq_of_params).rowcount)
+
+	async def fetch_one(self, query: str, params: tuple = ()) -> Union[dict, None]:
+		"""1行を返す文（INSERT ... RETURNING など）を実行し、辞書として返す"""
+		def _fetch(conn: sqlite3.Connection):
+			rows = conn.execute(query, params).fetchall()
+			return dict(rows[0]) if rows else None
+		return await self.run(_fetch)
+
+	async def fetch_all(self, query: str, params: tuple = ()) -> list[dict]:
+		"""複数行を返す文を実行し、辞書のリストとして返す"""
+		return await self.run(lambda conn: [dict(row) for row in conn.execute(query, params).fetchall()])
+
+
+class SQLiteEngine:
+	"""
+	SQLiteへのアクセスをイベントループの外で実行する非同期エンジン。
+	書き込みは専用スレッドが保持する1本のコネクションで直列に処理し、
+	読み取りは少数のコネクションを持つスレッドプールで並行に処理する。
+	WALモードを使うため、読み取りが書き込みを待つことはない。
+	"""
+
+	def __init__(self, db_name: str, reader_count: int = 3):
+		self.db_name = db_name
+		self.reader_count = reader_count
+		self._lock = threading.Lock()
+		self._write_queue: "queue.Queue[Union[tuple[Callable, Future], None]]" = queue.Queue()
+		self._writer_thread: Union[threading.Thread, None] = None
+		self._reader_pool: Union[ThreadPoolExecutor, None] = None
+		self._reader_local = threading.local()
+		self._reader_conns: list[sqlite3.Connection] = []
+
+	def _connect(self) -> sqlite3.Connection:
+		"""WALモードを有効にしたコネクションを作成する"""
+		conn = sqlite3.connect(self.db_name, timeout=BUSY_TIMEOUT, check_same_thread=False)
+		conn.row_factory = sqlite3.Row
+		conn.execute("PRAGMA journal_mode=WAL")
+		conn.execute("PRAGMA synchronous=NORMAL")
+		return conn
+
+	def start(self):
+		"""書き込みスレッドと読み取りプールを起動する（起動済みなら何もしない）"""
+		with self._lock:
+			if self._writer_thread is None:
+				self._writer_thread = threading.Thread(target=self._writer_loop, name="sqlite-writer", daemon=True)
+				self._writer_thread.start()
+			if self._reader_pool is None:
+				self._reader_pool = ThreadPoolExecutor(max_workers=self.reader_count, thread_name_prefix="sqlite-reader")
+
+	def _writer_loop(self):
+		"""キューに積まれた書き込み処理を1本のコネクションで順に実行する"""
+		conn = self._connect()
+		try:
+			while True:
+				item = self._write_queue.get()
+				if item is None:
+					break
+				fn, future = item
+				if not future.set_running_or_notify_cancel():
+					continue
+				try:
+					result = fn(conn)
+					conn.commit()
+				except BaseException as e:
+					conn.rollback()
+					future.set_exception(e)
+				else:
+					future.set_result(result)
+		finally:
+			conn.close()
+
+	def _reader_connection(self) -> sqlite3.Connection:
+		"""読み取りスレッドごとのコネクションを返す"""
+		conn = getattr(self._reader_local, "conn", None)
+		if conn is None:
+			conn = self._connect()
+			self._reader_local.conn = conn
+			with self._lock:
+				self._reader_conns.append(conn)
+		return conn
+
+	def _run_read(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+		return fn(self._reader_connection())
+
+	async def write(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+		"""
+		書き込みスレッドで fn(conn) を実行し、その戻り値を返す。
+		fn が正常に終了すればコミット、例外が発生すればロールバックされる。
+		"""
+		self.start()
+		started_at = time.monotonic()
+		future: Future = Future()
+		self._write_queue.put((fn, future))
+		try:
+			return await asyncio.wrap_future(future)
+		finally:
+			# インタラクションの処理中であれば、待ち時間を含めてDB時間として記録する
+			record_db_time(time.monotonic() - started_at)
+
+	def transaction(self) -> WriteTransaction:
+		"""複数の書き込みを1回のコミットにまとめるトランザクションを返す（async with で使う）"""
+		return WriteTransaction(self)
+
+	async def read(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+		"""読み取りプールで fn(conn) を実行し、その戻り値を返す"""
+		self.start()
+		started_at = time.monotonic()
+		try:
+			return await asyncio.wrap_future(self._reader_pool.submit(self._run_read, fn))
+		finally:
+			record_db_time(time.monotonic() - started_at)
+
+	def close(self):
+		"""キューに残った書き込みを処理し終えてから、全てのコネクションを閉じる"""
+		with self._lock:
+			writer, self._writer_thread = self._writer_thread, None
+			pool, self._reader_pool = self._reader_pool, None
+		if writer is not None:
+			self._write_queue.put(None)
+			writer.join()
+		if pool is not None:
+			pool.shutdown(wait=True)
+		with self._lock:
+			conns, self._reader_conns = self._reader_conns, []
+		for conn in conns:
+			conn.close()
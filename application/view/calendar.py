@@ -65,6 +65,10 @@ class DateSelectView(discord.ui.View):
 		self.add_item(self.month_select)
 		self.add_item(self.day_select)
 
+	async def interaction_check(self, interaction: discord.Interaction) -> bool:
+		self.form_view.controller.interaction_metrics.attach(interaction, self)
+		return True
+
 	# 日の選択肢を動的に更新する関数
 	async def update_day_options(self, interaction: discord.Interaction):
 		# 選択された年月の最終日を取得
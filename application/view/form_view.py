@@ -6,6 +6,7 @@ import re
 
 if False:
 	from application.controller.GD_bot import GDBotController
+	from application.model.recruit import Recruit
 
 class HourSelect(discord.ui.Select):
 	def __init__(self, default_hour: str = None):
@@ -89,7 +90,7 @@ class CapacitySelect(discord.ui.Select):
 		await self.view.update_message(interaction)
 
 class RecruitFormView(discord.ui.View):
-	def __init__(self, controller: 'GDBotController', initial_data: dict = None, recruit_id: int = None):
+	def __init__(self, controller: 'GDBotController', initial_recruit: 'Recruit' = None, recruit_id: int = None):
 		super().__init__(timeout=600)
 		self.controller = controller
 		self.current_screen = "main"
@@ -105,21 +106,19 @@ class RecruitFormView(discord.ui.View):
 			"industry": "未設定"
 		}
 
-		if initial_data:
-			self.values["place"] = initial_data.get("place", "未設定")
-			self.values["capacity"] = str(initial_data.get("max_people", "未設定"))
+		if initial_recruit:
+			self.values["place"] = initial_recruit.place
+			self.values["capacity"] = str(initial_recruit.max_people)
 			
-			if initial_data.get("date_s"):
-				try:
-					dt_obj = datetime.strptime(initial_data["date_s"], "%Y/%m/%d %H:%M")
-					self.values["date"] = dt_obj.strftime("%Y/%m/%d")
-					self.values["time_hour"] = dt_obj.strftime("%H")
-					self.values["time_minute"] = dt_obj.strftime("%M")
-				except ValueError:
-					pass # パース失敗時は未設定のまま
+			# 開始日時は Recruit が解析済みのものを使う（不正な日時の場合は未設定のまま）
+			dt_obj = initial_recruit.start_time
+			if dt_obj is not None:
+				self.values["date"] = dt_obj.strftime("%Y/%m/%d")
+				self.values["time_hour"] = dt_obj.strftime("%H")
+				self.values["time_minute"] = dt_obj.strftime("%M")
 
 			# 修正: 既存のnoteカラムから、新しい個別のカラムにデータをマッピング
-			note = initial_data.get("note", "")
+			note = initial_recruit.note
 			if note:
 				note_parts = note.split(' / ')
 				for part in note_parts:
@@ -130,9 +129,9 @@ class RecruitFormView(discord.ui.View):
 					else:
 						self.values["note_message"] = part
 			
-			self.values["note_message"] = initial_data.get("message", "未設定")
-			self.values["mentor_needed"] = initial_data.get("mentor_needed", 0) == 1
-			self.values["industry"] = initial_data.get("industry", "未設定")
+			self.values["note_message"] = initial_recruit.message
+			self.values["mentor_needed"] = initial_recruit.mentor_needed
+			self.values["industry"] = initial_recruit.industry
 		
 		self.add_main_buttons()
 
@@ -222,6 +221,7 @@ class RecruitFormView(discord.ui.View):
 		await self.update_message(interaction)
 	
 	async def interaction_check(self, interaction: discord.Interaction):
+		self.controller.interaction_metrics.attach(interaction, self)
 		custom_id = interaction.data.get("custom_id")
 
 		if custom_id == "set_date":
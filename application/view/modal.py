@@ -22,6 +22,10 @@ class TextInputModal(discord.ui.Modal):
 		)
 		self.add_item(self.text_input)
 
+	async def interaction_check(self, interaction: discord.Interaction) -> bool:
+		self.parent_view.controller.interaction_metrics.attach(interaction, self)
+		return True
+
 	async def on_submit(self, interaction: discord.Interaction):
 		self.parent_view.values[self.key] = self.text_input.value
 		await self.parent_view.update_message(interaction)
@@ -31,6 +35,10 @@ class DateInputModal(discord.ui.Modal, title="日付入力"):
 		super().__init__()
 		self.parent_view = parent_view
 
+	async def interaction_check(self, interaction: discord.Interaction) -> bool:
+		self.parent_view.controller.interaction_metrics.attach(interaction, self)
+		return True
+
 	month_input = discord.ui.TextInput(
 		label="月 (1-12の数字)",
 		placeholder="",
@@ -1,10 +1,12 @@
 # application/view/recruit.py
 import discord
-from datetime import datetime, timedelta
-import pytz
+import sqlite3
 
 from typing import TYPE_CHECKING
-from application.model.recruit import Recruit
+from application.model.recruit import (
+	Recruit, ROLE_PARTICIPANT, ROLE_MENTOR,
+	JOIN_OK, JOIN_FULL, JOIN_ALREADY_PARTICIPANT, JOIN_ALREADY_MENTOR, JOIN_NOT_FOUND,
+)
 
 if TYPE_CHECKING:
 	from application.controller.GD_bot import GDBotController
@@ -15,33 +17,32 @@ class MentorJoinChoiceView(discord.ui.View):
 		self.controller = controller
 		self.recruit_id = recruit_id
 
-	async def update_main_message(self):
-		updated_recruit_data = await self.controller.recruit_model.get_recruit_by_id(self.recruit_id)
-		channel = self.controller.bot.get_channel(self.controller.channel_id)
-		if updated_recruit_data and channel:
-			await self.controller._send_or_update_recruit_message(channel, updated_recruit_data)
+	async def interaction_check(self, interaction: discord.Interaction) -> bool:
+		self.controller.interaction_metrics.attach(interaction, self)
+		return True
+
+	def update_main_message(self):
+		# 再描画はスケジューラに任せ、応答を待たせない
+		self.controller.request_render(self.recruit_id)
 
 	@discord.ui.button(label="FB要員として参加", style=discord.ButtonStyle.primary, custom_id="join_as_mentor")
 	async def join_as_mentor_callback(self, interaction: discord.Interaction, button: discord.ui.Button):
-		recruit_data = await self.controller.recruit_model.get_recruit_by_id(self.recruit_id)
-		if not recruit_data:
+		result = await self.controller.recruit_model.join_recruit(self.recruit_id, interaction.user.id, ROLE_MENTOR)
+
+		if result == JOIN_NOT_FOUND:
 			await interaction.response.edit_message(content="エラー: 募集が存在しません。", view=None)
 			return
-
-		user_id = interaction.user.id
-		mentors = recruit_data.get('mentors', [])
-		participants = recruit_data.get('participants', [])
-
-		if user_id in mentors:
+		if result == JOIN_ALREADY_MENTOR:
 			await interaction.response.edit_message(content="あなたは既にFB要員として参加しています。", view=None)
 			return
-		if user_id in participants:
+		if result == JOIN_ALREADY_PARTICIPANT:
 			await interaction.response.edit_message(content="あなたは既にGDメンバーとして参加しています。一度参加を取り消してから再度お試しください。", view=None)
 			return
+		if result != JOIN_OK:
+			await interaction.response.edit_message(content="エラー: 参加処理に失敗しました。", view=None)
+			return
 
-		mentors.append(user_id)
-		await self.controller.recruit_model.update_recruit_mentors(self.recruit_id, mentors)
-		await self.update_main_message()
+		self.update_main_message()
 		
 		await interaction.response.edit_message(content="FB要員として参加しました。", view=None)
 		self.stop()
@@ -49,82 +50,71 @@ class MentorJoinChoiceView(discord.ui.View):
 	@discord.ui.button(label="GDメンバーとして参加", style=discord.ButtonStyle.secondary, custom_id="join_as_member")
 	async def join_as_member_callback(self, interaction: discord.Interaction, button: discord.ui.Button):
 		await interaction.response.edit_message(content="GDメンバーとして参加処理中です...", view=None)
-		# JoinLeaveButtons には recruit_id (int) を渡す
-		await JoinLeaveButtons(self.controller, self.recruit_id)._perform_join(interaction)
+		await RecruitActionButton("join", self.recruit_id)._perform_join(interaction)
 		self.stop()
 	
 	async def on_timeout(self):
 		self.stop()
 
-class JoinLeaveButtons(discord.ui.View):
+class RecruitActionButton(discord.ui.DynamicItem[discord.ui.Button], template=r'(?P<action>join|leave|edit|delete|event):(?P<recruit_id>[0-9]+)'):
 	"""
-	各募集メッセージに付与される「参加予定に追加」「参加予定を削除」「編集」ボタンのビュー。
+	募集メッセージの「参加予定に追加」「参加予定を削除」「編集」「募集を削除」ボタン。
+	custom_id（"<操作>:<募集ID>"）から募集IDを読み取って処理するため、起動時に1回登録するだけで
+	過去に投稿されたメッセージのボタンも受け付けられ、募集の数によらずメモリ使用量は一定になる。
 	"""
-	def __init__(self, controller: 'GDBotController', recruit_or_id: 'Recruit' or int):
-		super().__init__(timeout=None)
-		self.controller = controller
+	# register_dynamic_items で設定される
+	controller: 'GDBotController' = None
 
-		# recruit_or_id が Recruit オブジェクトか ID (int) かを判定
-		if isinstance(recruit_or_id, Recruit):
-			recruit = recruit_or_id
-			self.recruit_id = recruit.id
-
-			# Recruit オブジェクトが渡された場合のみ、ボタンをすべて生成する
-			join_button = discord.ui.Button(
-				label="参加予定に追加",
-				style=discord.ButtonStyle.secondary if recruit.is_full() else discord.ButtonStyle.success,
-				custom_id=f"join:{self.recruit_id}",
-				disabled=recruit.is_full()
-			)
-			join_button.callback = self.join_callback
-			self.add_item(join_button)
-
-			leave_button = discord.ui.Button(label="参加予定を削除", style=discord.ButtonStyle.secondary, custom_id=f"leave:{self.recruit_id}")
-			leave_button.callback = self.leave_callback
-			self.add_item(leave_button)
-
-			edit_button = discord.ui.Button(label="編集", style=discord.ButtonStyle.primary, custom_id=f"edit:{self.recruit_id}")
-			edit_button.callback = self.edit_callback
-			self.add_item(edit_button)
-
-			delete_button = discord.ui.Button(label="募集を削除", style=discord.ButtonStyle.danger, custom_id=f"delete:{self.recruit_id}")
-			delete_button.callback = self.delete_callback
-			self.add_item(delete_button)
-		else:
-			# ID (int) が渡された場合は、IDをセットするだけ
-			self.recruit_id = recruit_or_id
+	def __init__(self, action: str, recruit_id: int, **button_kwargs):
+		super().__init__(discord.ui.Button(custom_id=f"{action}:{recruit_id}", **button_kwargs))
+		self.action = action
+		self.recruit_id = recruit_id
+
+	@classmethod
+	async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+		return cls(match['action'], int(match['recruit_id']))
+
+	async def interaction_check(self, interaction: discord.Interaction) -> bool:
+		self.controller.interaction_metrics.attach(interaction, self)
+		return True
+
+	async def callback(self, interaction: discord.Interaction):
+		handler = {
+			"join": self.join_callback,
+			"leave": self.leave_callback,
+			"edit": self.edit_callback,
+			"delete": self.delete_callback,
+			"event": self.event_callback,
+		}[self.action]
+		await handler(interaction)
 
 	async def _perform_join(self, interaction: discord.Interaction):
-		recruit_data = await self.controller.recruit_model.get_recruit_by_id(self.recruit_id)
-		if not recruit_data:
-			await interaction.followup.send("エラー: その募集は存在しないか、削除されました。", ephemeral=True)
-			return
+		result = await self.controller.recruit_model.join_recruit(self.recruit_id, interaction.user.id, ROLE_PARTICIPANT)
 
-		user_id = interaction.user.id
-		participants = recruit_data.get('participants', [])
-		mentors = recruit_data.get('mentors', [])
+		if result == JOIN_NOT_FOUND:
+			await self.controller.send_followup(interaction, "エラー: その募集は存在しないか、削除されました。", ephemeral=True)
+			return
 
-		if user_id in participants:
-			await interaction.followup.send("あなたは既にGDメンバーとして参加しています。", ephemeral=True)
+		if result == JOIN_ALREADY_PARTICIPANT:
+			await self.controller.send_followup(interaction, "あなたは既にGDメンバーとして参加しています。", ephemeral=True)
 			return
 		
-		if user_id in mentors:
-			await interaction.followup.send("あなたは既にFB要員として参加しています。一度参加を取り消してから再度お試しください。", ephemeral=True)
+		if result == JOIN_ALREADY_MENTOR:
+			await self.controller.send_followup(interaction, "あなたは既にFB要員として参加しています。一度参加を取り消してから再度お試しください。", ephemeral=True)
 			return
 
-		if len(participants) >= recruit_data['max_people']:
-			await interaction.followup.send("この募集は満員です。", ephemeral=True)
+		if result == JOIN_FULL:
+			await self.controller.send_followup(interaction, "この募集は満員です。", ephemeral=True)
 			return
 
-		participants.append(user_id)
-		await self.controller.recruit_model.update_recruit_participants(self.recruit_id, participants)
+		if result != JOIN_OK:
+			await self.controller.send_followup(interaction, "エラー: 参加処理に失敗しました。", ephemeral=True)
+			return
 		
-		updated_recruit_data = await self.controller.recruit_model.get_recruit_by_id(self.recruit_id)
-		channel = self.controller.bot.get_channel(self.controller.channel_id)
-		if updated_recruit_data and channel:
-			await self.controller._send_or_update_recruit_message(channel, updated_recruit_data)
+		# 再描画はスケジューラに任せ、応答を待たせない
+		self.controller.request_render(self.recruit_id)
 		
-		await interaction.followup.send("GDメンバーとして参加しました。", ephemeral=True)
+		await self.controller.send_followup(interaction, "GDメンバーとして参加しました。", ephemeral=True)
 
 
 	async def join_callback(self, interaction: discord.Interaction):
@@ -136,45 +126,27 @@ class JoinLeaveButtons(discord.ui.View):
 
 		if user_has_mentor_role:
 			view = MentorJoinChoiceView(self.controller, self.recruit_id)
-			await interaction.followup.send("参加方法を選択してください。", view=view, ephemeral=True)
+			await self.controller.send_followup(interaction, "参加方法を選択してください。", view=view, ephemeral=True)
 		else:
 			await self._perform_join(interaction)
 
 	async def leave_callback(self, interaction: discord.Interaction):
 		await interaction.response.defer(ephemeral=True)
-		recruit_data = await self.controller.recruit_model.get_recruit_by_id(self.recruit_id)
-		if not recruit_data:
-			return
-
-		user_id = interaction.user.id
-		participants = recruit_data.get('participants', [])
-		mentors = recruit_data.get('mentors', [])
-		
-		removed = False
-		if user_id in participants:
-			participants.remove(user_id)
-			await self.controller.recruit_model.update_recruit_participants(self.recruit_id, participants)
-			removed = True
-		elif user_id in mentors:
-			mentors.remove(user_id)
-			await self.controller.recruit_model.update_recruit_mentors(self.recruit_id, mentors)
-			removed = True
+		removed_role = await self.controller.recruit_model.leave_recruit(self.recruit_id, interaction.user.id)
 		
-		if removed:
-			updated_recruit_data = await self.controller.recruit_model.get_recruit_by_id(self.recruit_id)
-			channel = self.controller.bot.get_channel(self.controller.channel_id)
-			if updated_recruit_data and channel:
-				await self.controller._send_or_update_recruit_message(channel, updated_recruit_data)
+		if removed_role:
+			# 再描画はスケジューラに任せ、応答を待たせない
+			self.controller.request_render(self.recruit_id)
 
 	async def edit_callback(self, interaction: discord.Interaction):
 		await interaction.response.defer(ephemeral=True)
-		recruit_data = await self.controller.recruit_model.get_recruit_by_id(self.recruit_id)
-		if not recruit_data:
-			await interaction.followup.send("エラー: その募集は存在しないか、削除されました。", ephemeral=True)
+		recruit = await self.controller.recruit_model.get_recruit_by_id(self.recruit_id)
+		if not recruit:
+			await self.controller.send_followup(interaction, "エラー: その募集は存在しないか、削除されました。", ephemeral=True)
 			return
 
 		user = interaction.user
-		author_id = recruit_data.get('author_id')
+		author_id = recruit.author_id
 		admin_role_id = self.controller.ADMIN_ROLE_ID
 
 		is_authorized = False
@@ -182,22 +154,22 @@ class JoinLeaveButtons(discord.ui.View):
 			is_authorized = user.id == author_id or (admin_role_id and any(role.id == admin_role_id for role in user.roles))
 
 		if not is_authorized:
-			await interaction.followup.send("あなたには、この募集を編集する権限がありません。", ephemeral=True)
+			await self.controller.send_followup(interaction, "あなたには、この募集を編集する権限がありません。", ephemeral=True)
 		else:
 			from application.view.form_view import RecruitFormView
-			form_view = RecruitFormView(self.controller, initial_data=recruit_data, recruit_id=self.recruit_id)
+			form_view = RecruitFormView(self.controller, initial_recruit=recruit, recruit_id=self.recruit_id)
 			embed = form_view.create_embed()
-			await interaction.followup.send(embed=embed, view=form_view, ephemeral=True)
+			await self.controller.send_followup(interaction, embed=embed, view=form_view, ephemeral=True)
 
 	async def delete_callback(self, interaction: discord.Interaction):
 		await interaction.response.defer(ephemeral=True)
-		recruit_data = await self.controller.recruit_model.get_recruit_by_id(self.recruit_id)
-		if not recruit_data:
-			await interaction.followup.send("エラー: その募集は存在しないか、削除されました。", ephemeral=True)
+		recruit = await self.controller.recruit_model.get_recruit_by_id(self.recruit_id)
+		if not recruit:
+			await self.controller.send_followup(interaction, "エラー: その募集は存在しないか、削除されました。", ephemeral=True)
 			return
 
 		user = interaction.user
-		author_id = recruit_data.get('author_id')
+		author_id = recruit.author_id
 		admin_role_id = self.controller.ADMIN_ROLE_ID
 
 		is_authorized = False
@@ -205,23 +177,90 @@ class JoinLeaveButtons(discord.ui.View):
 			is_authorized = user.id == author_id or (admin_role_id and any(role.id == admin_role_id for role in user.roles))
 
 		if not is_authorized:
-			await interaction.followup.send("あなたには、この募集を削除する権限がありません。", ephemeral=True)
+			await self.controller.send_followup(interaction, "あなたには、この募集を削除する権限がありません。", ephemeral=True)
 			return
 
-		if recruit_data.get('participants') or recruit_data.get('mentors'):
-			await interaction.followup.send("参加者またはメンターがいるため、この募集を削除できません。", ephemeral=True)
+		if recruit.member_ids:
+			await self.controller.send_followup(interaction, "参加者またはメンターがいるため、この募集を削除できません。", ephemeral=True)
 			return
 		
-		await self.controller.recruit_model.mark_as_deleted(self.recruit_id)
+		# 削除済みへの変更と未送信の通知DMの取り消しを1つのトランザクションで書き込む
+		try:
+			async with self.controller.recruit_model.transaction() as tx:
+				await self.controller.recruit_model.mark_as_deleted(self.recruit_id, tx=tx)
+				await self.controller.reminder_outbox.cancel_for_recruit(self.recruit_id, tx=tx)
+		except sqlite3.Error as e:
+			print(f"募集の削除中にエラーが発生しました (募集ID: {self.recruit_id}): {e}")
+			await self.controller.send_followup(interaction, "エラー: 募集の削除に失敗しました。", ephemeral=True)
+			return
+		self.controller.unschedule_recruit(self.recruit_id)
+		self.controller.thread_archiver.notify()
 		
-		updated_recruit_data = await self.controller.recruit_model.get_recruit_by_id(self.recruit_id)
-		channel = self.controller.bot.get_channel(self.controller.channel_id)
-		if updated_recruit_data and channel:
-			await self.controller._send_or_update_recruit_message(channel, updated_recruit_data)
+		# 再描画はスケジューラに任せ、応答を待たせない
+		self.controller.request_render(self.recruit_id)
 		
-		await interaction.followup.send("募集を削除しました。", ephemeral=True)
+		await self.controller.send_followup(interaction, "募集を削除しました。", ephemeral=True)
+
+	async def event_callback(self, interaction: discord.Interaction):
+		await interaction.response.defer(ephemeral=True)
+		recruit = await self.controller.recruit_model.get_recruit_by_id(self.recruit_id)
+		if not recruit:
+			await self.controller.send_followup(interaction, "エラー: その募集は存在しないか、削除されました。", ephemeral=True)
+			return
+		await self.controller.create_scheduled_event(interaction, recruit)
+
+class JoinLeaveButtons(discord.ui.View):
+	"""
+	各募集メッセージに付与される「参加予定に追加」「参加予定を削除」「編集」ボタンのビュー。
+	ボタンは全て RecruitActionButton のため、このビュー自体はメッセージごとに保持されない。
+	"""
+	def __init__(self, controller: 'GDBotController', recruit: 'Recruit'):
+		super().__init__(timeout=None)
+		self.controller = controller
+		self.recruit_id = recruit.id
+
+		self.add_item(RecruitActionButton(
+			"join", self.recruit_id,
+			label="参加予定に追加",
+			style=discord.ButtonStyle.secondary if recruit.is_full() else discord.ButtonStyle.success,
+			disabled=recruit.is_full()
+		))
+		self.add_item(RecruitActionButton("leave", self.recruit_id, label="参加予定を削除", style=discord.ButtonStyle.secondary))
+		self.add_item(RecruitActionButton("edit", self.recruit_id, label="編集", style=discord.ButtonStyle.primary))
+		self.add_item(RecruitActionButton("delete", self.recruit_id, label="募集を削除", style=discord.ButtonStyle.danger))
+
+class CreateRecruitButton(discord.ui.DynamicItem[discord.ui.Button], template=r'test'):
+	"""ヘッダーと各募集メッセージの「募集を作成」「新たな募集を追加」ボタン"""
+	# register_dynamic_items で設定される
+	controller: 'GDBotController' = None
+
+	def __init__(self, label: str = "新たな募集を追加"):
+		super().__init__(discord.ui.Button(label=label, style=discord.ButtonStyle.primary, custom_id="test"))
+
+	@classmethod
+	async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+		return cls(item.label or "新たな募集を追加")
+
+	async def interaction_check(self, interaction: discord.Interaction) -> bool:
+		self.controller.interaction_metrics.attach(interaction, self)
+		return True
+
+	async def callback(self, interaction: discord.Interaction):
+		from application.view.form_view import RecruitFormView
+		form_view = RecruitFormView(self.controller)
+		embed = form_view.create_embed()
+		try:
+			await interaction.response.send_message(embed=embed, view=form_view, ephemeral=True)
+		except discord.errors.NotFound:
+			print(f"インタラクションエラー: 'Unknown interaction' - custom_id: {self.custom_id}")
+
+def register_dynamic_items(controller: 'GDBotController'):
+	"""custom_id のテンプレートで処理するボタンをボットに登録する（起動時に1回だけ呼ぶ）"""
+	RecruitActionButton.controller = controller
+	CreateRecruitButton.controller = controller
+	controller.bot.add_dynamic_items(RecruitActionButton, CreateRecruitButton)
 
 class HeaderView(discord.ui.View):
 	def __init__(self):
 		super().__init__(timeout=None)
-		self.add_item(discord.ui.Button(label="募集を作成", style=discord.ButtonStyle.primary, custom_id="test"))
\ No newline at end of file
+		self.add_item(CreateRecruitButton(label="募集を作成"))
\ No newline at end of file
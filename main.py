@@ -1,47 +1,67 @@
-# main.py
-import os
-import discord
-from dotenv import load_dotenv
-from discord.ext import commands
-
-# 変更: コントローラーのインポートパス
-from application.controller.GD_bot import GDBotController
-from application.model.database_manager import DatabaseManager # DB初期化用
-
-# .envファイルを読み込む
-load_dotenv()
-
-# 環境変数からDiscordボットトークンを取得
-TOKEN = os.getenv('DISCORD_BOT_TOKEN')
-if TOKEN is None:
-    print("エラー: DISCORD_BOT_TOKEN 環境変数が設定されていません。")
-    exit(1)
-
-# ▼▼▼【削除】環境変数からのCHANNEL_ID読み込みを削除 ▼▼▼
-# try:
-#     CHANNEL_ID = int(os.getenv('CHANNEL_ID'))
-# except (TypeError, ValueError):
-#     print("エラー: CHANNEL_ID 環境変数が不正、または設定されていません。")
-#     exit(1)
-# ▲▲▲【削除】ここまで ▲▲▲
-
-# Discord Intentsの設定
-intents = discord.Intents.default()
-intents.message_content = True
-intents.messages = True
-intents.guilds = True
-intents.members = True
-
-# Botインスタンスの作成
-bot = commands.Bot(command_prefix="!", intents=intents)
-
-# データベースの初期化（テーブル作成など）
-DatabaseManager.initialize_db()
-
-# ▼▼▼【修正】Controller初期化時の引数からCHANNEL_IDを削除 ▼▼▼
-# Controllerが全てのロジックとイベントハンドリングを担う
-GDBotController(bot)
-# ▲▲▲【修正】ここまで ▲▲▲
-
-# ボットを起動
-bot.run(TOKEN)
\ No newline at end of file
+# main.py
+import os
+import argparse
+import discord
+from dotenv import load_dotenv
+from discord.ext import commands
+
+# 変更: コントローラーのインポートパス
+from application.controller.GD_bot import GDBotController
+from application.model.database_manager import DatabaseManager # DB初期化用
+
+# .envファイルを読み込む
+load_dotenv()
+
+# コマンドライン引数
+parser = argparse.ArgumentParser(description="GD練習募集ボット")
+parser.add_argument('--migrate-only', action='store_true', help="データベースのマイグレーションのみを実行して終了する")
+parser.add_argument(
+	'--archive-period', choices=['day', 'week'], default=os.getenv('ARCHIVE_PERIOD') or None,
+	help="終了した募集のメッセージを日 (day) または週 (week) ごとのアーカイブ投稿にまとめる（省略時はまとめない）"
+)
+args = parser.parse_args()
+# 環境変数から読んだ既定値は choices で検証されないため、ここで確認する
+if args.archive_period not in (None, 'day', 'week'):
+	parser.error(f"ARCHIVE_PERIOD には day または week を指定してください: {args.archive_period}")
+
+# データベースの初期化（未適用のマイグレーションを適用）
+if not DatabaseManager.initialize_db():
+	exit(1)
+if args.migrate_only:
+	exit(0)
+
+# 環境変数からDiscordボットトークンを取得
+TOKEN = os.getenv('DISCORD_BOT_TOKEN')
+if TOKEN is None:
+    print("エラー: DISCORD_BOT_TOKEN 環境変数が設定されていません。")
+    exit(1)
+
+# ▼▼▼【削除】環境変数からのCHANNEL_ID読み込みを削除 ▼▼▼
+# try:
+#     CHANNEL_ID = int(os.getenv('CHANNEL_ID'))
+# except (TypeError, ValueError):
+#     print("エラー: CHANNEL_ID 環境変数が不正、または設定されていません。")
+#     exit(1)
+# ▲▲▲【削除】ここまで ▲▲▲
+
+# Discord Intentsの設定
+intents = discord.Intents.default()
+intents.message_content = True
+intents.messages = True
+intents.guilds = True
+intents.members = True
+
+# Botインスタンスの作成
+bot = commands.Bot(command_prefix="!", intents=intents)
+
+# ▼▼▼【修正】Controller初期化時の引数からCHANNEL_IDを削除 ▼▼▼
+# Controllerが全てのロジックとイベントハンドリングを担う
+GDBotController(bot, archive_period=args.archive_period)
+# ▲▲▲【修正】ここまで ▲▲▲
+
+# ボットを起動
+try:
+	bot.run(TOKEN)
+finally:
+	# 書き込みキューを処理し終えてからDBコネクションを閉じる
+	DatabaseManager.close()